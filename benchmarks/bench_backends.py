@@ -0,0 +1,71 @@
+"""
+Throughput, latency and fp32 parity of the FinBERT inference backends.
+
+Each backend scores the fixed corpus in benchmarks/fixtures/finbert_corpus.txt:
+throughput is measured on batched calls, latency on one text per call, and
+parity compares labels and class probabilities with the fp32 torch backend.
+The ONNX backend is skipped when onnxruntime is not installed.
+
+Run from the repository root:
+    uv run python benchmarks/bench_backends.py
+"""
+import importlib.util
+import os
+import sys
+import time
+
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from logics.finbert_backends import BACKENDS, check_parity, load_backend
+from logics.registry import FINBERT_MODEL_ID
+from logics.sentiment import score_texts
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "finbert_corpus.txt")
+THROUGHPUT_ROUNDS = 5
+BATCH_SIZE = 16
+
+def load_corpus():
+    with open(CORPUS_PATH) as f:
+        return [line.strip() for line in f if line.strip()]
+
+def bench(name: str, corpus, reference):
+    start = time.perf_counter()
+    finbert = load_backend(name, FINBERT_MODEL_ID)
+    load_seconds = time.perf_counter() - start
+    results = score_texts(corpus, BATCH_SIZE, finbert)  # Warm up and check parity
+
+    start = time.perf_counter()
+    for _ in range(THROUGHPUT_ROUNDS):
+        score_texts(corpus, BATCH_SIZE, finbert)
+    throughput = THROUGHPUT_ROUNDS * len(corpus) / (time.perf_counter() - start)
+
+    latencies = []
+    for text in corpus:
+        start = time.perf_counter()
+        score_texts([text], BATCH_SIZE, finbert)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "load_s": load_seconds,
+        "texts_per_s": throughput,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        **check_parity(reference, results)
+    }
+
+if __name__ == "__main__":
+    corpus = load_corpus()
+    names = [name for name in BACKENDS if name != "onnx" or importlib.util.find_spec("onnxruntime")]
+
+    print(f"{FINBERT_MODEL_ID}, {len(corpus)} texts")
+    print(f"{'backend':<12} {'load (s)':>9} {'texts/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'labels':>7} {'max diff':>9}")
+    reference = score_texts(corpus, BATCH_SIZE, load_backend("torch", FINBERT_MODEL_ID))
+    for name in names:
+        result = bench(name, corpus, reference)
+        print(
+            f"{name:<12} {result['load_s']:>9.2f} {result['texts_per_s']:>9.1f} {result['p50_ms']:>9.2f} "
+            f"{result['p99_ms']:>9.2f} {result['label_agreement']:>7.0%} {result['max_score_diff']:>9.2e}"
+        )
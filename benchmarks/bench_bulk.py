@@ -0,0 +1,49 @@
+"""
+Per-symbol loop versus the bulk API for 50 and 500 S&P 500 symbols.
+
+Both paths start from an empty bar store and an empty stock_cache, so every
+symbol is downloaded. This talks to Yahoo Finance; expect rate limiting on
+repeated runs.
+
+Run from the repository root:
+    uv run python benchmarks/bench_bulk.py
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from logics import bar_store, symbols
+
+SIZES = [50, 500]
+PERIOD = "1mo"
+
+def reset():
+    symbols.stock_cache.clear()
+    bar_store._shared_store = bar_store.BarStore(tempfile.mkdtemp())
+
+def per_symbol(symbol_list):
+    for symbol in symbol_list:
+        symbols.get_stock_history(symbol, PERIOD)
+        symbols.get_stock_info(symbol)
+
+def bulk(symbol_list):
+    symbols.get_stocks_history_bulk(symbol_list, PERIOD)
+    symbols.get_stocks_info_bulk(symbol_list)
+
+def timed(func, symbol_list) -> float:
+    reset()
+    start = time.perf_counter()
+    func(symbol_list)
+    return time.perf_counter() - start
+
+if __name__ == "__main__":
+    universe = symbols.get_sp500_symbols()
+    print(f"{'symbols':>8} {'per-symbol (s)':>15} {'bulk (s)':>10} {'speedup':>8}")
+    for size in SIZES:
+        symbol_list = universe[:size]
+        loop_seconds = timed(per_symbol, symbol_list)
+        bulk_seconds = timed(bulk, symbol_list)
+        print(f"{len(symbol_list):>8} {loop_seconds:>15.1f} {bulk_seconds:>10.1f} {loop_seconds / bulk_seconds:>7.1f}x")
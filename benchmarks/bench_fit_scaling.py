@@ -0,0 +1,91 @@
+"""
+Prophet fit throughput of the FitEngine from 1 to N worker processes.
+
+Every symbol gets its own synthetic two-year daily series, so each run is a
+batch of cold fits with nothing served from the model store. Worker processes
+are started and have imported Prophet before the clock starts. For each pool
+size the benchmark reports wall time, fits per second, speedup and parallel
+efficiency against one worker, the median time per fit, and the projected
+time for a full-universe refresh.
+
+Run from the repository root:
+    uv run python benchmarks/bench_fit_scaling.py
+    uv run python benchmarks/bench_fit_scaling.py --workers 1 2 4 8 --symbols 32 --threads 1
+--threads 0 leaves the worker thread pools unpinned, to compare against pinning.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DAYS = 500
+UNIVERSE_SIZE = 503  # S&P 500 constituents, for the full-refresh projection
+
+def training_data(seed: int):
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range("2023-01-02", periods=DAYS, freq="B")
+    y = 150 + rng.standard_normal(DAYS).cumsum() + 5 * np.sin(np.arange(DAYS) / 20 + seed)
+    sentiment = np.clip(rng.normal(0.1, 0.3, DAYS), -1, 1)
+    return pd.DataFrame({"ds": ds, "y": y, "sentiment": sentiment})
+
+def worker_counts(limit: int):
+    counts, n = [], 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    return counts + [limit]
+
+def run(workers: int, threads: int, frames: dict) -> dict:
+    from logics import model_store, predictor
+    from logics.fit_engine import FitEngine
+
+    # Empty stores, so every symbol is a cold fit
+    model_store._shared_store = model_store.ModelStore(tempfile.mkdtemp())
+    predictor._forecast_cache.clear()
+
+    engine = FitEngine(workers=workers, threads_per_worker=threads, prepare_workers=1)
+    try:
+        engine.warm_up()
+        start = time.perf_counter()
+        results = list(engine.forecast_symbols(frames, prepare=frames.__getitem__))
+        seconds = time.perf_counter() - start
+    finally:
+        engine.close()
+
+    errors = [r for r in results if r["error"] is not None]
+    if errors:
+        raise RuntimeError(f"{len(errors)} fits failed, e.g. {errors[0]['symbol']}: {errors[0]['error']}")
+    return {
+        "workers": workers,
+        "seconds": seconds,
+        "fits_per_second": len(results) / seconds,
+        "median_fit": statistics.median(r["seconds"] for r in results)
+    }
+
+if __name__ == "__main__":
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=worker_counts(cores), help="pool sizes to measure")
+    parser.add_argument("--symbols", type=int, default=max(8, 4 * cores), help="symbols fitted per pool size")
+    parser.add_argument("--threads", type=int, default=1, help="native threads per worker, 0 leaves them unpinned")
+    args = parser.parse_args()
+
+    frames = {f"SYM{i:03d}": training_data(i) for i in range(args.symbols)}
+    print(f"{args.symbols} cold fits per run, {cores} cores, {args.threads or 'unpinned'} threads per worker")
+    print(f"{'workers':>8} {'wall (s)':>9} {'fits/s':>8} {'speedup':>8} {'efficiency':>11} {'fit p50 (s)':>12} {'universe (min)':>15}")
+    base = None
+    for workers in args.workers:
+        report = run(workers, args.threads, frames)
+        base = base or report["fits_per_second"] / report["workers"]
+        speedup = report["fits_per_second"] / base
+        print(
+            f"{workers:>8} {report['seconds']:>9.2f} {report['fits_per_second']:>8.2f} {speedup:>7.2f}x"
+            f" {speedup / workers:>10.0%} {report['median_fit']:>12.2f} {UNIVERSE_SIZE / report['fits_per_second'] / 60:>15.1f}"
+        )
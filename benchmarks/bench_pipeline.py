@@ -0,0 +1,276 @@
+"""
+Offline benchmark of the full request pipeline.
+
+Replays the recorded yfinance histories and Tavily responses in
+benchmarks/fixtures/pipeline (see replay.py) through get_stock_history,
+SentimentAnalyzer.analyze_company_sentiment and predict_stock_prices, then
+drives the FastAPI endpoints end to end with an in-process HTTP client. No
+network is used; FinBERT and Prophet run for real.
+
+Each scenario reports throughput, p50/p95/p99 latency and the peak RSS
+reached so far, plus the mean time of every instrumented stage (see
+logics/metrics.py). Cold scenarios start from empty caches and stores,
+warm ones are served from them. Model load times are measured up front.
+
+Run from the repository root:
+    uv run python benchmarks/bench_pipeline.py --save benchmarks/baselines/pipeline.json
+    uv run python benchmarks/bench_pipeline.py --baseline benchmarks/baselines/pipeline.json
+
+CPU work runs inline unless CPU_WORKERS is set; --baseline exits with
+status 1 when any scenario's p50 is more than --max-regression slower.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+MIN_REGRESSION_MS = 1.0  # Sub-millisecond differences are timer noise, never flagged
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Every cache, store and snapshot goes to a scratch directory
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="bench-pipeline-"))
+os.environ.setdefault("CPU_WORKERS", "0")
+os.environ.setdefault("WARMUP_MODELS", "0")
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+
+import replay
+
+tavily = replay.install()
+os.environ["TAVILY_API_URL"] = tavily.url
+
+import httpx
+import numpy as np
+
+import main
+from logics import bar_store, metrics, model_store, predictor, sentiment, sentiment_index, symbols
+from logics.news import ResponseCache
+from logics.registry import model_registry, FINBERT_MODEL_ID
+from logics.finbert_backends import FINBERT_BACKEND
+from logics.executors import CPU_WORKERS
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1024 / 1024
+
+def reset_state():
+    """
+    Empty every in-memory cache and swap in fresh on-disk stores
+    """
+    scratch = tempfile.mkdtemp(dir=os.environ["CACHE_DIR"])
+    symbols.stock_cache.clear()
+    predictor._data_cache.clear()
+    predictor._prediction_cache.clear()
+    predictor._forecast_cache.clear()
+    bar_store._shared_store = bar_store.BarStore(os.path.join(scratch, "bars"))
+    model_store._shared_store = model_store.ModelStore(os.path.join(scratch, "prophet"))
+    sentiment_index._shared_index = sentiment_index.SentimentIndex(os.path.join(scratch, "index.sqlite"))
+    analyzer = sentiment.get_sentiment_analyzer()
+    analyzer.cache.clear()
+    analyzer.news_feeder.cache = ResponseCache(os.path.join(scratch, "news"))
+
+def clear_memory_caches():
+    """
+    Empty the in-memory caches only, the on-disk stores stay warm
+    """
+    symbols.stock_cache.clear()
+    predictor._data_cache.clear()
+    predictor._prediction_cache.clear()
+    predictor._forecast_cache.clear()
+
+def summarize(latencies: List[float], wall_seconds: float) -> Dict:
+    samples = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {
+        "n": len(latencies),
+        "throughput_per_s": round(len(latencies) / wall_seconds, 3),
+        "mean_ms": round(float(samples.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+
+def stage_means() -> Dict[str, Dict]:
+    return {
+        labels["stage"]: {"count": snapshot["count"], "mean_ms": round(snapshot["sum"] / snapshot["count"] * 1000, 3)}
+        for labels, snapshot in sorted(metrics.STAGE_SECONDS.snapshots(), key=lambda item: item[0]["stage"])
+    }
+
+def prime(func: Callable, calls: List[tuple]):
+    """
+    Run each distinct call once, untimed, so a warm scenario finds every symbol cached
+    """
+    for args in dict.fromkeys(calls):
+        func(*args)
+
+def run_calls(func: Callable, calls: List[tuple], before: Callable = None) -> Dict:
+    """
+    Time func on each argument tuple in turn, calling before() ahead of each call
+    """
+    metrics.reset()
+    latencies = []
+    wall = 0.0
+    for args in calls:
+        if before is not None:
+            before()
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+        wall += latencies[-1]
+    return dict(summarize(latencies, wall), stages=stage_means())
+
+def run_requests(paths: List[str], concurrency: int) -> Dict:
+    """
+    Issue the requests through the ASGI app with at most concurrency in flight
+    """
+    metrics.reset()
+
+    async def scenario():
+        semaphore = asyncio.Semaphore(concurrency)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+            async def one(path):
+                async with semaphore:
+                    start = time.perf_counter()
+                    response = await client.get(path)
+                    elapsed = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise RuntimeError(f"{path} answered {response.status_code}: {response.text[:200]}")
+                return elapsed
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(one(path) for path in paths))
+            return latencies, time.perf_counter() - start
+
+    latencies, wall = asyncio.run(scenario())
+    return dict(summarize(latencies, wall), stages=stage_means())
+
+def run(iterations: int, requests: int, concurrency: int, verbose: bool = False) -> Dict:
+    fixture_symbols = replay.fixture_symbols()
+    names = {symbol: replay.ReplayTicker.fixtures.infos[symbol]["shortName"] for symbol in fixture_symbols}
+    rounds = [symbol for _ in range(iterations) for symbol in fixture_symbols]
+    analyzer = sentiment.get_sentiment_analyzer()
+
+    reset_state()
+    load_seconds = {}
+    for name in ("finbert", "finbert_tokenizer"):
+        start = time.perf_counter()
+        model_registry.get(name)
+        load_seconds[name] = round(time.perf_counter() - start, 3)
+
+    scenarios = {}
+
+    def record(name: str, scenario: Callable[[], Dict]):
+        # The pipeline's own progress output and Prophet's logging would drown the table
+        with contextlib.ExitStack() as stack:
+            if not verbose:
+                devnull = stack.enter_context(open(os.devnull, "w"))
+                stack.enter_context(contextlib.redirect_stdout(devnull))
+                stack.enter_context(contextlib.redirect_stderr(devnull))
+            result = scenario()
+        scenarios[name] = result
+        print(f"{name:<24} {result['n']:>5} {result['throughput_per_s']:>10.2f} {result['p50_ms']:>10.1f} "
+              f"{result['p95_ms']:>10.1f} {result['p99_ms']:>10.1f} {result['peak_rss_mb']:>9.1f}")
+
+    print(f"{'scenario':<24} {'n':>5} {'ops/s':>10} {'p50 (ms)':>10} {'p95 (ms)':>10} {'p99 (ms)':>10} {'RSS (MB)':>9}")
+    pipelines = {
+        "history": (symbols.get_stock_history, [(symbol, "1y") for symbol in rounds]),
+        "sentiment": (analyzer.analyze_company_sentiment, [(names[symbol], symbol) for symbol in rounds]),
+        "predict": (predictor.predict_stock_prices, [(symbol, names[symbol], "1mo") for symbol in rounds]),
+    }
+    for name, (func, calls) in pipelines.items():
+        record(f"{name}_cold", lambda: run_calls(func, calls, before=reset_state))
+        if name == "predict":
+            # Fitted models on disk, the in-memory caches empty: forecast without refitting
+            record("predict_stored_model", lambda: (prime(func, calls), run_calls(func, calls, before=clear_memory_caches))[1])
+        record(f"{name}_warm", lambda: (prime(func, calls), run_calls(func, calls))[1])
+
+    # The endpoints run against the warm caches: routing, thread hand-off and JSON encoding
+    for name, route in (("GET history", "/api/stock/{symbol}?period=6mo"), ("GET details", "/api/stock/{symbol}/details"),
+                        ("GET sentiment", "/api/stock/{symbol}/sentiment"), ("GET predict", "/api/stock/{symbol}/predict?period=1mo")):
+        paths = [route.format(symbol=fixture_symbols[i % len(fixture_symbols)]) for i in range(requests)]
+        record(name, lambda: run_requests(paths, concurrency))
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "cpu_workers": CPU_WORKERS,
+            "finbert_model": FINBERT_MODEL_ID,
+            "finbert_backend": FINBERT_BACKEND,
+            "symbols": fixture_symbols,
+            "iterations": iterations,
+            "requests": requests,
+            "concurrency": concurrency
+        },
+        "model_load_seconds": load_seconds,
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "scenarios": scenarios
+    }
+
+def compare(report: Dict, baseline: Dict, max_regression: float) -> bool:
+    """
+    Print each scenario's latency change against the baseline, True if none regressed past max_regression
+    """
+    ok = True
+    print(f"\n{'scenario':<24} {'p50 (ms)':>18} {'p95 (ms)':>18} {'p99 (ms)':>18}")
+    for name, result in report["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            print(f"{name:<24} {'(new)':>18}")
+            continue
+        cells = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            change = result[key] / previous[key] - 1 if previous[key] else 0.0
+            cells.append(f"{result[key]:>9.1f} {change:>+7.0%}")
+        regressed = (
+            result["p50_ms"] - previous["p50_ms"] > MIN_REGRESSION_MS
+            and result["p50_ms"] > previous["p50_ms"] * (1 + max_regression)
+        )
+        ok = ok and not regressed
+        print(f"{name:<24} {cells[0]:>18} {cells[1]:>18} {cells[2]:>18}{'  REGRESSION' if regressed else ''}")
+    for name in ("finbert", "finbert_tokenizer"):
+        before, after = baseline["model_load_seconds"].get(name), report["model_load_seconds"][name]
+        print(f"model load {name}: {after:.2f}s (baseline {before:.2f}s)" if before is not None else f"model load {name}: {after:.2f}s")
+    print(f"peak RSS: {report['peak_rss_mb']:.1f} MB (baseline {baseline['peak_rss_mb']:.1f} MB)")
+    return ok
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=3, help="calls per symbol in each function scenario")
+    parser.add_argument("--requests", type=int, default=60, help="requests per endpoint scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="requests in flight at once")
+    parser.add_argument("--save", help="write the report to this JSON file")
+    parser.add_argument("--baseline", help="compare with a report saved earlier")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed p50 slowdown against the baseline")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's own output")
+    args = parser.parse_args()
+
+    report = run(args.iterations, args.requests, args.concurrency, args.verbose)
+    tavily.close()
+    print("model load: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in report["model_load_seconds"].items()))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved report to {args.save}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
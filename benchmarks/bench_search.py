@@ -0,0 +1,83 @@
+"""
+Symbol search latency: the old linear ticker scan versus the symbol index.
+
+Runs offline on a synthetic 503-entry universe shaped like the S&P 500
+table (tickers, multi-word company names, GICS sectors). Queries mix ticker
+prefixes, company names, sectors and typos.
+
+Run from the repository root:
+    uv run python benchmarks/bench_search.py
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from logics.symbol_index import SymbolIndex
+
+UNIVERSE_SIZE = 503
+ROUNDS = 200
+SECTORS = [
+    "Communication Services", "Consumer Discretionary", "Consumer Staples", "Energy", "Financials",
+    "Health Care", "Industrials", "Information Technology", "Materials", "Real Estate", "Utilities",
+]
+WORDS = [
+    "American", "General", "United", "International", "First", "National", "Global", "Pacific", "Digital",
+    "Energy", "Systems", "Financial", "Health", "Capital", "Motors", "Foods", "Networks", "Materials",
+    "Pharmaceuticals", "Semiconductor", "Realty", "Airlines", "Insurance", "Technologies", "Brands",
+]
+SUFFIXES = ["Inc.", "Corporation", "Group", "Holdings", "Co.", "plc", ""]
+
+def synthetic_universe():
+    rng = random.Random(7)
+    tickers = set()
+    while len(tickers) < UNIVERSE_SIZE:
+        tickers.add("".join(rng.choices(string.ascii_uppercase, k=rng.randint(1, 4))))
+    return [
+        {
+            "symbol": ticker,
+            "name": " ".join(rng.sample(WORDS, rng.randint(1, 3)) + [rng.choice(SUFFIXES)]).strip(),
+            "sector": rng.choice(SECTORS),
+        }
+        for ticker in sorted(tickers)
+    ]
+
+def linear_search(symbols, query):
+    return [s for s in symbols if query.upper() in s.upper()]
+
+def percentiles(func, queries):
+    latencies = []
+    for _ in range(ROUNDS):
+        for query in queries:
+            start = time.perf_counter()
+            func(query)
+            latencies.append((time.perf_counter() - start) * 1e6)
+    return np.percentile(latencies, 50), np.percentile(latencies, 99)
+
+if __name__ == "__main__":
+    universe = synthetic_universe()
+    symbols = [c["symbol"] for c in universe]
+
+    start = time.perf_counter()
+    index = SymbolIndex(universe)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = {
+        "ticker prefix": ["A", "MS", "GOO", universe[100]["symbol"]],
+        "company name": ["gener", "pacific", "semicond", "united air"],
+        "sector": ["health", "financ", "real est"],
+        "typo": ["internatonal", "pharmacuticals", "tecnologies"],
+    }
+
+    print(f"{len(universe)} symbols, index built in {build_ms:.1f} ms")
+    print(f"{'query kind':<15} {'linear p50 (us)':>16} {'index p50 (us)':>15} {'index p99 (us)':>15}")
+    for kind, kind_queries in queries.items():
+        linear_p50, _ = percentiles(lambda q: linear_search(symbols, q), kind_queries)
+        index_p50, index_p99 = percentiles(lambda q: index.search(q, 10), kind_queries)
+        print(f"{kind:<15} {linear_p50:>16.1f} {index_p50:>15.1f} {index_p99:>15.1f}")
+    print("The linear scan only matches tickers; names, sectors and typos return nothing.")
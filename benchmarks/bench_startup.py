@@ -0,0 +1,68 @@
+"""
+Startup time and peak RSS for the different ways of loading FinBERT.
+
+Each scenario runs in a fresh interpreter so import time and peak RSS are
+measured in isolation:
+
+- legacy:  two independent FinBERT copies, as main.py and predictor.py used to load
+- lazy:    importing the app only, the model is not loaded until first use
+- shared:  importing the app and resolving the model once through the registry
+
+Every scenario runs with CPU_WORKERS=0, so the model is loaded and used in the
+measured process rather than in a CPU pool worker.
+
+Run from the repository root:
+    uv run python benchmarks/bench_startup.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+SCENARIOS = {
+    "legacy": """
+import main
+from logics.registry import _load_finbert
+copies = [_load_finbert() for _ in range(2)]
+""",
+    "lazy": """
+import main
+""",
+    "shared": """
+import main
+from logics.registry import model_registry
+from logics.sentiment import get_sentiment_analyzer
+model_registry.get("finbert")
+get_sentiment_analyzer().analyze_text("warm up")
+""",
+}
+
+RUNNER = """
+import json, resource, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({{"seconds": elapsed, "peak_rss_mb": peak_rss_mb}}))
+"""
+
+def run_scenario(name: str) -> dict:
+    # Score inline: a CPU pool worker's FinBERT copy would not count towards this process's RSS
+    env = dict(os.environ, WARMUP_MODELS="0", PRELOAD_MODELS="0", CPU_WORKERS="0")
+    env.setdefault("TAVILY_API_KEY", "benchmark")
+    proc = subprocess.run(
+        [sys.executable, "-c", RUNNER.format(code=SCENARIOS[name])],
+        capture_output=True,
+        text=True,
+        env=env,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Scenario {name} failed:\n{proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+if __name__ == "__main__":
+    print(f"{'scenario':<10} {'seconds':>10} {'peak RSS (MB)':>15}")
+    for name in SCENARIOS:
+        result = run_scenario(name)
+        print(f"{name:<10} {result['seconds']:>10.2f} {result['peak_rss_mb']:>15.1f}")
@@ -0,0 +1,58 @@
+"""
+Cold Prophet fits versus fits warm-started from the previous day's model.
+
+Synthetic two-year daily series; each round appends one business day and
+refits, the way a daily refresh does. The cold fit starts Stan from its
+default initialisation, the warm fit from the parameters of the fit on the
+previous day's data. Also reports the time to forecast from a stored model,
+the path taken when the training data has not changed.
+
+Run from the repository root:
+    uv run python benchmarks/bench_warm_start.py
+"""
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("TAVILY_API_KEY", "benchmark")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+from logics.predictor import MAX_FORECAST_DAYS, _fit_and_forecast, _forecast_from_model
+
+DAYS = 500
+ROUNDS = 5
+
+def training_data(days: int) -> pd.DataFrame:
+    rng = np.random.default_rng(42)
+    ds = pd.date_range("2023-01-02", periods=DAYS + ROUNDS, freq="B")
+    y = 150 + rng.standard_normal(len(ds)).cumsum() + 5 * np.sin(np.arange(len(ds)) / 20)
+    sentiment = np.clip(rng.normal(0.1, 0.3, len(ds)), -1, 1)
+    return pd.DataFrame({"ds": ds, "y": y, "sentiment": sentiment}).head(days)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+if __name__ == "__main__":
+    _, (_, model_json) = timed(_fit_and_forecast, training_data(DAYS), MAX_FORECAST_DAYS)
+
+    cold, warm, stored = [], [], []
+    for day in range(1, ROUNDS + 1):
+        df = training_data(DAYS + day)
+        seconds, _ = timed(_fit_and_forecast, df, MAX_FORECAST_DAYS)
+        cold.append(seconds)
+        seconds, (_, next_model_json) = timed(_fit_and_forecast, df, MAX_FORECAST_DAYS, model_json)
+        warm.append(seconds)
+        seconds, _ = timed(_forecast_from_model, next_model_json, df['sentiment'].iloc[-1], MAX_FORECAST_DAYS)
+        stored.append(seconds)
+        model_json = next_model_json
+
+    print(f"{'path':<16} {'median (s)':>12} {'min (s)':>10}")
+    for name, samples in (("cold fit", cold), ("warm-start fit", warm), ("stored model", stored)):
+        print(f"{name:<16} {statistics.median(samples):>12.3f} {min(samples):>10.3f}")
+    print(f"warm-start speedup: {statistics.median(cold) / statistics.median(warm):.2f}x")
@@ -0,0 +1,226 @@
+"""
+Offline replay of yfinance and Tavily from recorded fixtures.
+
+Each symbol has three files in benchmarks/fixtures/pipeline:
+    SYMBOL.history.csv   daily OHLCV bars (yfinance Ticker.history)
+    SYMBOL.info.json     Ticker.info
+    SYMBOL.tavily.json   Tavily search results for the company
+
+Replayed bars and article dates are shifted by whole weeks so the last bar
+falls in the current week; the stores and the sentiment index then treat the
+fixtures like fresh data, whatever day the benchmark runs.
+
+Record fresh fixtures from the live services (needs TAVILY_API_KEY):
+    uv run python benchmarks/replay.py --record AAPL MSFT NVDA
+or generate deterministic synthetic ones:
+    uv run python benchmarks/replay.py --synthesize AAPL MSFT NVDA
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "pipeline")
+HISTORY_PERIOD = "3y"  # Recorded history, longer than the 2y the predictor trains on
+TIMEZONE = "America/New_York"
+SYNTHETIC_END = pd.Timestamp("2025-06-27")  # Last synthetic bar, fixed so regenerated fixtures are identical
+
+_TICKER_IN_QUERY = re.compile(r"\(([A-Z0-9.\-]+)\)")
+
+def fixture_symbols(directory: str = FIXTURES_DIR) -> List[str]:
+    return sorted(name.split(".")[0] for name in os.listdir(directory) if name.endswith(".history.csv"))
+
+class Fixtures:
+    """
+    Recorded bars, info and news for a set of symbols, shifted to the current week
+    """
+    def __init__(self, directory: str = FIXTURES_DIR, now: Optional[pd.Timestamp] = None):
+        self.directory = directory
+        self.symbols = fixture_symbols(directory)
+        now = now if now is not None else pd.Timestamp.now(tz=TIMEZONE)
+        self.histories: Dict[str, pd.DataFrame] = {}
+        self.infos: Dict[str, Dict] = {}
+        self.news: Dict[str, Dict] = {}
+
+        raw = {symbol: self._read_history(symbol) for symbol in self.symbols}
+        last_bar = max(history.index[-1] for history in raw.values())
+        # A calendar offset keeps wall-clock times across daylight saving changes
+        self.shift = pd.DateOffset(weeks=max(0, (now.normalize() - last_bar.normalize()).days // 7))
+        for symbol, history in raw.items():
+            self.histories[symbol] = history.set_axis(history.index + self.shift)
+            with open(os.path.join(directory, f"{symbol}.info.json")) as f:
+                self.infos[symbol] = json.load(f)
+            with open(os.path.join(directory, f"{symbol}.tavily.json")) as f:
+                self.news[symbol] = self._shift_articles(json.load(f))
+
+    def _read_history(self, symbol: str) -> pd.DataFrame:
+        history = pd.read_csv(os.path.join(self.directory, f"{symbol}.history.csv"))
+        index = pd.DatetimeIndex(pd.to_datetime(history.pop("Date"), utc=True).dt.tz_convert(TIMEZONE), name="Date")
+        return history.set_index(index).astype("float64")
+
+    def _shift_articles(self, response: Dict) -> Dict:
+        results = []
+        for article in response.get("results", []):
+            published = pd.to_datetime(article.get("published_date") or None, utc=True, errors="coerce")
+            if not pd.isna(published):
+                article = dict(article, published_date=(published + self.shift).isoformat())
+            results.append(article)
+        return dict(response, results=results)
+
+class ReplayTicker:
+    """
+    Stand-in for yfinance.Ticker answering history() and info from fixtures
+    """
+    fixtures: Fixtures = None
+
+    def __init__(self, symbol: str):
+        if symbol not in self.fixtures.histories:
+            raise ValueError(f"No fixture for {symbol}")
+        self.symbol = symbol
+
+    @property
+    def info(self) -> Dict:
+        return dict(self.fixtures.infos[self.symbol])
+
+    def history(self, period: str = "1mo", start=None, **kwargs) -> pd.DataFrame:
+        history = self.fixtures.histories[self.symbol]
+        if start is not None:
+            return history[history.index >= pd.Timestamp(start, tz=TIMEZONE)].copy()
+        if period == "max":
+            return history.copy()
+        from logics.bar_store import period_start
+        return history[history.index >= period_start(period)].copy()
+
+class ReplayTavily:
+    """
+    Local HTTP server answering Tavily searches with the recorded results of
+    the ticker named in the query, 404 for unknown tickers
+    """
+    def __init__(self, fixtures: Fixtures):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                match = _TICKER_IN_QUERY.search(body.get("query", ""))
+                response = fixtures.news.get(match.group(1)) if match else None
+                payload = json.dumps(response if response is not None else {"error": "unknown ticker"}).encode()
+                self.send_response(200 if response is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                with replay.lock:
+                    replay.requests += 1
+
+            def log_message(self, *args):
+                pass
+
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/search"
+        threading.Thread(target=self.server.serve_forever, name="replay-tavily", daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+
+def install(directory: str = FIXTURES_DIR) -> ReplayTavily:
+    """
+    Replay the fixtures: patches yfinance.Ticker and starts the Tavily server.
+    Call before importing the app and point TAVILY_API_URL at the returned server's url.
+    """
+    fixtures = Fixtures(directory)
+    ReplayTicker.fixtures = fixtures
+    yf.Ticker = ReplayTicker
+    return ReplayTavily(fixtures)
+
+def _write(directory: str, symbol: str, history: pd.DataFrame, info: Dict, news: Dict):
+    os.makedirs(directory, exist_ok=True)
+    history = history[["Open", "High", "Low", "Close", "Volume"]]
+    history.to_csv(os.path.join(directory, f"{symbol}.history.csv"), float_format="%.4f")
+    with open(os.path.join(directory, f"{symbol}.info.json"), "w") as f:
+        json.dump(info, f, indent=1)
+    with open(os.path.join(directory, f"{symbol}.tavily.json"), "w") as f:
+        json.dump(news, f, indent=1)
+
+def record(symbols: List[str], directory: str = FIXTURES_DIR):
+    """
+    Record bars, info and news from the live services
+    """
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from logics.news import NewsFeeder, ResponseCache
+
+    feeder = NewsFeeder(cache=ResponseCache(tempfile.mkdtemp()))
+    for symbol in symbols:
+        ticker = yf.Ticker(symbol)
+        info = ticker.info
+        name = info.get("shortName", info.get("longName", ""))
+        news = {"results": feeder.fetch_company_news(name, symbol)}
+        _write(directory, symbol, ticker.history(period=HISTORY_PERIOD), info, news)
+        print(f"Recorded {symbol}: {len(news['results'])} articles")
+    feeder.close()
+
+def synthesize(symbols: List[str], directory: str = FIXTURES_DIR, corpus_path: Optional[str] = None):
+    """
+    Write deterministic synthetic fixtures: a random walk per symbol and
+    articles assembled from the FinBERT benchmark corpus
+    """
+    corpus_path = corpus_path or os.path.join(os.path.dirname(FIXTURES_DIR), "finbert_corpus.txt")
+    with open(corpus_path) as f:
+        sentences = [line.strip() for line in f if line.strip()]
+    end = SYNTHETIC_END
+
+    for n, symbol in enumerate(symbols):
+        rng = np.random.default_rng(1000 + n)
+        index = pd.bdate_range(end=end, periods=756, name="Date").tz_localize(TIMEZONE)
+        close = 100 * np.exp(np.cumsum(rng.normal(0.0004, 0.015, len(index)))) * (1 + n)
+        spread = close * rng.uniform(0.002, 0.02, len(index))
+        history = pd.DataFrame({
+            "Open": close + rng.normal(0, 0.3, len(index)) * spread,
+            "High": close + spread,
+            "Low": close - spread,
+            "Close": close,
+            "Volume": rng.integers(5_000_000, 80_000_000, len(index)).astype("float64")
+        }, index=index)
+
+        name = f"{symbol} Holdings Inc."
+        info = {
+            "shortName": name, "sector": "Information Technology", "industry": "Software",
+            "regularMarketPrice": round(float(close[-1]), 2), "marketCap": int(close[-1] * 1e9),
+            "trailingPE": round(float(rng.uniform(15, 45)), 2),
+            "fiftyTwoWeekHigh": round(float(close[-252:].max()), 2), "fiftyTwoWeekLow": round(float(close[-252:].min()), 2),
+            "volume": int(history["Volume"].iloc[-1]), "averageVolume": int(history["Volume"].tail(60).mean())
+        }
+        articles = []
+        for i in range(20):
+            picked = rng.choice(len(sentences), size=int(rng.integers(3, 12)), replace=False)
+            published = end - pd.Timedelta(days=int(rng.integers(0, 30)), hours=int(rng.integers(0, 24)))
+            articles.append({
+                "title": f"{name}: {sentences[picked[0]]}",
+                "url": f"https://news.example.com/{symbol.lower()}/{i}",
+                "content": " ".join(sentences[j] for j in picked[1:]),
+                "published_date": published.tz_localize("UTC").isoformat(),
+                "source": "example",
+                "score": round(float(rng.uniform(0.3, 0.9)), 3)
+            })
+        _write(directory, symbol, history, info, {"results": articles})
+        print(f"Synthesized {symbol}: {len(history)} bars, {len(articles)} articles")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--record", action="store_true", help="record from yfinance and Tavily")
+    mode.add_argument("--synthesize", action="store_true", help="generate synthetic fixtures")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--directory", default=FIXTURES_DIR)
+    args = parser.parse_args()
+    (record if args.record else synthesize)(args.symbols, args.directory)
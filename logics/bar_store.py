@@ -0,0 +1,324 @@
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import polars as pl
+import yfinance as yf
+from .settings import cache_path
+from .metrics import timed
+
+# Store configuration
+BAR_STORE_DIR = os.getenv("BAR_STORE_DIR")  # Defaults to CACHE_DIR/bars
+BAR_REFRESH_INTERVAL = timedelta(minutes=int(os.getenv("BAR_REFRESH_MINUTES", "15")))  # Check upstream for new bars
+BAR_BACKFILL_PERIOD = os.getenv("BAR_BACKFILL_PERIOD", "2y")  # Minimum history downloaded for a new symbol
+BAR_ADJUSTMENT_TOLERANCE = float(os.getenv("BAR_ADJUSTMENT_TOLERANCE", "0.0001"))  # Relative change of a stored close that means prices were re-adjusted
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+def period_start(period: str, now: Optional[pd.Timestamp] = None) -> Optional[pd.Timestamp]:
+    """
+    First timestamp covered by a yfinance period string, None for 'max'
+    """
+    now = now if now is not None else pd.Timestamp.now(tz="UTC")
+    if period == "max":
+        return None
+    if period == "ytd":
+        return now.normalize().replace(month=1, day=1)
+    for suffix, unit in (("mo", "months"), ("d", "days"), ("wk", "weeks"), ("y", "years")):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return (now - pd.DateOffset(**{unit: int(period[:-len(suffix)])})).normalize()
+    raise ValueError(f"Unsupported period '{period}'")
+
+def _longer_period(a: str, b: str) -> str:
+    start_a, start_b = period_start(a), period_start(b)
+    if start_a is None or start_b is None:
+        return "max"
+    return a if start_a <= start_b else b
+
+def _pending_action(meta: Optional[Dict], start: Optional[pd.Timestamp], now: datetime) -> Optional[str]:
+    """
+    'backfill' when the stored bars do not reach back to start, 'refresh' when they are stale, else None
+    """
+    covered = meta is not None and (
+        meta['covered_from'] is None
+        or (start is not None and pd.Timestamp(meta['covered_from']) <= start)
+    )
+    if not covered:
+        return "backfill"
+    if now - datetime.fromisoformat(meta['refreshed_at']) > BAR_REFRESH_INTERVAL:
+        return "refresh"
+    return None
+
+def _refresh_start(history: Optional[pd.DataFrame]):
+    """
+    First date a refresh downloads: the last stored bar may have been written
+    mid-session, and the complete one before it shows whether the provider
+    has re-adjusted prices since
+    """
+    if history is None or not len(history):
+        return None
+    return history.index[-2 if len(history) > 1 else -1].date()
+
+def _adjustment_changed(history: pd.DataFrame, new_bars: pd.DataFrame) -> bool:
+    """
+    Whether the provider's closes for complete stored bars differ from the
+    stored ones, as after a split or dividend re-adjusts the whole history
+    """
+    stored = history.iloc[:-1]
+    common = stored.index.intersection(new_bars.index)
+    if common.empty:
+        return False
+    return not np.allclose(
+        stored.loc[common, 'Close'], new_bars.loc[common, 'Close'], rtol=BAR_ADJUSTMENT_TOLERANCE, atol=0
+    )
+
+def _stored_frame(bars: pd.DataFrame, timezone: str) -> pd.DataFrame:
+    """
+    Provider bars with the columns, dtypes, timezone and index of stored bars
+    """
+    bars = bars[OHLCV_COLUMNS].astype('float64')
+    if bars.index.tz is None:
+        bars = bars.tz_localize(timezone)
+    bars = bars.tz_convert(timezone)
+    bars.index = bars.index.as_unit('ns').rename('Date')
+    return bars
+
+class BarStore:
+    """
+    Local OHLCV store with one Parquet file per symbol. New symbols are
+    backfilled once; afterwards only bars after the last stored one are
+    downloaded, and any period is served by slicing the local bars. Prices are
+    auto-adjusted, so when a refresh sees the provider re-adjust stored bars
+    (a split or dividend) the whole stored range is downloaded again.
+    """
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or BAR_STORE_DIR or os.path.dirname(cache_path("bars", "_"))
+        os.makedirs(self.directory, exist_ok=True)
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_lock = threading.Lock()
+
+    def _lock(self, symbol: str) -> threading.Lock:
+        with self._locks_lock:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _paths(self, symbol: str):
+        base = os.path.join(self.directory, symbol.upper())
+        return base + ".parquet", base + ".json"
+
+    def load(self, symbol: str):
+        """
+        Return the stored bars as a yfinance-style DataFrame and the store metadata, or (None, None)
+        """
+        bars_path, meta_path = self._paths(symbol)
+        if not (os.path.exists(bars_path) and os.path.exists(meta_path)):
+            return None, None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        bars = pl.read_parquet(bars_path)
+
+        # Timestamps are stored as UTC nanoseconds, the exchange timezone lives in the metadata
+        index = pd.to_datetime(bars['timestamp'].to_numpy(), unit='ns', utc=True).tz_convert(meta['timezone'])
+        history = pd.DataFrame(
+            {column: bars[column.lower()].to_numpy() for column in OHLCV_COLUMNS},
+            index=pd.DatetimeIndex(index, name='Date')
+        )
+        return history, meta
+
+    def save(self, symbol: str, history: pd.DataFrame, meta: Dict):
+        """
+        Write bars and metadata atomically, so readers never see a partial file
+        """
+        bars_path, meta_path = self._paths(symbol)
+        bars = pl.DataFrame({
+            'timestamp': history.index.as_unit('ns').asi8,
+            **{column.lower(): history[column].to_numpy(dtype='float64') for column in OHLCV_COLUMNS}
+        })
+        bars.write_parquet(bars_path + ".tmp")
+        with open(meta_path + ".tmp", "w") as f:
+            json.dump(meta, f)
+        os.replace(bars_path + ".tmp", bars_path)
+        os.replace(meta_path + ".tmp", meta_path)
+
+    def get_history(self, symbol: str, period: str = "1mo") -> pd.DataFrame:
+        """
+        Return bars for the period, downloading only what the store does not have yet.
+        Falls back to the stored bars when the provider fails.
+        """
+        with self._lock(symbol):
+            history, meta = self.load(symbol)
+            now = datetime.now(timezone.utc)
+            start = period_start(period)
+
+            action = _pending_action(meta, start, now)
+            try:
+                if action == "backfill":
+                    history, meta = self._backfill(symbol, _longer_period(period, BAR_BACKFILL_PERIOD), now)
+                elif action == "refresh":
+                    history, meta = self._refresh(symbol, history, meta, now)
+            except Exception as e:
+                if history is None:
+                    raise
+                print(f"Error refreshing bars for {symbol}, serving stored bars: {str(e)}")
+
+        if start is None:
+            return history
+        return history[history.index >= start]
+
+    def _backfill(self, symbol: str, period: str, now: datetime):
+        print(f"Downloading {period} of bars for {symbol}")
+        with timed("yfinance_history"):
+            history = yf.Ticker(symbol).history(period=period)
+        if history.empty:
+            raise ValueError(f"No bars returned for {symbol}")
+        start = period_start(period, pd.Timestamp(now))
+        meta = {
+            'timezone': str(history.index.tz),
+            'covered_from': start.isoformat() if start is not None else None,
+            'refreshed_at': now.isoformat()
+        }
+        # Same dtypes as bars loaded back from Parquet
+        history = history[OHLCV_COLUMNS].astype('float64').set_axis(history.index.as_unit('ns'))
+        self.save(symbol, history, meta)
+        return history, meta
+
+    def _refresh(self, symbol: str, history: pd.DataFrame, meta: Dict, now: datetime):
+        with timed("yfinance_history"):
+            new_bars = yf.Ticker(symbol).history(start=_refresh_start(history))
+        meta = dict(meta, refreshed_at=now.isoformat())
+        if not new_bars.empty:
+            new_bars = _stored_frame(new_bars, meta['timezone'])
+            if _adjustment_changed(history, new_bars):
+                print(f"Prices of {symbol} were re-adjusted upstream, downloading its stored range again")
+                with timed("yfinance_history"):
+                    new_bars = yf.Ticker(symbol).history(start=history.index[0].date())
+                if new_bars.empty:
+                    raise ValueError(f"No bars returned for {symbol}")
+                history = _stored_frame(new_bars, meta['timezone'])
+            else:
+                history = pd.concat([history, new_bars])
+                history = history[~history.index.duplicated(keep='last')].sort_index()
+                print(f"Appended {len(new_bars)} bars for {symbol}")
+        self.save(symbol, history, meta)
+        return history, meta
+
+    def get_histories(self, symbols: List[str], period: str = "1mo") -> Dict[str, pd.DataFrame]:
+        """
+        Bulk version of get_history: every symbol that needs a backfill is downloaded
+        in one batched yf.download call, and every symbol that needs a refresh in another.
+        Symbols without any bars are left out of the result.
+        """
+        now = datetime.now(timezone.utc)
+        start = period_start(period)
+        backfill, refresh = [], {}
+        for symbol in symbols:
+            history, meta = self.load(symbol)
+            action = _pending_action(meta, start, now)
+            if action == "backfill":
+                backfill.append(symbol)
+            elif action == "refresh":
+                refresh[symbol] = _refresh_start(history)
+
+        if backfill:
+            backfill_period = _longer_period(period, BAR_BACKFILL_PERIOD)
+            self._download_and_merge(backfill, now, period=backfill_period)
+        if refresh:
+            # One request from the oldest last bar, extra overlapping bars are deduplicated on merge
+            self._download_and_merge(list(refresh), now, start=min(filter(None, refresh.values()), default=None))
+
+        results = {}
+        for symbol in symbols:
+            history, meta = self.load(symbol)
+            if history is not None:
+                results[symbol] = history if start is None else history[history.index >= start]
+        return results
+
+    def _download_and_merge(self, symbols: List[str], now: datetime, period: str = None, start=None,
+                            replace: bool = False):
+        """
+        Download symbols in one batch and merge the bars into the store. A
+        refresh (no period) whose bars show re-adjusted prices downloads those
+        symbols' stored range again in one more batch, replacing their bars.
+        """
+        print(f"Downloading bars for {len(symbols)} symbols")
+        try:
+            with timed("yfinance_download"):
+                data = yf.download(
+                    symbols,
+                    period=period,
+                    start=start,
+                    group_by='ticker',
+                    auto_adjust=True,
+                    threads=True,
+                    ignore_tz=False,
+                    progress=False
+                )
+        except Exception as e:
+            print(f"Error downloading bars for {len(symbols)} symbols, serving stored bars: {str(e)}")
+            return
+
+        covered_from = None
+        if period is not None:
+            covered_start = period_start(period, pd.Timestamp(now))
+            covered_from = covered_start.isoformat() if covered_start is not None else None
+
+        resync = {}  # symbol -> first stored date, for symbols whose prices were re-adjusted
+        for symbol in symbols:
+            frame = None
+            if isinstance(data.columns, pd.MultiIndex):
+                if symbol in data.columns.get_level_values(0):
+                    frame = data[symbol]
+            elif not data.empty:
+                frame = data
+            if frame is not None:
+                frame = frame[OHLCV_COLUMNS].dropna(how='all')
+
+            with self._lock(symbol):
+                history, meta = self.load(symbol)
+                if frame is None or frame.empty:
+                    # No new bars upstream, the symbol is still checked until the next refresh interval
+                    if meta is not None:
+                        self.save(symbol, history, dict(meta, refreshed_at=now.isoformat()))
+                    continue
+                if meta is None:
+                    meta = {'timezone': str(frame.index.tz or 'America/New_York'), 'covered_from': covered_from}
+                elif period is not None:
+                    meta = dict(meta, covered_from=covered_from)
+                meta = dict(meta, refreshed_at=now.isoformat())
+
+                frame = _stored_frame(frame, meta['timezone'])
+                if history is not None and not replace:
+                    if period is None and _adjustment_changed(history, frame):
+                        resync[symbol] = history.index[0].date()
+                        continue
+                    frame = pd.concat([history, frame])
+                    frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+                self.save(symbol, frame, meta)
+
+        if resync:
+            print(f"Prices of {len(resync)} symbols were re-adjusted upstream, downloading their stored range again")
+            self._download_and_merge(list(resync), now, start=min(resync.values()), replace=True)
+
+    def clear(self):
+        """
+        Remove every stored symbol
+        """
+        for name in os.listdir(self.directory):
+            if name.endswith((".parquet", ".json")):
+                os.remove(os.path.join(self.directory, name))
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_bar_store() -> BarStore:
+    """
+    Return the process-wide bar store
+    """
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = BarStore()
+    return _shared_store
@@ -0,0 +1,223 @@
+import itertools
+import sys
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import numpy as np
+import pandas as pd
+from .metrics import register_collector
+
+SWEEP_INTERVAL = 60  # Seconds between full sweeps for expired entries
+
+# Entry versions, unique within the process and across restarts
+_versions = itertools.count(time.time_ns())
+
+def estimate_size(value: Any, _depth: int = 0) -> int:
+    """
+    Approximate memory footprint of a cached value in bytes. DataFrames and
+    arrays report their buffers, containers are walked a few levels deep.
+    """
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum() if isinstance(value, pd.DataFrame) else usage)
+    if isinstance(value, np.ndarray):
+        return value.nbytes + sys.getsizeof(value)
+    if _depth >= 4:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item, _depth + 1) for item in value)
+    return sys.getsizeof(value)
+
+class BoundedCache(MutableMapping):
+    """
+    Thread-safe LRU cache with a byte budget and a TTL. Least recently used
+    entries are evicted until the new value fits, expired entries are dropped
+    on access and by periodic sweeps, so memory is actually released. Keeps
+    hit, miss and eviction counts for the metrics endpoints.
+    """
+    def __init__(
+        self,
+        name: str,
+        max_bytes: int,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        sizeof: Callable[[Any], int] = estimate_size
+    ):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.sizeof = sizeof
+
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, size, expires_at, version)
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self._last_sweep = time.monotonic()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        _register(self)
+
+    def _expired(self, entry: tuple, now: float) -> bool:
+        return entry[2] is not None and entry[2] <= now
+
+    def _remove(self, key: Hashable):
+        _, size, _, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key: Hashable):
+        """Return the live entry for key or None, dropping it if expired. Caller holds the lock."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if self._expired(entry, time.monotonic()):
+            self._remove(key)
+            self.expirations += 1
+            return None
+        return entry
+
+    def __getitem__(self, key: Hashable):
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                self.misses += 1
+                raise KeyError(key)
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def get(self, key: Hashable, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def entry_info(self, key: Hashable) -> Optional[Tuple[int, Optional[float]]]:
+        """
+        (version, seconds until expiry) of a live entry, None when it is absent.
+        The version changes whenever the key is stored again; the expiry is None
+        without a TTL. Not counted as a lookup.
+        """
+        with self._lock:
+            entry = self._lookup(key)
+            if entry is None:
+                return None
+            return entry[3], entry[2] - time.monotonic() if entry[2] is not None else None
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._lookup(key) is not None
+
+    def __setitem__(self, key: Hashable, value: Any):
+        self.set(key, value)
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Store a value, optionally with its own TTL. A value larger than the
+        whole budget is not cached at all.
+        """
+        size = self.sizeof(value)  # Outside the lock, sizing a DataFrame is not free
+        ttl = ttl if ttl is not None else self.ttl
+        now = time.monotonic()
+        expires_at = now + ttl if ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                self.evictions += 1
+                return
+            if now - self._last_sweep >= SWEEP_INTERVAL:
+                self._sweep(now)
+
+            while self._entries and (
+                self._bytes + size > self.max_bytes
+                or (self.max_entries is not None and len(self._entries) >= self.max_entries)
+            ):
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+            self._entries[key] = (value, size, expires_at, next(_versions))
+            self._bytes += size
+
+    def _sweep(self, now: float):
+        for key in [k for k, entry in self._entries.items() if self._expired(entry, now)]:
+            self._remove(key)
+            self.expirations += 1
+        self._last_sweep = now
+
+    def expire(self):
+        """
+        Drop every expired entry now
+        """
+        with self._lock:
+            self._sweep(time.monotonic())
+
+    def __delitem__(self, key: Hashable):
+        with self._lock:
+            self._remove(key)
+
+    def __iter__(self):
+        with self._lock:
+            now = time.monotonic()
+            keys = [k for k, entry in self._entries.items() if not self._expired(entry, now)]
+        return iter(keys)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+_caches: Dict[str, BoundedCache] = {}
+_caches_lock = threading.Lock()
+
+def _register(cache: BoundedCache):
+    with _caches_lock:
+        _caches[cache.name] = cache
+
+def cache_stats() -> Dict[str, Dict]:
+    """
+    Metrics of every bounded cache in the process, by name
+    """
+    with _caches_lock:
+        caches = list(_caches.values())
+    return {cache.name: cache.stats() for cache in caches}
+
+def _collect():
+    for name, stats in cache_stats().items():
+        labels = {"cache": name}
+        yield "rtsp_cache_lookups_total", dict(labels, result="hit"), stats["hits"]
+        yield "rtsp_cache_lookups_total", dict(labels, result="miss"), stats["misses"]
+        yield "rtsp_cache_bytes", labels, stats["bytes"]
+        yield "rtsp_cache_entries", labels, stats["entries"]
+        yield "rtsp_cache_evictions_total", labels, stats["evictions"]
+
+register_collector(_collect)
@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable
+from .registry import model_registry, WARMUP_MODELS
+from .metrics import STAGE_SECONDS, capture, replay
+
+# Executor configuration
+IO_WORKERS = int(os.getenv("IO_WORKERS", "32"))  # Threads for blocking I/O (yfinance, Tavily, disk)
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", "32"))  # Threads for handler steps that wait on CPU work (predictions, sentiment)
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(min(4, os.cpu_count() or 1))))  # 0 runs CPU work inline
+CPU_QUEUE_LIMIT = int(os.getenv("CPU_QUEUE_LIMIT", str(max(CPU_WORKERS, 1) * 4)))  # Max queued + running CPU tasks
+CPU_QUEUE_TIMEOUT = float(os.getenv("CPU_QUEUE_TIMEOUT", "30"))  # Seconds to wait for a CPU slot
+
+class ServerBusyError(Exception):
+    """
+    Raised when the CPU pool is saturated and a task could not be queued in time
+    """
+
+# Bounded thread pool for blocking I/O, handlers await it instead of blocking the event loop
+io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+# Predictions and sentiment block a thread for a whole fit or while waiting for a CPU slot;
+# they get their own pool so a burst of them never leaves the fast endpoints without I/O threads
+compute_executor = ThreadPoolExecutor(max_workers=COMPUTE_WORKERS, thread_name_prefix="compute")
+
+_cpu_executor = None
+_cpu_executor_lock = threading.Lock()
+_cpu_slots = threading.BoundedSemaphore(CPU_QUEUE_LIMIT)
+
+def _init_cpu_worker():
+    # Each worker process holds its own model, load it before the first task arrives
+    if WARMUP_MODELS:
+        model_registry.warm_up()
+
+def get_cpu_executor() -> ProcessPoolExecutor:
+    """
+    Return the process pool for CPU-bound work (Prophet fits, FinBERT forwards), created on first use
+    """
+    global _cpu_executor
+    if _cpu_executor is None:
+        with _cpu_executor_lock:
+            if _cpu_executor is None:
+                # Spawn instead of fork: forking a process that already runs torch threads can deadlock
+                _cpu_executor = ProcessPoolExecutor(
+                    max_workers=CPU_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_cpu_worker
+                )
+    return _cpu_executor
+
+def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a CPU-bound function in the process pool and wait for its result.
+    Blocks the calling thread, so call it through run_compute rather than from the event loop.
+    Raises ServerBusyError when no slot frees up within CPU_QUEUE_TIMEOUT.
+    Stage timings recorded inside the worker are replayed into this process's metrics.
+    """
+    if CPU_WORKERS <= 0:
+        return func(*args, **kwargs)
+
+    start = time.perf_counter()
+    acquired = _cpu_slots.acquire(timeout=CPU_QUEUE_TIMEOUT)
+    STAGE_SECONDS.observe(time.perf_counter() - start, stage="cpu_queue_wait")
+    if not acquired:
+        raise ServerBusyError("Too many CPU-bound tasks queued, try again later")
+    executor = get_cpu_executor()
+    try:
+        result, observations = executor.submit(capture, func, *args, **kwargs).result()
+        replay(observations)
+        return result
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory), start a fresh pool for the next task
+        _reset_cpu_executor(executor)
+        raise
+    finally:
+        _cpu_slots.release()
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function in the I/O thread pool without blocking the event loop
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(io_executor, partial(func, *args, **kwargs))
+
+async def run_compute(func: Callable, *args, **kwargs) -> Any:
+    """
+    Run a blocking function that waits on CPU work (run_cpu, or a coalesced fit) in the
+    compute thread pool, so it never holds one of the I/O threads
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(compute_executor, partial(func, *args, **kwargs))
+
+def warm_up_cpu_workers():
+    """
+    Start the CPU pool workers ahead of the first request
+    """
+    if CPU_WORKERS > 0:
+        executor = get_cpu_executor()
+        for _ in range(CPU_WORKERS):
+            executor.submit(os.getpid)
+
+def _reset_cpu_executor(executor: ProcessPoolExecutor = None):
+    global _cpu_executor
+    with _cpu_executor_lock:
+        if _cpu_executor is not None and executor in (None, _cpu_executor):
+            _cpu_executor.shutdown(wait=False, cancel_futures=True)
+            _cpu_executor = None
+
+def shutdown_executors():
+    _reset_cpu_executor()
+    io_executor.shutdown(wait=False, cancel_futures=True)
+    compute_executor.shutdown(wait=False, cancel_futures=True)
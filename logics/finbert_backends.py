@@ -0,0 +1,124 @@
+import os
+import re
+from typing import Callable, Dict, List, Tuple
+import numpy as np
+import torch
+from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from .settings import cache_path
+
+# Inference backend for FinBERT: "torch" (fp32), "torch-int8" (dynamic int8 quantization) or "onnx"
+FINBERT_BACKEND = os.getenv("FINBERT_BACKEND", "torch")
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))  # Intra-op threads per ONNX session, 0 lets ONNX Runtime decide
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR")  # Exported models, defaults to CACHE_DIR/onnx
+
+ONNX_INPUTS = ['input_ids', 'attention_mask', 'token_type_ids']
+
+class TorchBackend:
+    """
+    Runs a PyTorch sequence classification model, fp32 or quantized
+    """
+    def __init__(self, model: torch.nn.Module, name: str = "torch"):
+        self.model = model
+        self.name = name
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        with torch.no_grad():
+            outputs = self.model(**{key: torch.from_numpy(value) for key, value in inputs.items()})
+        return outputs.logits.numpy()
+
+class OnnxBackend:
+    """
+    Runs a FinBERT graph exported to ONNX with ONNX Runtime on the CPU
+    """
+    name = "onnx"
+
+    def __init__(self, model_path: str, threads: int = ONNX_THREADS):
+        import onnxruntime as ort  # Optional dependency, only needed for this backend
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {graph_input.name for graph_input in self.session.get_inputs()}
+
+    def __call__(self, inputs: Dict[str, np.ndarray]) -> np.ndarray:
+        feed = {key: value.astype(np.int64) for key, value in inputs.items() if key in self.input_names}
+        return self.session.run(["logits"], feed)[0]
+
+def _load_torch_model(model_id: str):
+    tokenizer = AutoTokenizer.from_pretrained(model_id)
+    model = AutoModelForSequenceClassification.from_pretrained(model_id)
+    model.eval()
+    return tokenizer, model
+
+def load_torch(model_id: str):
+    tokenizer, model = _load_torch_model(model_id)
+    return tokenizer, TorchBackend(model)
+
+def load_torch_int8(model_id: str):
+    tokenizer, model = _load_torch_model(model_id)
+    # Linear layers hold almost all of BERT's weights and FLOPs, activations stay fp32
+    quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return tokenizer, TorchBackend(quantized, name="torch-int8")
+
+def onnx_model_path(model_id: str) -> str:
+    filename = re.sub(r"[^A-Za-z0-9_.-]", "_", model_id) + ".onnx"
+    if ONNX_MODEL_DIR:
+        os.makedirs(ONNX_MODEL_DIR, exist_ok=True)
+        return os.path.join(ONNX_MODEL_DIR, filename)
+    return cache_path("onnx", filename)
+
+def export_onnx(model_id: str, path: str):
+    """
+    Export the PyTorch model once, with dynamic batch and sequence axes
+    """
+    print(f"Exporting {model_id} to ONNX at {path}")
+    tokenizer, model = _load_torch_model(model_id)
+    # Texts of different lengths, so the traced graph includes padding
+    sample = tokenizer(["Shares rose after earnings beat estimates.", "Outlook cut."], padding=True, return_tensors="pt")
+    input_names = [name for name in ONNX_INPUTS if name in sample]
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    torch.onnx.export(
+        model,
+        tuple(sample[name] for name in input_names),
+        tmp_path,
+        dynamo=False,
+        input_names=input_names,
+        output_names=["logits"],
+        dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+        opset_version=17
+    )
+    os.replace(tmp_path, path)
+
+def load_onnx(model_id: str):
+    path = onnx_model_path(model_id)
+    if not os.path.exists(path):
+        export_onnx(model_id, path)
+    return AutoTokenizer.from_pretrained(model_id), OnnxBackend(path)
+
+BACKENDS: Dict[str, Callable[[str], Tuple]] = {
+    "torch": load_torch,
+    "torch-int8": load_torch_int8,
+    "onnx": load_onnx,
+}
+
+def load_backend(name: str, model_id: str):
+    """
+    Return (tokenizer, backend) where backend maps padded numpy inputs to logits
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown FinBERT backend '{name}', expected one of {sorted(BACKENDS)}")
+    return BACKENDS[name](model_id)
+
+def check_parity(reference: List[Dict], candidate: List[Dict]) -> Dict[str, float]:
+    """
+    Compare a backend's sentiment results with the fp32 reference on the same texts
+    """
+    agreement = np.mean([ref['sentiment'] == cand['sentiment'] for ref, cand in zip(reference, candidate)])
+    score_diff = max(
+        abs(ref['scores'][label] - cand['scores'][label])
+        for ref, cand in zip(reference, candidate)
+        for label in ref['scores']
+    )
+    return {"label_agreement": float(agreement), "max_score_diff": float(score_diff)}
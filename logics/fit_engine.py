@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, Iterator, Optional
+import pandas as pd
+from .metrics import STAGE_SECONDS, capture, replay
+from .predictor import finish_forecast, plan_forecast, prepare_data_for_prophet
+from .symbols import get_stock_info
+from .threads import limit_threads
+
+# Fit engine configuration
+FIT_WORKERS = int(os.getenv("FIT_WORKERS", str(os.cpu_count() or 1)))  # Fitting processes, 0 fits inline
+FIT_THREADS_PER_WORKER = int(os.getenv("FIT_THREADS_PER_WORKER", "1"))  # Native threads per fitting process, 0 leaves them unpinned
+FIT_PREPARE_WORKERS = int(os.getenv("FIT_PREPARE_WORKERS", "4"))  # Threads fetching bars and news ahead of the fits
+
+def _ready() -> int:
+    # Unpickling this in a worker imports the fitting code, so warm_up leaves nothing to load
+    return os.getpid()
+
+def _training_data(symbol: str) -> pd.DataFrame:
+    return prepare_data_for_prophet(symbol, get_stock_info(symbol).get('name', ''))
+
+class FitEngine:
+    """
+    Forecasts a batch of symbols with the fits fanned out over a process pool.
+    Training data is prepared in a small thread pool while earlier fits run;
+    every fitting process is pinned to threads_per_worker native threads so
+    concurrent fits do not oversubscribe the cores. Results stream back in
+    completion order, and models and forecasts land in the predictor's caches
+    exactly as a request-driven fit would leave them.
+    """
+    def __init__(
+        self,
+        workers: int = FIT_WORKERS,
+        threads_per_worker: int = FIT_THREADS_PER_WORKER,
+        prepare_workers: int = FIT_PREPARE_WORKERS
+    ):
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self.prepare_workers = max(1, prepare_workers)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._prepare_executor = ThreadPoolExecutor(max_workers=self.prepare_workers, thread_name_prefix="fit-prepare")
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawn rather than fork, the parent runs threads. limit_threads pins cmdstan and
+                # whatever loads after it; pools the parent's __main__ loaded need threadpoolctl
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=limit_threads,
+                    initargs=(self.threads_per_worker,)
+                )
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor):
+        with self._pool_lock:
+            if self._pool is pool:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+    def warm_up(self):
+        """
+        Start the fitting processes and wait until they have imported Prophet
+        """
+        if self.workers > 0:
+            pool = self._get_pool()
+            wait([pool.submit(_ready) for _ in range(self.workers)])
+
+    def _plan(self, symbol: str, prepare: Callable[[str], pd.DataFrame]) -> Dict:
+        plan = plan_forecast(symbol, prepare(symbol))
+        plan['started'] = time.perf_counter()
+        return plan
+
+    def forecast_symbols(
+        self,
+        symbols: Iterable[str],
+        prepare: Optional[Callable[[str], pd.DataFrame]] = None
+    ) -> Iterator[Dict]:
+        """
+        Yield one result per symbol as its forecast completes:
+        {'symbol', 'forecast', 'source', 'seconds', 'error'}. source is 'cache',
+        'stored' (forecast from a stored model) or 'fit'; seconds runs from the
+        data being ready to the forecast; error is the exception when the
+        symbol failed, the other symbols carry on.
+        symbols is consumed lazily, only enough ahead to keep the pools busy,
+        so a caller can reorder or stop feeding it while the batch runs.
+        prepare(symbol) returns the training data, prepare_data_for_prophet by default.
+        """
+        symbols = iter(symbols)
+        prepare = prepare or _training_data
+        max_in_flight = max(self.workers, 1) + self.prepare_workers
+        pending = {}  # future -> (stage, symbol, plan)
+        exhausted = False
+
+        def result(symbol, plan=None, forecast=None, error=None):
+            seconds = time.perf_counter() - plan['started'] if plan is not None else None
+            source = plan['source'] if plan is not None else None
+            return {'symbol': symbol, 'forecast': forecast, 'source': source, 'seconds': seconds, 'error': error}
+
+        try:
+            while True:
+                while not exhausted and len(pending) < max_in_flight:
+                    symbol = next(symbols, None)
+                    if symbol is None:
+                        exhausted = True
+                        break
+                    pending[self._prepare_executor.submit(self._plan, symbol, prepare)] = ("prepare", symbol, None)
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, symbol, plan = pending.pop(future)
+                    try:
+                        if stage == "prepare":
+                            plan = future.result()
+                            if plan['source'] == 'cache':
+                                yield result(symbol, plan, plan['forecast'])
+                            elif self.workers <= 0:
+                                forecast = finish_forecast(symbol, plan, plan['func'](*plan['args']))
+                                yield result(symbol, plan, forecast)
+                            else:
+                                pool = self._get_pool()
+                                try:
+                                    fit = pool.submit(capture, plan['func'], *plan['args'])
+                                except BrokenProcessPool:
+                                    self._reset_pool(pool)
+                                    raise
+                                plan['pool'] = pool
+                                pending[fit] = ("fit", symbol, plan)
+                        else:
+                            try:
+                                output, observations = future.result()
+                            except BrokenProcessPool:
+                                # A worker died (e.g. out of memory), the next fits get a fresh pool
+                                self._reset_pool(plan['pool'])
+                                raise
+                            replay(observations)
+                            forecast = finish_forecast(symbol, plan, output)
+                            STAGE_SECONDS.observe(time.perf_counter() - plan['started'], stage="fit_engine_task")
+                            yield result(symbol, plan, forecast)
+                    except Exception as e:
+                        yield result(symbol, plan, error=e)
+        finally:
+            # The caller stopped early, drop work that has not started
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+        self._prepare_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,263 @@
+import json
+import os
+import random
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Instrumentation configuration
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"  # 0 turns every timer and counter into a no-op
+DEBUG_LOG_SAMPLE_RATE = float(os.getenv("DEBUG_LOG_SAMPLE_RATE", "0"))  # Fraction of debug events logged, off by default
+
+# Histogram bucket upper bounds in seconds, from cache lookups up to cold Prophet fits
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_metrics: Dict[str, "_Metric"] = {}
+_collectors: List[Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]] = []
+_registry_lock = threading.Lock()
+
+# Set inside capture(): observations go to a list that is shipped back to the parent process
+_capture = threading.local()
+
+def _labels_key(labels: Dict[str, str]) -> tuple:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+def _format_labels(key: tuple, extra: tuple = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._lock = threading.Lock()
+        self._series: Dict[tuple, object] = {}
+        with _registry_lock:
+            _metrics[name] = self
+
+    def _record(self, key: tuple, value: float):
+        raise NotImplementedError
+
+    def _observe(self, value: float, labels: Dict[str, str]):
+        if not METRICS_ENABLED:
+            return
+        key = _labels_key(labels)
+        buffer = getattr(_capture, "buffer", None)
+        if buffer is not None:
+            buffer.append((self.name, key, value))
+        else:
+            self._record(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+class Counter(_Metric):
+    """
+    Monotonic count per label set
+    """
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        self._observe(amount, labels)
+
+    def _record(self, key: tuple, value: float):
+        with self._lock:
+            self._series[key] = self._series.get(key, 0) + value
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._series.get(_labels_key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            series = dict(self._series)
+        for key, value in sorted(series.items()):
+            yield self.name, key, (), value
+
+class Histogram(_Metric):
+    """
+    Cumulative bucket counts, sum and count per label set, as Prometheus histograms
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        self._observe(value, labels)
+
+    def _record(self, key: tuple, value: float):
+        # Buckets are stored non-cumulative, one slot per bound plus +Inf
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def snapshot(self, **labels) -> Optional[Dict]:
+        """
+        Count, sum and cumulative bucket counts of one label set, None if never observed
+        """
+        with self._lock:
+            series = self._series.get(_labels_key(labels))
+            if series is None:
+                return None
+            counts, total, count = list(series[0]), series[1], series[2]
+        cumulative, running = {}, 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            running += bucket_count
+            cumulative[bound] = running
+        return {"count": count, "sum": total, "buckets": cumulative}
+
+    def snapshots(self) -> List[Tuple[Dict[str, str], Dict]]:
+        """
+        (labels, snapshot) for every observed label set
+        """
+        with self._lock:
+            keys = list(self._series)
+        return [(dict(key), self.snapshot(**dict(key))) for key in keys]
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(s[0]), s[1], s[2]) for key, s in self._series.items()}
+        for key, (counts, total, count) in sorted(series.items()):
+            running = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                running += bucket_count
+                yield self.name + "_bucket", key, (("le", _format_value(bound)),), running
+            yield self.name + "_sum", key, (), total
+            yield self.name + "_count", key, (), count
+
+class Gauge(_Metric):
+    """
+    A value read at scrape time from collectors, nothing is recorded in between
+    """
+    kind = "gauge"
+
+    def samples(self):
+        return iter(())
+
+# Hot-path metrics
+STAGE_SECONDS = Histogram("rtsp_stage_seconds", "Latency of request stages in seconds")
+STAGE_ERRORS = Counter("rtsp_stage_errors_total", "Stage executions that raised")
+HTTP_REQUEST_SECONDS = Histogram("rtsp_http_request_seconds", "HTTP request latency in seconds by route")
+CACHE_LOOKUPS = Counter("rtsp_cache_lookups_total", "Cache lookups by cache and result (hit or miss)")
+CACHE_BYTES = Gauge("rtsp_cache_bytes", "Bytes held by a bounded in-memory cache")
+CACHE_ENTRIES = Gauge("rtsp_cache_entries", "Entries held by a cache")
+CACHE_EVICTIONS = Counter("rtsp_cache_evictions_total", "Entries evicted from a bounded in-memory cache")
+
+@contextmanager
+def timed(stage: str):
+    """
+    Time a block as one observation of the stage, counting it as an error if it raises.
+    Usable as a context manager or a decorator.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=stage)
+
+def cache_lookup(cache: str, hit: bool, count: int = 1):
+    """
+    Count lookups of a cache that keeps no stats of its own
+    """
+    if count:
+        CACHE_LOOKUPS.inc(count, cache=cache, result="hit" if hit else "miss")
+
+def register_collector(collector: Callable[[], Iterable[Tuple[str, Dict[str, str], float]]]):
+    """
+    Add a function returning (metric name, labels, value) samples, read on every scrape.
+    For stats a component already keeps, so the hot path does not count twice.
+    """
+    with _registry_lock:
+        _collectors.append(collector)
+
+def capture(func: Callable, *args, **kwargs):
+    """
+    Run func with this thread's observations buffered instead of recorded.
+    Returns (result, observations); used in CPU pool workers so the parent
+    process can replay the worker's stage timings into its own metrics.
+    """
+    _capture.buffer = []
+    try:
+        result = func(*args, **kwargs)
+        return result, _capture.buffer
+    finally:
+        _capture.buffer = None
+
+def replay(observations: List[Tuple[str, tuple, float]]):
+    """
+    Record observations captured in another process
+    """
+    for name, key, value in observations:
+        metric = _metrics.get(name)
+        if metric is not None:
+            metric._record(key, value)
+
+def render_prometheus() -> str:
+    """
+    Every metric in the Prometheus text exposition format
+    """
+    with _registry_lock:
+        metrics = list(_metrics.values())
+        collectors = list(_collectors)
+
+    collected: Dict[str, Dict[tuple, float]] = {}
+    for collector in collectors:
+        try:
+            for name, labels, value in collector():
+                series = collected.setdefault(name, {})
+                key = _labels_key(labels)
+                series[key] = series.get(key, 0) + value
+        except Exception as e:
+            print(f"Error collecting metrics: {str(e)}")
+
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        samples = {(name, key, extra): value for name, key, extra, value in metric.samples()}
+        for key, value in collected.get(metric.name, {}).items():
+            samples[(metric.name, key, ())] = samples.get((metric.name, key, ()), 0) + value
+        for (name, key, extra), value in samples.items():
+            lines.append(f"{name}{_format_labels(key, extra)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+def reset():
+    """
+    Clear every recorded series, for tests
+    """
+    with _registry_lock:
+        metrics = list(_metrics.values())
+    for metric in metrics:
+        metric.clear()
+
+def debug_log(event: str, **fields):
+    """
+    Emit a sampled debug event as one JSON line. Sampling is off by default
+    (DEBUG_LOG_SAMPLE_RATE=0), so request payloads are never dumped unless asked for.
+    """
+    if DEBUG_LOG_SAMPLE_RATE <= 0 or random.random() >= DEBUG_LOG_SAMPLE_RATE:
+        return
+    print(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str))
@@ -0,0 +1,82 @@
+import glob
+import os
+import threading
+from typing import Optional
+from .settings import cache_path
+
+# Store configuration
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR")  # Defaults to CACHE_DIR/prophet
+MODEL_STORE_KEEP = int(os.getenv("MODEL_STORE_KEEP", "2"))  # Fitted models kept per symbol and config
+
+class ModelStore:
+    """
+    Fitted Prophet models serialized with prophet.serialize, one JSON file per
+    symbol, model config and training-data version. The most recent model of a
+    symbol is also the warm start for its next fit.
+    """
+    def __init__(self, directory: Optional[str] = None, keep: int = MODEL_STORE_KEEP):
+        self.directory = directory or MODEL_STORE_DIR or os.path.dirname(cache_path("prophet", "_"))
+        self.keep = keep
+        os.makedirs(self.directory, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str, config_version: str, data_version: str) -> str:
+        return os.path.join(self.directory, f"{symbol.upper()}__{config_version}__{data_version}.json")
+
+    def _versions(self, symbol: str, config_version: str):
+        """Stored model paths for a symbol and config, newest first"""
+        paths = glob.glob(os.path.join(self.directory, f"{glob.escape(symbol.upper())}__{config_version}__*.json"))
+        return sorted(paths, key=os.path.getmtime, reverse=True)
+
+    def load(self, symbol: str, config_version: str, data_version: str) -> Optional[str]:
+        """
+        Serialized model fitted on exactly this data version, or None
+        """
+        path = self._path(symbol, config_version, data_version)
+        try:
+            with open(path) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def latest(self, symbol: str, config_version: str) -> Optional[str]:
+        """
+        Most recently stored model for a symbol and config, whatever its data version
+        """
+        for path in self._versions(symbol, config_version):
+            try:
+                with open(path) as f:
+                    return f.read()
+            except FileNotFoundError:
+                continue
+        return None
+
+    def save(self, symbol: str, config_version: str, data_version: str, model_json: str):
+        """
+        Store a fitted model atomically and prune older versions
+        """
+        path = self._path(symbol, config_version, data_version)
+        with open(path + ".tmp", "w") as f:
+            f.write(model_json)
+        os.replace(path + ".tmp", path)
+
+        with self._lock:
+            for stale in self._versions(symbol, config_version)[self.keep:]:
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_model_store() -> ModelStore:
+    """
+    Return the process-wide model store
+    """
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = ModelStore()
+    return _shared_store
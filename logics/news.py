@@ -1,18 +1,87 @@
 import os
 from dotenv import load_dotenv
-from typing import List, Dict
-import time
-from datetime import datetime, timedelta
-import requests
+from typing import List, Dict, Optional
+import asyncio
+import hashlib
 import json
+import random
+import threading
+import time
+import httpx
+from .settings import cache_path
+from .metrics import timed, cache_lookup, debug_log
 
 # Load environment variables
 load_dotenv()
 TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
-TAVILY_API_URL = "https://api.tavily.com/search"
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com/search")
+
+# Client configuration
+TAVILY_TIMEOUT = float(os.getenv("TAVILY_TIMEOUT", "20"))  # Seconds per request
+TAVILY_MAX_CONCURRENCY = int(os.getenv("TAVILY_MAX_CONCURRENCY", "8"))  # Requests in flight at once
+TAVILY_MAX_RETRIES = int(os.getenv("TAVILY_MAX_RETRIES", "3"))  # Retries after 429, 5xx and network errors
+TAVILY_BACKOFF = float(os.getenv("TAVILY_BACKOFF", "0.5"))  # First retry delay in seconds, doubled on each retry
+NEWS_MAX_RETRY_DELAY = float(os.getenv("NEWS_MAX_RETRY_DELAY", "30"))  # Longest wait before a retry, a longer Retry-After fails the fetch
+NEWS_CACHE_TTL = float(os.getenv("NEWS_CACHE_TTL_HOURS", "6")) * 3600  # How long a search response is reused
+NEWS_CACHE_DIR = os.getenv("NEWS_CACHE_DIR")  # Defaults to CACHE_DIR/news
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+class NewsFetchError(Exception):
+    """
+    Raised when news cannot be fetched, so callers never mistake an outage for "no news"
+    """
+
+class ResponseCache:
+    """
+    On-disk TTL cache of Tavily responses, one JSON file per query payload
+    """
+    def __init__(self, directory: Optional[str] = None, ttl: float = NEWS_CACHE_TTL):
+        self.directory = directory or NEWS_CACHE_DIR or os.path.dirname(cache_path("news", "_"))
+        self.ttl = ttl
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, payload: Dict) -> str:
+        key = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        return os.path.join(self.directory, key + ".json")
+
+    def get(self, payload: Dict) -> Optional[Dict]:
+        path = self._path(payload)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if time.time() - entry['stored_at'] > self.ttl:
+            return None
+        return entry['response']
+
+    def put(self, payload: Dict, response: Dict):
+        path = self._path(payload)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({'stored_at': time.time(), 'response': response}, f)
+        os.replace(tmp_path, path)
 
 class NewsFeeder:
-    def __init__(self):
+    """
+    Tavily news client. Requests run on an httpx.AsyncClient owned by a
+    background event loop, so connections are pooled across calls from any
+    thread; concurrency is bounded, 429/5xx responses and network errors are
+    retried with exponential backoff, and responses are cached on disk.
+    Identical searches in flight at the same time share one request, whichever
+    code path (sentiment endpoint, sentiment index) asked for them.
+    """
+    def __init__(
+        self,
+        api_url: str = TAVILY_API_URL,
+        cache: Optional[ResponseCache] = None,
+        timeout: float = TAVILY_TIMEOUT,
+        max_concurrency: int = TAVILY_MAX_CONCURRENCY,
+        max_retries: int = TAVILY_MAX_RETRIES,
+        backoff: float = TAVILY_BACKOFF,
+        max_retry_delay: float = NEWS_MAX_RETRY_DELAY
+    ):
         if not TAVILY_API_KEY:
             raise ValueError("TAVILY_API_KEY not found in environment variables")
         self.api_key = TAVILY_API_KEY
@@ -20,58 +89,152 @@ class NewsFeeder:
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
-        
-    def fetch_company_news(self, company_name: str, ticker: str, max_results: int = 20) -> List[Dict]:
+        self.api_url = api_url
+        self.cache = cache if cache is not None else ResponseCache()
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_retry_delay = max_retry_delay
+
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._in_flight: Dict[str, asyncio.Future] = {}  # payload key -> search task, only touched on the loop
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
         """
-        Fetch news articles for a given company using both company name and ticker symbol
+        Start the background loop and create the pooled client on it, once
         """
-        try:
-            print(f"\nFetching news for {company_name} ({ticker})")
-            print(f"Requesting {max_results} articles")
-            
-            # Create a query that includes both company name and ticker
-            query = f"{company_name} ({ticker}) stock market news sentiment analysis financial"
-            
-            # Prepare the request payload
-            payload = {
-                "query": query,
-                "search_depth": "advanced",
-                "max_results": max_results,
-                "time_range": "month",
-                "topic": "news"
+        if self._loop is None:
+            with self._start_lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name="news-client", daemon=True).start()
+
+                    async def create_client():
+                        self._client = httpx.AsyncClient(
+                            headers=self.headers,
+                            timeout=httpx.Timeout(self.timeout),
+                            limits=httpx.Limits(
+                                max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency
+                            )
+                        )
+                        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+                    asyncio.run_coroutine_threadsafe(create_client(), loop).result()
+                    self._loop = loop
+        return self._loop
+
+    async def _post(self, payload: Dict) -> Dict:
+        """
+        POST a search, retrying 429/5xx responses and network errors with exponential backoff.
+        A concurrency slot is only held during an attempt, not while waiting to retry;
+        a Retry-After longer than max_retry_delay fails the fetch instead of blocking the caller.
+        """
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                async with self._semaphore:
+                    response = await self._client.post(self.api_url, json=payload)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+                retry_after = response.headers.get("Retry-After")
+            except httpx.HTTPStatusError as e:
+                # Other 4xx responses will not succeed on retry
+                raise NewsFetchError(f"Tavily rejected the request: HTTP {e.response.status_code}") from e
+            except (httpx.TransportError, ValueError) as e:
+                error = f"{type(e).__name__}: {str(e)}"
+
+            if attempt == self.max_retries:
+                raise NewsFetchError(f"Tavily request failed after {attempt + 1} attempts: {error}")
+            delay = min(self.backoff * 2 ** attempt * (1 + random.random() / 2), self.max_retry_delay)
+            if retry_after and retry_after.isdigit():
+                if float(retry_after) > self.max_retry_delay:
+                    raise NewsFetchError(f"Tavily asked to retry after {retry_after}s ({error}), longer than {self.max_retry_delay:g}s")
+                delay = max(delay, float(retry_after))
+            print(f"Tavily request failed ({error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    async def _search(self, payload: Dict) -> Dict:
+        """
+        Cached search response for payload. Callers arriving while the same search is in
+        flight await the same task; shielded, so a cancelled caller does not cancel the others.
+        """
+        key = json.dumps(payload, sort_keys=True)
+        task = self._in_flight.get(key)
+        if task is None:
+            task = self._in_flight[key] = asyncio.ensure_future(self._search_uncoalesced(payload))
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _search_uncoalesced(self, payload: Dict) -> Dict:
+        data = self.cache.get(payload)
+        cache_lookup("news", data is not None)
+        if data is None:
+            debug_log("news.fetch", query=payload['query'], max_results=payload['max_results'])
+            with timed("tavily_fetch"):
+                data = await self._post(payload)
+            self.cache.put(payload, data)
+        return data
+
+    async def _fetch(self, company_name: str, ticker: str, max_results: int) -> List[Dict]:
+        # Create a query that includes both company name and ticker
+        query = f"{company_name} ({ticker}) stock market news sentiment analysis financial"
+
+        # Prepare the request payload
+        payload = {
+            "query": query,
+            "search_depth": "advanced",
+            "max_results": max_results,
+            "time_range": "month",
+            "topic": "news"
+        }
+
+        data = await self._search(payload)
+
+        # Process and format the results
+        processed_news = []
+        for article in data.get('results', []):
+            processed_article = {
+                'title': article.get('title', ''),
+                'url': article.get('url', ''),
+                'content': article.get('content', ''),
+                'published_date': article.get('published_date', ''),
+                'source': article.get('source', ''),
+                'score': article.get('score', 0)
             }
-            
-            # Make the API request
-            response = requests.post(
-                TAVILY_API_URL,
-                headers=self.headers,
-                json=payload
-            )
-            
-            # Check if request was successful
-            response.raise_for_status()
-            data = response.json()
-            
-            # Process and format the results
-            processed_news = []
-            for article in data.get('results', []):
-                processed_article = {
-                    'title': article.get('title', ''),
-                    'url': article.get('url', ''),
-                    'content': article.get('content', ''),
-                    'published_date': article.get('published_date', ''),
-                    'source': article.get('source', ''),
-                    'score': article.get('score', 0)
-                }
-                processed_news.append(processed_article)
-            
-            print(f"Successfully fetched {len(processed_news)} articles")
-            return processed_news
-            
-        except Exception as e:
-            print(f"Error fetching news: {str(e)}")
-            print(f"Error type: {type(e).__name__}")
-            return []
+            processed_news.append(processed_article)
+
+        return processed_news
+
+    def fetch_company_news(self, company_name: str, ticker: str, max_results: int = 20) -> List[Dict]:
+        """
+        Fetch news articles for a given company using both company name and ticker symbol.
+        Blocks the calling thread; raises NewsFetchError when Tavily cannot be reached.
+        """
+        future = asyncio.run_coroutine_threadsafe(self._fetch(company_name, ticker, max_results), self._ensure_loop())
+        return future.result()
+
+    async def fetch_company_news_async(self, company_name: str, ticker: str, max_results: int = 20) -> List[Dict]:
+        """
+        Awaitable version of fetch_company_news for callers on another event loop
+        """
+        future = asyncio.run_coroutine_threadsafe(self._fetch(company_name, ticker, max_results), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def close(self):
+        """
+        Close the pooled connections and stop the background loop
+        """
+        if self._loop is not None:
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
 
 # Example usage
 if __name__ == "__main__":
@@ -84,4 +247,4 @@ if __name__ == "__main__":
         print(f"Source: {article['source']}")
         print(f"Date: {article['published_date']}")
         print(f"URL: {article['url']}")
-        print("Content:", article['content'][:200], "...")
\ No newline at end of file
+        print("Content:", article['content'][:200], "...")
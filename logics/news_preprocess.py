@@ -0,0 +1,139 @@
+import hashlib
+import os
+import re
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Preprocessing configuration
+SENTIMENT_TOKEN_BUDGET = int(os.getenv("SENTIMENT_TOKEN_BUDGET", "4096"))  # FinBERT tokens per company request
+SENTIMENT_CHUNK_TOKENS = int(os.getenv("SENTIMENT_CHUNK_TOKENS", "256"))  # Window size for long article bodies
+SENTIMENT_MAX_CHUNKS = int(os.getenv("SENTIMENT_MAX_CHUNKS", "4"))  # Windows scored per article body at most
+NEWS_DUPLICATE_DISTANCE = int(os.getenv("NEWS_DUPLICATE_DISTANCE", "3"))  # Max simhash bit distance of near-duplicates
+
+TRACKING_PARAMS = ("utm_", "guccounter", "guce_", "ncid", "cmpid", "fbclid", "gclid")
+_WORD = re.compile(r"\w+")
+
+def canonical_url(url: str) -> str:
+    """
+    Normalize a URL so syndicated copies with tracking parameters compare equal
+    """
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([
+        (key, value) for key, value in parse_qsl(parts.query)
+        if not key.lower().startswith(TRACKING_PARAMS)
+    ])
+    return urlunsplit(("", host, parts.path.rstrip("/"), query, ""))
+
+def simhash(text: str, bits: int = 64) -> int:
+    """
+    Simhash over word 3-shingles: near-duplicate texts get hashes a few bits apart
+    """
+    words = _WORD.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    weights = [0] * bits
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=bits // 8).digest(), "big")
+        for bit in range(bits):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def dedupe_articles(articles: List[Dict], max_distance: int = NEWS_DUPLICATE_DISTANCE) -> List[Dict]:
+    """
+    Drop articles whose URL or content was already seen, keeping the first
+    (most relevant) copy. Content counts as seen when its simhash is within
+    max_distance bits of a kept article's.
+    """
+    seen_urls = set()
+    kept_hashes = []
+    unique = []
+    for article in articles:
+        url = canonical_url(article.get('url') or "")
+        if url and url in seen_urls:
+            continue
+        fingerprint = simhash(f"{article.get('title', '')} {article.get('content', '')}")
+        if any(hamming_distance(fingerprint, other) <= max_distance for other in kept_hashes):
+            continue
+        seen_urls.add(url)
+        kept_hashes.append(fingerprint)
+        unique.append(article)
+    return unique
+
+def strip_repeated_title(title: str, content: str) -> str:
+    """
+    Remove the title from the start of the body, it is already scored on its own
+    """
+    title_words = _WORD.findall(title.lower())
+    if not title_words:
+        return content
+    # Match the title's words at the start of the body, ignoring punctuation and spacing
+    pattern = r"\W*" + r"\W+".join(re.escape(word) for word in title_words) + r"\W*"
+    match = re.match(pattern, content, flags=re.IGNORECASE)
+    return content[match.end():] if match else content
+
+def chunk_text(tokenizer, text: str, window: int = SENTIMENT_CHUNK_TOKENS) -> List[Tuple[str, int]]:
+    """
+    Split text into consecutive windows of at most window tokens, returned as
+    (substring of the original text, token count) pairs
+    """
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoding['offset_mapping']
+    chunks = []
+    for start in range(0, len(offsets), window):
+        span = offsets[start:start + window]
+        chunks.append((text[span[0][0]:span[-1][1]], len(span)))
+    return chunks
+
+def plan_texts(
+    articles: List[Dict],
+    tokenizer,
+    token_budget: int = SENTIMENT_TOKEN_BUDGET,
+    window: int = SENTIMENT_CHUNK_TOKENS,
+    max_chunks: int = SENTIMENT_MAX_CHUNKS
+) -> Tuple[List[Dict], int]:
+    """
+    Decide which texts of which articles to score within the token budget.
+    Titles go first, then body windows round-robin across articles (every
+    article's first window before any second window), so the budget spreads
+    over as many articles as possible. Returns one plan per included article,
+    {'article', 'title', 'chunks': [(text, tokens)]} with title None for
+    untitled articles, and the tokens used. An untitled article is only
+    included once one of its body windows fits the budget.
+    """
+    special_tokens = tokenizer.num_special_tokens_to_add()
+    used = 0
+    plans = []
+    for article in articles:
+        title_chunks = chunk_text(tokenizer, article.get('title') or '', window)
+        body = strip_repeated_title(article.get('title') or '', article.get('content') or '')
+        body_chunks = chunk_text(tokenizer, body, window)[:max_chunks]
+        if not title_chunks and not body_chunks:
+            continue
+        # Titles longer than a window are truncated to it
+        title, title_tokens = title_chunks[0] if title_chunks else (None, 0)
+        cost = title_tokens + special_tokens if title is not None else 0
+        if used + cost > token_budget:
+            break
+        used += cost
+        plans.append({'article': article, 'title': title, 'body': body_chunks, 'chunks': []})
+
+    for index in range(max_chunks):
+        for plan in plans:
+            if index >= len(plan['body']):
+                continue
+            text, tokens = plan['body'][index]
+            if used + tokens + special_tokens > token_budget:
+                continue
+            used += tokens + special_tokens
+            plan['chunks'].append((text, tokens))
+
+    for plan in plans:
+        del plan['body']
+    # Untitled articles the budget had no body window left for have nothing to score
+    plans = [plan for plan in plans if plan['title'] is not None or plan['chunks']]
+    return plans, used
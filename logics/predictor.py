@@ -1,30 +1,64 @@
+import hashlib
+import json
+import os
 import pandas as pd
+import prophet
 from prophet import Prophet
+from prophet.serialize import model_to_json, model_from_json
 from .symbols import get_stock_history
-from datetime import datetime, timedelta
+from datetime import timedelta
 import traceback
-from .sentiment import SentimentAnalyzer
-
-# Initialize sentiment analyzer
-sentiment_analyzer = SentimentAnalyzer()
-
-# Cache dictionaries
-_data_cache = {}  # Format: {symbol: {'data': df, 'timestamp': datetime}}
-_prediction_cache = {}  # Format: {symbol_period: {'prediction': data, 'timestamp': datetime}}
+from .sentiment_index import get_sentiment_index, sentiment_regressor
+from .executors import run_cpu
+from .singleflight import single_flight, SingleFlight
+from .model_store import get_model_store
+from .cache import BoundedCache
+from .metrics import timed, cache_lookup, debug_log
 
 # Cache expiry times
 DATA_CACHE_EXPIRY = timedelta(hours=6)  # Refresh historical data every 6 hours
 PREDICTION_CACHE_EXPIRY = timedelta(hours=24)  # Refresh predictions daily
 
-def _is_cache_valid(timestamp, expiry_delta):
-    if not timestamp:
-        return False
-    return datetime.now() - timestamp < expiry_delta
+# Bounded caches, LRU entries are evicted once a cache exceeds its byte budget
+PREDICTOR_CACHE_MAX_MB = int(os.getenv("PREDICTOR_CACHE_MAX_MB", "256"))
+_data_cache = BoundedCache(  # {symbol: training df}
+    "prophet_data", max_bytes=PREDICTOR_CACHE_MAX_MB * 1024 * 1024 // 2, ttl=DATA_CACHE_EXPIRY.total_seconds()
+)
+_prediction_cache = BoundedCache(  # {symbol_period: prediction dict}
+    "predictions", max_bytes=PREDICTOR_CACHE_MAX_MB * 1024 * 1024 // 4, ttl=PREDICTION_CACHE_EXPIRY.total_seconds()
+)
+_forecast_cache = BoundedCache(  # {symbol: {'forecast': df, 'data_version': str}}
+    "forecasts", max_bytes=PREDICTOR_CACHE_MAX_MB * 1024 * 1024 // 4, ttl=PREDICTION_CACHE_EXPIRY.total_seconds()
+)
+
+# Prediction periods in days, every period is a slice of one forecast of the longest horizon
+PERIOD_DAYS = {
+    "1w": 7,
+    "1mo": 30,
+    "3mo": 90,
+    "6mo": 180,
+}
+MAX_FORECAST_DAYS = max(PERIOD_DAYS.values())
+
+# Prophet settings, part of the stored model key so a config change never reuses an old fit
+PROPHET_CONFIG = {
+    "daily_seasonality": True,
+    "weekly_seasonality": True,
+    "yearly_seasonality": True,
+    "changepoint_prior_scale": 0.05
+}
+PROPHET_REGRESSORS = ['sentiment']
+CONFIG_VERSION = hashlib.sha1(
+    json.dumps([prophet.__version__, PROPHET_CONFIG, PROPHET_REGRESSORS], sort_keys=True).encode()
+).hexdigest()[:12]
+
+_forecast_flight = SingleFlight()
 
 def prepare_data_for_prophet(symbol: str, company_name: str):
     # Check cache first
-    if symbol in _data_cache and _is_cache_valid(_data_cache[symbol]['timestamp'], DATA_CACHE_EXPIRY):
-        return _data_cache[symbol]['data']
+    cached = _data_cache.get(symbol)
+    if cached is not None:
+        return cached
     
     # If not in cache or expired, fetch new data
     historical_data = get_stock_history(symbol, period="2y")
@@ -35,73 +69,189 @@ def prepare_data_for_prophet(symbol: str, company_name: str):
     df['y'] = df['close']  # Prophet requires 'y' column
     df['ds'] = pd.to_datetime(df['ds'], unit='ms')  # Convert timestamp to datetime
     
-    # Get sentiment scores for the company
-    sentiment_data = sentiment_analyzer.analyze_company_sentiment(company_name, symbol)
-    sentiment_score = sentiment_data['sentiment_score']
-    
-    # Add sentiment score as a regressor column
-    df['sentiment'] = sentiment_score  # Using the overall sentiment score for historical data
+    # Time-varying sentiment regressor from the symbol's daily sentiment index,
+    # refreshing it scores only articles published since the last refresh
+    sentiment_index = get_sentiment_index()
+    sentiment_index.update(symbol, company_name)
+    df['sentiment'] = sentiment_regressor(df['ds'], sentiment_index.daily_series(symbol))
     
     # Update cache
-    _data_cache[symbol] = {
-        'data': df[['ds', 'y', 'sentiment']],
-        'timestamp': datetime.now()
+    data = df[['ds', 'y', 'sentiment']]
+    _data_cache[symbol] = data
+    
+    return data
+
+def warm_start_params(model: Prophet) -> dict:
+    """
+    Stan initial values taken from a fitted model, as in Prophet's warm-start recipe
+    """
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        params[name] = model.params[name][0][0]
+    for name in ['delta', 'beta']:
+        params[name] = model.params[name][0]
+    return params
+
+def _forecast(model: Prophet, last_sentiment: float, forecast_days: int) -> pd.DataFrame:
+    # Create future dates dataframe, history rows are not needed for the forecast
+    future = model.make_future_dataframe(periods=forecast_days, include_history=False)
+    
+    # Add sentiment predictions for future dates
+    # Using the most recent sentiment score for future predictions
+    future['sentiment'] = last_sentiment
+    
+    # Make predictions
+    with timed("prophet_predict"):
+        forecast = model.predict(future)
+    
+    # Get only the prediction period data
+    return forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+
+def _fit_and_forecast(pandas_df: pd.DataFrame, forecast_days: int, init_model_json: str = None):
+    """
+    Fit Prophet on the training data and forecast the next forecast_days days,
+    warm-starting from a previously fitted model when one is given.
+    Returns the forecast and the serialized model.
+    Module-level so it can run inside a CPU pool worker.
+    """
+    def new_model():
+        # Initialize Prophet model with sentiment regressor
+        model = Prophet(**PROPHET_CONFIG)
+        for regressor in PROPHET_REGRESSORS:
+            model.add_regressor(regressor)
+        return model
+    
+    model = new_model()
+    if init_model_json is not None:
+        try:
+            with timed("prophet_fit_warm"):
+                model.fit(pandas_df, init=warm_start_params(model_from_json(init_model_json)))
+        except Exception as e:
+            # e.g. a different number of changepoints after the history grew, fit from scratch
+            print(f"Warm start failed, fitting from scratch: {str(e)}")
+            model = new_model()
+            with timed("prophet_fit"):
+                model.fit(pandas_df)
+    else:
+        with timed("prophet_fit"):
+            model.fit(pandas_df)
+    
+    return _forecast(model, pandas_df['sentiment'].iloc[-1], forecast_days), model_to_json(model)
+
+def _forecast_from_model(model_json: str, last_sentiment: float, forecast_days: int) -> pd.DataFrame:
+    """
+    Forecast with a stored model, no fitting needed
+    """
+    return _forecast(model_from_json(model_json), last_sentiment, forecast_days)
+
+def _data_version(pandas_df: pd.DataFrame) -> str:
+    """
+    Fingerprint of the training data, a new version means the model must be refit
+    """
+    return hashlib.sha1(pd.util.hash_pandas_object(pandas_df, index=False).values.tobytes()).hexdigest()
+
+def plan_forecast(symbol: str, pandas_df: pd.DataFrame) -> dict:
+    """
+    What it takes to bring a symbol's forecast up to date with its training data:
+    {'source': 'cache', 'data_version', 'forecast'} when the forecast is cached, otherwise
+    {'source': 'stored' or 'fit', 'data_version', 'func', 'args'}, a CPU task
+    whose result goes to finish_forecast
+    """
+    data_version = _data_version(pandas_df)
+    cached = _forecast_cache.get(symbol)
+    if cached is not None and cached['data_version'] == data_version:
+        return {'source': 'cache', 'data_version': data_version, 'forecast': cached['forecast']}
+    
+    model_store = get_model_store()
+    model_json = model_store.load(symbol, CONFIG_VERSION, data_version)
+    cache_lookup("model_store", model_json is not None)
+    if model_json is not None:
+        # Same data as a stored fit, only forecast
+        return {
+            'source': 'stored',
+            'data_version': data_version,
+            'func': _forecast_from_model,
+            'args': (model_json, pandas_df['sentiment'].iloc[-1], MAX_FORECAST_DAYS)
+        }
+    init_model_json = model_store.latest(symbol, CONFIG_VERSION)
+    return {
+        'source': 'fit',
+        'data_version': data_version,
+        'func': _fit_and_forecast,
+        'args': (pandas_df, MAX_FORECAST_DAYS, init_model_json)
     }
+
+def finish_forecast(symbol: str, plan: dict, result) -> pd.DataFrame:
+    """
+    Store the result of a plan_forecast task and return the forecast
+    """
+    if plan['source'] == 'fit':
+        forecast, model_json = result
+        get_model_store().save(symbol, CONFIG_VERSION, plan['data_version'], model_json)
+    else:
+        forecast = result
+    _forecast_cache[symbol] = {
+        'forecast': forecast,
+        'data_version': plan['data_version']
+    }
+    return forecast
+
+def get_forecast(symbol: str, pandas_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Return the MAX_FORECAST_DAYS forecast for a symbol, fitting Prophet once per
+    training-data version. Concurrent requests for any period share one fit.
+    Fitted models are stored on disk: the same data version is only re-forecast,
+    a new one is warm-started from the symbol's previous fit.
+    """
+    data_version = _data_version(pandas_df)
+    cached = _forecast_cache.get(symbol)
+    if cached is not None and cached['data_version'] == data_version:
+        return cached['forecast']
     
-    return _data_cache[symbol]['data']
+    def fit():
+        plan = plan_forecast(symbol, pandas_df)
+        if plan['source'] == 'cache':
+            return plan['forecast']
+        # Fit and forecast in the CPU process pool, off the request thread
+        return finish_forecast(symbol, plan, run_cpu(plan['func'], *plan['args']))
+    
+    return _forecast_flight.do((symbol, data_version), fit)
+
+def prediction_cache_key(symbol: str, prediction_period: str = "1w") -> str:
+    """
+    _prediction_cache key of a symbol's prediction for a period
+    """
+    return f"{symbol}_{prediction_period}"
+
+def prediction_entry_info(symbol: str, prediction_period: str = "1w"):
+    """
+    (version, seconds until expiry) of a cached prediction, None when it is not cached
+    """
+    return _prediction_cache.entry_info(prediction_cache_key(symbol, prediction_period))
 
+def get_cached_prediction(symbol: str, prediction_period: str = "1w"):
+    """
+    The cached prediction for a symbol and period, None when it has to be computed
+    """
+    return _prediction_cache.get(prediction_cache_key(symbol, prediction_period))
+
+@single_flight
 def predict_stock_prices(symbol: str, company_name: str, prediction_period: str = "1w"):
     try:
-        print(f"Starting prediction for {symbol} with period {prediction_period}")
-        
         # Check prediction cache
-        cache_key = f"{symbol}_{prediction_period}"
-        if cache_key in _prediction_cache and _is_cache_valid(_prediction_cache[cache_key]['timestamp'], PREDICTION_CACHE_EXPIRY):
-            return _prediction_cache[cache_key]['prediction']
+        cache_key = prediction_cache_key(symbol, prediction_period)
+        cached = get_cached_prediction(symbol, prediction_period)
+        if cached is not None:
+            return cached
         
         # Get Prophet-compatible pandas DataFrame with sentiment
         pandas_df = prepare_data_for_prophet(symbol, company_name)
-        print(f"Training data loaded: {len(pandas_df)} rows")
-        print(f"Sample of training data:\n{pandas_df.head()}")
-        
-        print(f"Training data shape: {pandas_df.shape}")  # Debug log
         
         # Convert period to number of days
-        period_dict = {
-            "1w": 7,
-            "1mo": 30,
-            "3mo": 90,
-            "6mo": 180,
-        }
-        forecast_days = period_dict.get(prediction_period, 7)
+        forecast_days = PERIOD_DAYS.get(prediction_period, 7)
         
-        # Initialize Prophet model with sentiment regressor
-        model = Prophet(
-            daily_seasonality=True,
-            weekly_seasonality=True,
-            yearly_seasonality=True,
-            changepoint_prior_scale=0.05
-        )
-        
-        # Add sentiment as a regressor
-        model.add_regressor('sentiment')
-        
-        # Fit the model
-        model.fit(pandas_df)
-        
-        # Create future dates dataframe
-        future = model.make_future_dataframe(periods=forecast_days)
-        
-        # Add sentiment predictions for future dates
-        # Using the most recent sentiment score for future predictions
-        future['sentiment'] = pandas_df['sentiment'].iloc[-1]
-        
-        # Make predictions
-        forecast = model.predict(future)
-        
-        # Get only the prediction period data
-        prediction_data = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(forecast_days)
-        print(f"Prediction data head: {prediction_data.head()}")  # Debug log
+        # Slice the symbol's full-horizon forecast, fitting it only if the training data changed
+        prediction_data = get_forecast(symbol, pandas_df).head(forecast_days)
         
         prediction_result = {
             "dates": prediction_data['ds'].dt.strftime('%Y-%m-%d').tolist(),
@@ -110,13 +260,13 @@ def predict_stock_prices(symbol: str, company_name: str, prediction_period: str
             "upper_bound": prediction_data['yhat_upper'].round(2).tolist()
         }
         
-        print(f"Generated prediction result: {prediction_result}")
+        debug_log(
+            "prediction.generated", symbol=symbol, period=prediction_period, training_rows=len(pandas_df),
+            first=prediction_result['predicted_prices'][:1], last=prediction_result['predicted_prices'][-1:]
+        )
         
         # Update prediction cache
-        _prediction_cache[cache_key] = {
-            'prediction': prediction_result,
-            'timestamp': datetime.now()
-        }
+        _prediction_cache[cache_key] = prediction_result
         
         return prediction_result
     except Exception as e:
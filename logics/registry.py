@@ -0,0 +1,101 @@
+import gc
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+from transformers import AutoTokenizer
+from .finbert_backends import load_backend, FINBERT_BACKEND
+
+# Model configuration
+FINBERT_MODEL_ID = os.getenv("FINBERT_MODEL", "ProsusAI/finbert")
+# Identifies the scores in the sentiment cache, quantized and exported backends score slightly differently
+FINBERT_CACHE_ID = FINBERT_MODEL_ID if FINBERT_BACKEND == "torch" else f"{FINBERT_MODEL_ID}:{FINBERT_BACKEND}"
+
+# Models load lazily on first use. PRELOAD_MODELS loads them at import so workers
+# forked from a preloaded parent share the weights copy-on-write, and WARMUP_MODELS
+# loads them in the background once the server (or a pool worker) has started.
+PRELOAD_MODELS = os.getenv("PRELOAD_MODELS", "0") == "1"
+WARMUP_MODELS = os.getenv("WARMUP_MODELS", "1") == "1"
+
+class ModelRegistry:
+    """
+    Process-wide registry of lazily loaded models.
+    Each model is loaded once on first use and the same instance is shared
+    by every module that asks for it.
+    """
+    def __init__(self):
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._models: Dict[str, Any] = {}
+        self._load_times: Dict[str, float] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._registry_lock = threading.Lock()
+
+    def register(self, name: str, loader: Callable[[], Any]):
+        """
+        Register a loader for a model name, the loader is not called until first use
+        """
+        with self._registry_lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def get(self, name: str) -> Any:
+        """
+        Return the shared model instance, loading it on first use
+        """
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"No model registered under '{name}'")
+
+        # Only one thread loads a given model, the others wait for it
+        with self._locks[name]:
+            if name not in self._models:
+                print(f"Loading model '{name}'")
+                start = time.perf_counter()
+                self._models[name] = self._loaders[name]()
+                self._load_times[name] = time.perf_counter() - start
+                print(f"Loaded model '{name}' in {self._load_times[name]:.2f}s")
+        return self._models[name]
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def load_time(self, name: str) -> Optional[float]:
+        return self._load_times.get(name)
+
+    def warm_up(self, *names: str) -> threading.Thread:
+        """
+        Load models in a background thread so the server can accept requests meanwhile
+        """
+        def _load_all():
+            for name in names or list(self._loaders):
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"Error warming up model '{name}': {str(e)}")
+
+        thread = threading.Thread(target=_load_all, name="model-warmup", daemon=True)
+        thread.start()
+        return thread
+
+    def preload(self, *names: str):
+        """
+        Load models eagerly in the current process. Call this in a parent process
+        before forking workers (e.g. gunicorn --preload) so the weights are shared
+        copy-on-write. Freezing the GC keeps collections from touching, and thereby
+        copying, the pages that hold the preloaded objects.
+        """
+        for name in names or list(self._loaders):
+            self.get(name)
+        gc.freeze()
+
+def _load_finbert():
+    return load_backend(FINBERT_BACKEND, FINBERT_MODEL_ID)
+
+# Shared registry instance
+model_registry = ModelRegistry()
+model_registry.register("finbert", _load_finbert)
+# The tokenizer alone, for token counting in processes that do not run the model
+model_registry.register("finbert_tokenizer", lambda: AutoTokenizer.from_pretrained(FINBERT_MODEL_ID))
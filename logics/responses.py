@@ -0,0 +1,176 @@
+import gzip
+import hashlib
+import json
+import os
+import zlib
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+from .cache import BoundedCache
+from .metrics import timed
+
+# Optional faster encoders, the standard library is used without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Response encoding configuration
+HTTP_COMPRESS_MIN_BYTES = int(os.getenv("HTTP_COMPRESS_MIN_BYTES", "1024"))  # Smaller bodies are sent uncompressed
+HTTP_GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))  # 1 (fastest) to 9 (smallest)
+HTTP_BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))  # 0 (fastest) to 11 (smallest)
+HTTP_BODY_CACHE_MB = int(os.getenv("HTTP_BODY_CACHE_MB", "64"))  # Encoded bodies kept by ETag and content encoding
+
+# {(etag, accepted encoding): (body, content encoding)}, a new entry version means a new ETag
+_bodies = BoundedCache("http_bodies", max_bytes=HTTP_BODY_CACHE_MB * 1024 * 1024)
+
+def json_dumps(content: Any) -> bytes:
+    """
+    Compact UTF-8 JSON, with orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+def entry_validator(entry_info: Optional[Tuple[int, Optional[float]]], variant: str = "") -> Optional[Dict]:
+    """
+    ETag and max-age of a response built from a cache entry, None when the entry
+    is not cached. entry_info is the (version, seconds until expiry) of
+    BoundedCache.entry_info; variant tells apart representations of one entry.
+    """
+    if entry_info is None:
+        return None
+    version, remaining = entry_info
+    # The pid keeps versions of separately started server workers apart
+    digest = hashlib.sha1(f"{os.getpid()}:{version}:{variant}".encode()).hexdigest()[:20]
+    return {
+        "etag": f'W/"{digest}"',
+        "max_age": max(0, int(remaining)) if remaining is not None else None
+    }
+
+def _headers(validator: Optional[Dict]) -> Dict[str, str]:
+    headers = {"Vary": "Accept-Encoding"}
+    if validator is not None:
+        headers["ETag"] = validator["etag"]
+        # Shared caches may keep the payload until the backing entry expires, then revalidate
+        headers["Cache-Control"] = (
+            f"public, max-age={validator['max_age']}" if validator["max_age"] is not None else "no-cache"
+        )
+    return headers
+
+def _opaque_tag(tag: str) -> str:
+    # If-None-Match uses the weak comparison, W/ prefixes do not matter
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+def is_not_modified(request: Request, validator: Optional[Dict]) -> bool:
+    """
+    Whether the request's If-None-Match matches the current ETag
+    """
+    header = request.headers.get("if-none-match")
+    if validator is None or not header:
+        return False
+    if header.strip() == "*":
+        return True
+    etag = _opaque_tag(validator["etag"])
+    return any(_opaque_tag(tag) == etag for tag in header.split(","))
+
+def not_modified_response(validator: Dict) -> Response:
+    return Response(status_code=304, headers=_headers(validator))
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    "br" or "gzip" from an Accept-Encoding header, brotli only when it is installed
+    """
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name.strip():
+            accepted[name.strip().lower()] = quality
+    wildcard = accepted.get("*", 0)
+    if brotli is not None and accepted.get("br", wildcard) > 0:
+        return "br"
+    if accepted.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+def _encode(content: Any, render: Optional[Callable[[], bytes]], encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    if render is not None:
+        body = render()
+    else:
+        with timed("json_encode"):
+            body = json_dumps(content)
+    if encoding is None or len(body) < HTTP_COMPRESS_MIN_BYTES:
+        return body, None
+    with timed("compress"):
+        if encoding == "br":
+            return brotli.compress(body, quality=HTTP_BROTLI_QUALITY), "br"
+        return gzip.compress(body, compresslevel=HTTP_GZIP_LEVEL, mtime=0), "gzip"
+
+def encoded_response(
+    request: Request,
+    content: Any = None,
+    validator: Optional[Dict] = None,
+    render: Optional[Callable[[], bytes]] = None,
+    media_type: str = "application/json"
+) -> Response:
+    """
+    A 200 response with content encoded as JSON (or the bytes of render()),
+    compressed as the client accepts once it reaches HTTP_COMPRESS_MIN_BYTES.
+    With a validator the response carries ETag and Cache-Control, and the
+    encoded body is kept, so repeat views of the same entry version skip
+    encoding and compression.
+    """
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    key = (validator["etag"], encoding) if validator is not None else None
+    encoded = _bodies.get(key) if key is not None else None
+    if encoded is None:
+        encoded = _encode(content, render, encoding)
+        if key is not None:
+            _bodies.set(key, encoded, ttl=validator["max_age"])
+
+    body, content_encoding = encoded
+    headers = _headers(validator)
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+    return Response(body, media_type=media_type, headers=headers)
+
+def streaming_response(request: Request, chunks: AsyncIterator[bytes], media_type: str) -> StreamingResponse:
+    """
+    A streamed response compressed as the client accepts. The compressor is
+    flushed after every chunk, so each one still reaches the client as soon as
+    it is produced.
+    """
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    headers = _headers(None)
+    if encoding is None:
+        return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+    async def compressed():
+        try:
+            if encoding == "br":
+                compressor = brotli.Compressor(quality=HTTP_BROTLI_QUALITY)
+                async for chunk in chunks:
+                    yield compressor.process(chunk) + compressor.flush()
+                yield compressor.finish()
+            else:
+                compressor = zlib.compressobj(HTTP_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+                async for chunk in chunks:
+                    yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+                yield compressor.flush()
+        finally:
+            await chunks.aclose()
+
+    headers["Content-Encoding"] = encoding
+    return StreamingResponse(compressed(), media_type=media_type, headers=headers)
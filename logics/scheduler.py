@@ -0,0 +1,215 @@
+import math
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+from .fit_engine import FitEngine
+from .predictor import predict_stock_prices
+from .symbols import get_sp500_constituents, get_sp500_symbols, get_stock_info
+
+# Scheduler configuration
+PRECOMPUTE_ENABLED = os.getenv("PRECOMPUTE_ENABLED", "0") == "1"
+PRECOMPUTE_PERIODS = [p.strip() for p in os.getenv("PRECOMPUTE_PERIODS", "1w,1mo,3mo,6mo").split(",") if p.strip()]
+PRECOMPUTE_CONCURRENCY = int(os.getenv("PRECOMPUTE_CONCURRENCY", "2"))  # Symbols computed at once
+PRECOMPUTE_CPU_BUDGET = float(os.getenv("PRECOMPUTE_CPU_BUDGET", "0.5"))  # Share of the machine's cores precompute may use
+PRECOMPUTE_QUIET_HOURS = os.getenv("PRECOMPUTE_QUIET_HOURS", "")  # e.g. "9-16", local hours when precompute pauses
+PRECOMPUTE_INTERVAL_HOURS = float(os.getenv("PRECOMPUTE_INTERVAL_HOURS", "24"))  # Time between full passes
+
+def parse_quiet_hours(spec: str) -> Optional[Tuple[int, int]]:
+    """
+    Parse "start-end" local hours, end exclusive; "22-6" wraps around midnight.
+    Raises ValueError for anything else.
+    """
+    if not spec:
+        return None
+    parts = spec.split("-")
+    if len(parts) != 2:
+        raise ValueError(f"Expected quiet hours as start-end, got {spec!r}")
+    start, end = (int(part) for part in parts)
+    if not (0 <= start <= 23 and 0 <= end <= 23):
+        raise ValueError(f"Quiet hours must be between 0 and 23, got {spec!r}")
+    return start, end
+
+def in_quiet_hours(quiet_hours: Optional[Tuple[int, int]], now: Optional[datetime] = None) -> bool:
+    if quiet_hours is None:
+        return False
+    hour = (now or datetime.now()).hour
+    start, end = quiet_hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+class PrecomputeScheduler:
+    """
+    Walks the S&P 500 universe in the background and computes predictions for
+    every configured period before users ask for them. The most requested
+    symbols go first; the Prophet fits are fanned out by a FitEngine whose
+    process pool is sized to the CPU budget.
+    """
+    def __init__(
+        self,
+        periods: List[str] = PRECOMPUTE_PERIODS,
+        concurrency: int = PRECOMPUTE_CONCURRENCY,
+        cpu_budget: float = PRECOMPUTE_CPU_BUDGET,
+        quiet_hours: str = PRECOMPUTE_QUIET_HOURS,
+        interval_hours: float = PRECOMPUTE_INTERVAL_HOURS
+    ):
+        self.periods = periods
+        # Never occupy more than the CPU budget's share of the cores, but always make progress
+        cpu_slots = max(1, math.floor((os.cpu_count() or 1) * cpu_budget))
+        self.concurrency = max(1, min(concurrency, cpu_slots))
+        self.quiet_hours_spec = quiet_hours or None
+        try:
+            self.quiet_hours = parse_quiet_hours(quiet_hours)
+        except ValueError as e:
+            # The shared scheduler is built at import, a bad setting must not stop the API from starting
+            print(f"Ignoring PRECOMPUTE_QUIET_HOURS: {str(e)}")
+            self.quiet_hours_spec = None
+            self.quiet_hours = None
+        self.interval = interval_hours * 3600
+
+        self.request_counts = Counter()
+        self._universe = frozenset()
+        self._universe_source = None
+        self._pending: Dict[str, int] = {}  # symbol -> position in the universe, for stable ordering
+        self._in_progress = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._engine = None
+
+        self.cycle_started_at = None
+        self.last_cycle_finished_at = None
+        self.completed = 0
+        self.failed = 0
+        self.cycle_size = 0
+
+    def record_request(self, symbol: str):
+        """
+        Count a user request so the symbol is precomputed earlier in the next passes.
+        Only universe symbols are counted, so arbitrary user input cannot grow the counter.
+        """
+        constituents = get_sp500_constituents()
+        with self._lock:
+            # Rebuilt only when the universe snapshot changes
+            if self._universe_source is not constituents:
+                self._universe = frozenset(constituent['symbol'] for constituent in constituents)
+                self._universe_source = constituents
+            if symbol in self._universe:
+                self.request_counts[symbol] += 1
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="precompute", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            engine, self._engine = self._engine, None
+        if engine is not None:
+            engine.close()
+
+    def _get_engine(self) -> FitEngine:
+        with self._lock:
+            if self._engine is None:
+                self._engine = FitEngine(workers=self.concurrency)
+            return self._engine
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wait_for_active_hours()
+            if self._stop.is_set():
+                break
+            self.run_cycle()
+            self._stop.wait(self.interval)
+
+    def _wait_for_active_hours(self):
+        while in_quiet_hours(self.quiet_hours) and not self._stop.is_set():
+            self._stop.wait(60)
+
+    def run_cycle(self, symbols: Optional[List[str]] = None):
+        """
+        Precompute every period for every symbol, blocking until the pass is done
+        """
+        symbols = symbols if symbols is not None else get_sp500_symbols()
+        with self._lock:
+            self._pending = {symbol: i for i, symbol in enumerate(symbols)}
+            self.cycle_started_at = datetime.now()
+            self.cycle_size = len(symbols)
+            self.completed = 0
+            self.failed = 0
+
+        print(f"Precomputing predictions for {len(symbols)} symbols with concurrency {self.concurrency}")
+        engine = self._get_engine()
+        while not self._stop.is_set():
+            self._wait_for_active_hours()
+            # Results arrive as fits finish; the feed stops at quiet hours and resumes after them
+            for result in engine.forecast_symbols(self._symbols_until_paused()):
+                self._finish(result)
+            with self._lock:
+                if not self._pending:
+                    break
+
+        self.last_cycle_finished_at = datetime.now()
+        print(f"Precompute pass finished: {self.completed} done, {self.failed} failed")
+
+    def _next_symbol(self) -> Optional[str]:
+        with self._lock:
+            if not self._pending:
+                return None
+            # Most requested first, universe order breaks ties
+            symbol = min(self._pending, key=lambda s: (-self.request_counts[s], self._pending[s]))
+            del self._pending[symbol]
+            self._in_progress.add(symbol)
+            return symbol
+
+    def _symbols_until_paused(self) -> Iterator[str]:
+        # Read lazily by the engine, so requests counted mid-pass still reorder the queue
+        while not self._stop.is_set() and not in_quiet_hours(self.quiet_hours):
+            symbol = self._next_symbol()
+            if symbol is None:
+                return
+            yield symbol
+
+    def _finish(self, result: Dict):
+        symbol = result['symbol']
+        try:
+            if result['error'] is not None:
+                raise result['error']
+            # The forecast is cached now, every period is a slice of it
+            company_name = get_stock_info(symbol).get('name', '')
+            for period in self.periods:
+                predict_stock_prices(symbol, company_name, period)
+            with self._lock:
+                self.completed += 1
+        except Exception as e:
+            print(f"Error precomputing {symbol}: {str(e)}")
+            with self._lock:
+                self.failed += 1
+        finally:
+            with self._lock:
+                self._in_progress.discard(symbol)
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None and self._thread.is_alive(),
+                "paused": in_quiet_hours(self.quiet_hours),
+                "periods": self.periods,
+                "concurrency": self.concurrency,
+                "quiet_hours": self.quiet_hours_spec,
+                "cycle_started_at": self.cycle_started_at.isoformat() if self.cycle_started_at else None,
+                "last_cycle_finished_at": self.last_cycle_finished_at.isoformat() if self.last_cycle_finished_at else None,
+                "cycle_size": self.cycle_size,
+                "completed": self.completed,
+                "failed": self.failed,
+                "in_progress": sorted(self._in_progress),
+                "queue_depth": len(self._pending),
+                "top_requested": self.request_counts.most_common(10)
+            }
+
+# Shared scheduler instance
+precompute_scheduler = PrecomputeScheduler()
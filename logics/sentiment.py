@@ -1,95 +1,223 @@
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-import torch
+import threading
 from typing import List, Dict, Tuple, Union
 import numpy as np
 from .news import NewsFeeder
+from .registry import model_registry, FINBERT_CACHE_ID
+from .sentiment_cache import get_sentiment_cache, make_key
+from .executors import run_cpu
+from .singleflight import single_flight
+from .news_preprocess import dedupe_articles, plan_texts, SENTIMENT_TOKEN_BUDGET
+from .metrics import timed
+
+# Label mapping for FinBERT outputs
+LABELS = {
+    0: "negative",
+    1: "neutral",
+    2: "positive"
+}
+
+def score_texts(texts: List[str], batch_size: int = 16, finbert: Tuple = None) -> List[Dict[str, Union[str, float]]]:
+    """
+    Run FinBERT on texts sorted by token length into micro-batches so padding stays minimal.
+    Uncached, module-level so it can run inside a CPU pool worker. finbert is a
+    (tokenizer, backend) pair, the configured backend from the registry by default.
+    """
+    tokenizer, backend = finbert or model_registry.get("finbert")
+    
+    # Tokenize everything once without padding, padding is added per micro-batch
+    with timed("tokenize"):
+        encodings = tokenizer(list(texts), truncation=True, max_length=512)
+    lengths = [len(ids) for ids in encodings['input_ids']]
+    order = sorted(range(len(texts)), key=lambda i: lengths[i])
+    
+    results = [None] * len(texts)
+    for start in range(0, len(order), batch_size):
+        batch = order[start:start + batch_size]
+        features = [{key: encodings[key][i] for key in encodings.keys()} for i in batch]
+        inputs = dict(tokenizer.pad(features, return_tensors="np"))
+        
+        # Get predictions for the whole micro-batch
+        with timed("finbert_forward"):
+            logits = backend(inputs)
+        predictions = _softmax(logits)
+        
+        for row, i in enumerate(batch):
+            results[i] = _build_result(predictions[row])
+    
+    return results
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+def _build_result(probabilities: np.ndarray) -> Dict[str, Union[str, float]]:
+    """
+    Convert one row of FinBERT class probabilities to a sentiment result
+    """
+    sentiment_idx = int(np.argmax(probabilities))
+    return {
+        "sentiment": LABELS[sentiment_idx],
+        "score": float(probabilities[sentiment_idx]),
+        "scores": {
+            label: float(probabilities[idx])
+            for idx, label in LABELS.items()
+        }
+    }
+
+def _aggregate(results: List[Dict], weights: List[int]) -> Union[Dict, None]:
+    """
+    Weighted average of the class probabilities of several results, as one result
+    """
+    if not results:
+        return None
+    probabilities = np.average(
+        [[result['scores'][label] for label in LABELS.values()] for result in results],
+        axis=0,
+        weights=weights
+    )
+    return _build_result(probabilities)
 
 class SentimentAnalyzer:
     def __init__(self):
-        # Load FinBERT model and tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained("ProsusAI/finbert")
-        self.model = AutoModelForSequenceClassification.from_pretrained("ProsusAI/finbert")
+        # FinBERT model and tokenizer are loaded lazily through the shared registry
         self.news_feeder = NewsFeeder()
+        self.cache = get_sentiment_cache()
         
         # Label mapping for FinBERT outputs
-        self.labels = {
-            0: "negative",
-            1: "neutral",
-            2: "positive"
-        }
+        self.labels = LABELS
+    
+    @property
+    def tokenizer(self):
+        return model_registry.get("finbert")[0]
+    
+    @property
+    def model(self):
+        # The configured inference backend, see finbert_backends
+        return model_registry.get("finbert")[1]
     
     def analyze_text(self, text: str) -> Dict[str, Union[str, float]]:
         """
         Analyze sentiment of a single text using FinBERT
         """
-        # Prepare input
-        inputs = self.tokenizer(text, return_tensors="pt", padding=True, truncation=True, max_length=512)
+        return self.analyze_texts([text])[0]
+    
+    def analyze_texts(self, texts: List[str], batch_size: int = 16) -> List[Dict[str, Union[str, float]]]:
+        """
+        Analyze sentiment of many texts using batched FinBERT forward passes.
+        Texts already in the sentiment cache skip the model; results come back
+        in the same order as the input texts.
+        """
+        if not texts:
+            return []
         
-        # Get prediction
-        with torch.no_grad():
-            outputs = self.model(**inputs)
-            predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-        # Get sentiment label and score
-        sentiment_idx = torch.argmax(predictions).item()
-        sentiment_score = predictions[0][sentiment_idx].item()
-        sentiment_label = self.labels[sentiment_idx]
+        keys = [make_key(text, FINBERT_CACHE_ID) for text in texts]
+        cached = self.cache.get_many(keys)
         
-        return {
-            "sentiment": sentiment_label,
-            "score": sentiment_score,
-            "scores": {
-                label: predictions[0][idx].item()
-                for idx, label in self.labels.items()
-            }
-        }
+        # Score each distinct uncached text once
+        pending = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in pending:
+                pending[key] = text
+        if pending:
+            # The forward passes run in the CPU process pool, off the calling thread
+            scored = dict(zip(pending, run_cpu(score_texts, list(pending.values()), batch_size)))
+            self.cache.put_many(scored)
+            cached.update(scored)
+        
+        return [cached[key] for key in keys]
     
-    def analyze_company_sentiment(self, company_name: str, ticker: str, max_news: int = 20) -> Dict:
+    def analyze_articles(self, articles: List[Dict], token_budget: int = SENTIMENT_TOKEN_BUDGET) -> Tuple[List[Dict], int]:
         """
-        Fetch and analyze sentiment from company news
-        Default to 20 articles for comprehensive sentiment analysis
+        Score already deduplicated articles within the token budget.
+        Returns the analyzed articles, in input order and without the ones the
+        budget left out, and the number of tokens used. title_sentiment and
+        content_sentiment are never None: when only one part was scored, both
+        carry its result, and content_chunks is 0 when the body was not scored.
         """
-        # Fetch news articles
-        news_articles = self.news_feeder.fetch_company_news(company_name, ticker, max_results=max_news)
+        tokenizer = model_registry.get("finbert_tokenizer")
+        with timed("tokenize_plan"):
+            plans, tokens_used = plan_texts(articles, tokenizer, token_budget)
         
-        if not news_articles:
-            return {
-                "overall_sentiment": "neutral",
-                "sentiment_score": 0,
-                "articles": []
-            }
+        # Analyze all titles and body windows together in batched forward passes
+        texts = []
+        for plan in plans:
+            if plan['title'] is not None:
+                texts.append(plan['title'])
+            texts.extend(text for text, _ in plan['chunks'])
+        text_sentiments = iter(self.analyze_texts(texts))
         
         analyzed_articles = []
-        sentiment_scores = []
         
         # Analyze each article
-        for article in news_articles:
-            # Analyze title and content separately
-            title_sentiment = self.analyze_text(article['title'])
-            content_sentiment = self.analyze_text(article['content'])
+        for plan in plans:
+            article = plan['article']
+            title_sentiment = next(text_sentiments) if plan['title'] is not None else None
+            # Body windows are aggregated weighted by their token counts
+            chunk_sentiments = [next(text_sentiments) for _ in plan['chunks']]
+            content_sentiment = _aggregate(chunk_sentiments, [tokens for _, tokens in plan['chunks']])
             
-            # Combine title and content sentiment (weighted average)
-            combined_score = (title_sentiment['score'] * 0.4 + content_sentiment['score'] * 0.6)
-            sentiment_scores.append(combined_score)
+            # Combine title and content sentiment (weighted average), either alone if the other was not scored
+            weighted = [(result, weight) for result, weight in ((title_sentiment, 0.4), (content_sentiment, 0.6)) if result]
+            total_weight = sum(weight for _, weight in weighted)
+            combined_score = sum(result['score'] * weight for result, weight in weighted) / total_weight
+            # Positive minus negative probability, the direction of the article from -1 to 1
+            sentiment_balance = sum(
+                (result['scores']['positive'] - result['scores']['negative']) * weight for result, weight in weighted
+            ) / total_weight
             
             analyzed_articles.append({
                 "title": article['title'],
                 "url": article['url'],
                 "published_date": article['published_date'],
                 "source": article['source'],
-                "title_sentiment": title_sentiment,
-                "content_sentiment": content_sentiment,
-                "combined_sentiment_score": combined_score
+                # Both are always set, a part that was not scored (no title, no body left after
+                # dropping a repeated title, or no budget for a body window) reports the other part
+                "title_sentiment": title_sentiment or content_sentiment,
+                "content_sentiment": content_sentiment or title_sentiment,
+                "content_chunks": len(chunk_sentiments),
+                "combined_sentiment_score": combined_score,
+                "sentiment_balance": sentiment_balance
             })
         
+        return analyzed_articles, tokens_used
+    
+    @single_flight
+    def analyze_company_sentiment(self, company_name: str, ticker: str, max_news: int = 20,
+                                  token_budget: int = SENTIMENT_TOKEN_BUDGET) -> Dict:
+        """
+        Fetch and analyze sentiment from company news
+        Default to 20 articles for comprehensive sentiment analysis
+        Duplicate articles are dropped and at most token_budget FinBERT tokens are scored
+        """
+        # Fetch news articles
+        news_articles = self.news_feeder.fetch_company_news(company_name, ticker, max_results=max_news)
+        
+        # Drop syndicated copies, then score within the token budget
+        unique_articles = dedupe_articles(news_articles)
+        analyzed_articles, tokens_used = self.analyze_articles(unique_articles, token_budget)
+        
+        if not analyzed_articles:
+            return {
+                "overall_sentiment": "neutral",
+                "sentiment_score": 0,
+                "articles": []
+            }
+        
         # Calculate overall sentiment
-        avg_sentiment_score = np.mean(sentiment_scores)
+        avg_sentiment_score = np.mean([article['combined_sentiment_score'] for article in analyzed_articles])
         overall_sentiment = self.get_overall_sentiment(avg_sentiment_score)
         
         return {
             "overall_sentiment": overall_sentiment,
             "sentiment_score": float(avg_sentiment_score),
-            "articles": analyzed_articles
+            "articles": analyzed_articles,
+            "preprocessing": {
+                "fetched_articles": len(news_articles),
+                "duplicates_removed": len(news_articles) - len(unique_articles),
+                "scored_articles": len(analyzed_articles),
+                "tokens_used": tokens_used,
+                "token_budget": token_budget
+            }
         }
     
     def get_overall_sentiment(self, score: float) -> str:
@@ -102,6 +230,20 @@ class SentimentAnalyzer:
             return "negative"
         return "neutral"
 
+_shared_analyzer = None
+_shared_analyzer_lock = threading.Lock()
+
+def get_sentiment_analyzer() -> SentimentAnalyzer:
+    """
+    Return the process-wide SentimentAnalyzer instance
+    """
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        with _shared_analyzer_lock:
+            if _shared_analyzer is None:
+                _shared_analyzer = SentimentAnalyzer()
+    return _shared_analyzer
+
 # Example usage
 if __name__ == "__main__":
     analyzer = SentimentAnalyzer()
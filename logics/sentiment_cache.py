@@ -0,0 +1,147 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional
+from cachetools import LRUCache
+from .settings import cache_path
+from .metrics import register_collector
+
+# Cache configuration
+SENTIMENT_CACHE_PATH = os.getenv("SENTIMENT_CACHE_PATH")  # Defaults to CACHE_DIR/sentiment.sqlite
+SENTIMENT_CACHE_MEMORY_SIZE = int(os.getenv("SENTIMENT_CACHE_MEMORY_SIZE", "10000"))
+
+def normalize_text(text: str) -> str:
+    """
+    Collapse whitespace, which the tokenizer ignores anyway
+    """
+    return " ".join(text.split())
+
+def make_key(text: str, model_id: str) -> str:
+    """
+    Content-addressed cache key for a text scored by a given model
+    """
+    digest = hashlib.sha256()
+    digest.update(model_id.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(normalize_text(text).encode("utf-8"))
+    return digest.hexdigest()
+
+class SentimentCache:
+    """
+    Two-tier cache of FinBERT results: an in-memory LRU in front of a SQLite
+    table, so hits skip the model entirely and survive restarts.
+    """
+    def __init__(self, path: Optional[str] = None, memory_size: int = SENTIMENT_CACHE_MEMORY_SIZE):
+        path = path or SENTIMENT_CACHE_PATH or cache_path("sentiment.sqlite")
+        self.path = path
+        self._memory = LRUCache(maxsize=memory_size)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sentiment_results (key TEXT PRIMARY KEY, result TEXT NOT NULL)"
+        )
+        self._conn.commit()
+
+        # Counters
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Look up many keys at once, returns only the keys that were found
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                result = self._memory.get(key)
+                if result is not None:
+                    found[key] = result
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+
+            if missing:
+                placeholders = ",".join("?" * len(missing))
+                rows = self._conn.execute(
+                    f"SELECT key, result FROM sentiment_results WHERE key IN ({placeholders})",
+                    missing
+                ).fetchall()
+                for key, result in rows:
+                    found[key] = self._memory[key] = json.loads(result)
+                self.disk_hits += len(rows)
+                self.misses += len(missing) - len(rows)
+        return found
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.get_many([key]).get(key)
+
+    def put_many(self, results: Dict[str, Dict]):
+        """
+        Store results in both tiers
+        """
+        if not results:
+            return
+        with self._lock:
+            self._memory.update(results)
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO sentiment_results (key, result) VALUES (?, ?)",
+                [(key, json.dumps(result)) for key, result in results.items()]
+            )
+            self._conn.commit()
+
+    def put(self, key: str, result: Dict):
+        self.put_many({key: result})
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_entries = self._conn.execute("SELECT COUNT(*) FROM sentiment_results").fetchone()[0]
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": disk_entries
+            }
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM sentiment_results")
+            self._conn.commit()
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def get_sentiment_cache() -> SentimentCache:
+    """
+    Return the process-wide sentiment cache, opening the database on first use
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                _shared_cache = SentimentCache()
+    return _shared_cache
+
+def _collect():
+    # Only once the cache is open, a scrape must not create the database
+    cache = _shared_cache
+    if cache is None:
+        return
+    with cache._lock:
+        memory_hits, disk_hits, misses, memory_entries = cache.memory_hits, cache.disk_hits, cache.misses, len(cache._memory)
+    # The disk tier only sees memory misses
+    yield "rtsp_cache_lookups_total", {"cache": "sentiment_memory", "result": "hit"}, memory_hits
+    yield "rtsp_cache_lookups_total", {"cache": "sentiment_memory", "result": "miss"}, disk_hits + misses
+    yield "rtsp_cache_lookups_total", {"cache": "sentiment_disk", "result": "hit"}, disk_hits
+    yield "rtsp_cache_lookups_total", {"cache": "sentiment_disk", "result": "miss"}, misses
+    yield "rtsp_cache_entries", {"cache": "sentiment_memory"}, memory_entries
+
+register_collector(_collect)
@@ -0,0 +1,168 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from .settings import cache_path
+from .news_preprocess import canonical_url, dedupe_articles, simhash
+from .singleflight import SingleFlight
+from .news import NewsFetchError
+
+# Index configuration
+SENTIMENT_INDEX_PATH = os.getenv("SENTIMENT_INDEX_PATH")  # Defaults to CACHE_DIR/sentiment_index.sqlite
+SENTIMENT_INDEX_REFRESH = timedelta(hours=float(os.getenv("SENTIMENT_INDEX_REFRESH_HOURS", "24")))  # News fetched per symbol at most this often
+
+def article_id(article: Dict) -> str:
+    """
+    Stable identity of an article: its canonical URL, or a content hash when it has none
+    """
+    url = canonical_url(article.get('url') or "")
+    return url or f"simhash:{simhash(article.get('title', '') + ' ' + article.get('content', '')):016x}"
+
+def article_day(article: Dict, fallback: datetime) -> str:
+    """
+    UTC publication date of an article as YYYY-MM-DD, the fetch date when it has none
+    """
+    published = pd.to_datetime(article.get('published_date') or None, utc=True, errors='coerce')
+    return (fallback if pd.isna(published) else published).strftime('%Y-%m-%d')
+
+def sentiment_regressor(ds: pd.Series, daily: pd.DataFrame) -> np.ndarray:
+    """
+    Align a daily sentiment series with bar dates: each bar takes the sentiment
+    of the latest day with news on or before it (weekend news reaches Monday),
+    bars before the first scored article are neutral (0).
+    """
+    bars = pd.DataFrame({'day': pd.to_datetime(ds).dt.normalize().astype('datetime64[ns]'), 'order': np.arange(len(ds))})
+    if daily.empty:
+        return np.zeros(len(ds))
+    news = pd.DataFrame({
+        'day': pd.to_datetime(daily['date']).astype('datetime64[ns]'),
+        'sentiment': daily['sentiment'].to_numpy(dtype='float64')
+    }).sort_values('day')
+    joined = pd.merge_asof(bars.sort_values('day'), news, on='day', direction='backward')
+    return joined.sort_values('order')['sentiment'].fillna(0.0).to_numpy()
+
+class SentimentIndex:
+    """
+    Per-symbol daily sentiment built incrementally from news. Each refresh
+    scores only articles the index has not seen, so a symbol's history is
+    never re-analyzed. Article scores are the positive minus negative FinBERT
+    probability, averaged per publication day.
+    """
+    def __init__(self, path: Optional[str] = None, refresh_interval: timedelta = SENTIMENT_INDEX_REFRESH, analyzer=None):
+        self.path = path or SENTIMENT_INDEX_PATH or cache_path("sentiment_index.sqlite")
+        self.refresh_interval = refresh_interval
+        self._analyzer = analyzer
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS index_articles ("
+            "symbol TEXT NOT NULL, article_id TEXT NOT NULL, day TEXT NOT NULL, "
+            "sentiment REAL NOT NULL, scored_at TEXT NOT NULL, PRIMARY KEY (symbol, article_id))"
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS index_updates (symbol TEXT PRIMARY KEY, updated_at TEXT NOT NULL)")
+        self._conn.commit()
+
+    @property
+    def analyzer(self):
+        if self._analyzer is None:
+            from .sentiment import get_sentiment_analyzer
+            self._analyzer = get_sentiment_analyzer()
+        return self._analyzer
+
+    def _updated_at(self, symbol: str) -> Optional[datetime]:
+        with self._lock:
+            row = self._conn.execute("SELECT updated_at FROM index_updates WHERE symbol = ?", (symbol,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def _known_ids(self, symbol: str, ids: List[str]) -> set:
+        if not ids:
+            return set()
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT article_id FROM index_articles WHERE symbol = ? AND article_id IN ({placeholders})",
+                [symbol, *ids]
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def has_history(self, symbol: str) -> bool:
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM index_articles WHERE symbol = ? LIMIT 1", (symbol,)).fetchone() is not None
+
+    def update(self, symbol: str, company_name: str) -> int:
+        """
+        Fetch the symbol's news if the last refresh is older than the refresh
+        interval and score the articles the index does not have yet.
+        Returns the number of newly scored articles.
+        """
+        updated_at = self._updated_at(symbol)
+        now = datetime.now(timezone.utc)
+        if updated_at is not None and now - updated_at < self.refresh_interval:
+            return 0
+        return self._flight.do(symbol, self._update, symbol, company_name, now)
+
+    def _update(self, symbol: str, company_name: str, now: datetime) -> int:
+        try:
+            articles = dedupe_articles(self.analyzer.news_feeder.fetch_company_news(company_name, symbol))
+        except NewsFetchError as e:
+            # Keep serving the stored series, the next call tries again
+            if not self.has_history(symbol):
+                raise
+            print(f"Error refreshing sentiment index for {symbol}, serving stored sentiment: {str(e)}")
+            return 0
+        ids = [article_id(article) for article in articles]
+        known = self._known_ids(symbol, ids)
+        new_articles = {i: article for i, article in zip(ids, articles) if i not in known}
+
+        analyzed, _ = self.analyzer.analyze_articles(list(new_articles.values())) if new_articles else ([], 0)
+        # Analyzed articles keep the input order, minus any the token budget left out
+        results = iter(analyzed)
+        result = next(results, None)
+        rows = []
+        for i, article in new_articles.items():
+            if result is not None and (result['url'], result['title']) == (article['url'], article['title']):
+                rows.append((symbol, i, article_day(article, now), result['sentiment_balance'], now.isoformat()))
+                result = next(results, None)
+
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO index_articles VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.execute("INSERT OR REPLACE INTO index_updates VALUES (?, ?)", (symbol, now.isoformat()))
+            self._conn.commit()
+        print(f"Sentiment index for {symbol}: {len(rows)} new of {len(articles)} articles")
+        return len(rows)
+
+    def daily_series(self, symbol: str) -> pd.DataFrame:
+        """
+        Mean article sentiment per publication day, columns date, sentiment and articles
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT day, AVG(sentiment), COUNT(*) FROM index_articles WHERE symbol = ? GROUP BY day ORDER BY day",
+                (symbol,)
+            ).fetchall()
+        return pd.DataFrame(rows, columns=['date', 'sentiment', 'articles'])
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM index_articles")
+            self._conn.execute("DELETE FROM index_updates")
+            self._conn.commit()
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+def get_sentiment_index() -> SentimentIndex:
+    """
+    Return the process-wide sentiment index
+    """
+    global _shared_index
+    if _shared_index is None:
+        with _shared_index_lock:
+            if _shared_index is None:
+                _shared_index = SentimentIndex()
+    return _shared_index
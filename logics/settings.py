@@ -0,0 +1,15 @@
+import os
+
+# Directory for on-disk caches and stores, kept out of the repository
+CACHE_DIR = os.getenv(
+    "CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache")
+)
+
+def cache_path(*parts: str) -> str:
+    """
+    Return a path inside CACHE_DIR, creating its parent directory if needed
+    """
+    path = os.path.join(CACHE_DIR, *parts)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return path
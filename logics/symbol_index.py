@@ -0,0 +1,118 @@
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from typing import Dict, List, Tuple
+from .symbols import get_sp500_constituents
+
+# Match scores, a better kind of match always ranks first
+EXACT_SYMBOL = 100
+SYMBOL_PREFIX = 90
+NAME_PREFIX = 80
+NAME_WORD_PREFIX = 70
+SECTOR_PREFIX = 50
+FUZZY = 40  # Scaled by trigram similarity
+FUZZY_MIN_SIMILARITY = 0.3
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+def normalize(text: str) -> str:
+    return _NON_WORD.sub(" ", text.lower()).strip()
+
+def trigrams(text: str) -> set:
+    padded = f"  {normalize(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class SymbolIndex:
+    """
+    Search index over tickers, company names and sectors, built once per symbol
+    list. Prefix lookups bisect sorted key arrays; when they find fewer results
+    than asked for, a trigram index supplies fuzzy matches for typos.
+    """
+    def __init__(self, constituents: List[Dict]):
+        self.entries = [
+            {'symbol': c['symbol'], 'name': c.get('name', ''), 'sector': c.get('sector', '')}
+            for c in constituents
+        ]
+        symbol_keys, name_keys, word_keys, sector_keys = [], [], [], []
+        self._trigrams = defaultdict(set)
+        self._trigram_counts = []
+        for i, entry in enumerate(self.entries):
+            name = normalize(entry['name'])
+            symbol_keys.append((entry['symbol'].upper(), i))
+            name_keys.append((name, i))
+            word_keys.extend((word, i) for word in name.split()[1:])
+            sector_keys.append((normalize(entry['sector']), i))
+            grams = trigrams(entry['symbol']) | trigrams(entry['name'])
+            for gram in grams:
+                self._trigrams[gram].add(i)
+            self._trigram_counts.append(len(grams))
+
+        self._symbols = sorted(symbol_keys)
+        self._names = sorted(name_keys)
+        self._words = sorted(word_keys)
+        self._sectors = sorted(sector_keys)
+
+    @staticmethod
+    def _prefix(keys: List[Tuple[str, int]], prefix: str):
+        """Yield (key, entry) pairs whose key starts with prefix"""
+        for key, i in keys[bisect_left(keys, (prefix,)):]:
+            if not key.startswith(prefix):
+                break
+            yield key, i
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        Ranked matches for a query: exact ticker, ticker prefix, name prefix,
+        name word prefix, sector prefix, then fuzzy matches
+        """
+        symbol_query = query.strip().upper()
+        text_query = normalize(query)
+        if not text_query:
+            return []
+
+        scores: Dict[int, float] = {}
+
+        def add(i: int, score: float):
+            if score > scores.get(i, 0):
+                scores[i] = score
+
+        for key, i in self._prefix(self._symbols, symbol_query):
+            # Shorter tickers are closer to the query
+            add(i, EXACT_SYMBOL if key == symbol_query else SYMBOL_PREFIX - (len(key) - len(symbol_query)) / 10)
+        for _, i in self._prefix(self._names, text_query):
+            add(i, NAME_PREFIX)
+        for _, i in self._prefix(self._words, text_query):
+            add(i, NAME_WORD_PREFIX)
+        for _, i in self._prefix(self._sectors, text_query):
+            add(i, SECTOR_PREFIX)
+
+        if len(scores) < limit:
+            query_grams = trigrams(query)
+            shared = Counter()
+            for gram in query_grams:
+                shared.update(self._trigrams.get(gram, ()))
+            for i, count in shared.items():
+                similarity = count / (len(query_grams) + self._trigram_counts[i] - count)
+                if similarity >= FUZZY_MIN_SIMILARITY:
+                    add(i, FUZZY * similarity)
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.entries[item[0]]['symbol']))[:limit]
+        return [dict(self.entries[i], score=round(score, 3)) for i, score in ranked]
+
+_shared_index = None
+_shared_index_source = None
+_shared_index_lock = threading.Lock()
+
+def get_symbol_index() -> SymbolIndex:
+    """
+    Return the index of the current S&P 500 constituents, rebuilt only when the list changes
+    """
+    global _shared_index, _shared_index_source
+    constituents = get_sp500_constituents()
+    if _shared_index_source is not constituents:
+        with _shared_index_lock:
+            if _shared_index_source is not constituents:
+                _shared_index = SymbolIndex(constituents)
+                _shared_index_source = constituents
+    return _shared_index
@@ -1,44 +1,57 @@
+import io
+import os
+import numpy as np
 import polars as pl
 import requests
 import pandas as pd
 from lxml import html
-from cachetools import TTLCache
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List
 import yfinance as yf
+from .singleflight import single_flight
+from .cache import BoundedCache
+from .metrics import timed, debug_log
+from .bar_store import get_bar_store, BAR_REFRESH_INTERVAL, OHLCV_COLUMNS
+from .universe import get_universe
 
-# Cache for storing stock data (TTL = 1 hour)
-symbols_cache = TTLCache(maxsize=100, ttl=3600)
-stock_cache = TTLCache(maxsize=500, ttl=3600)
+# Cache for storing stock data (TTL = 1 hour), the byte budget covers info and history of the whole S&P 500
+STOCK_CACHE_MAX_MB = int(os.getenv("STOCK_CACHE_MAX_MB", "256"))
+stock_cache = BoundedCache("stock", max_bytes=STOCK_CACHE_MAX_MB * 1024 * 1024, ttl=3600)
+# History expires when the bar store would check for new bars, so cached charts are never older than a refresh
+HISTORY_CACHE_TTL = BAR_REFRESH_INTERVAL.total_seconds()
+
+# Parallel info lookups for the bulk API
+BULK_INFO_WORKERS = int(os.getenv("BULK_INFO_WORKERS", "16"))
+_bulk_info_executor = ThreadPoolExecutor(max_workers=BULK_INFO_WORKERS, thread_name_prefix="bulk-info")
+
+def get_sp500_constituents() -> List[Dict[str, str]]:
+    """S&P 500 constituents (symbol, name, sector, industry) from the local snapshot, refreshed in the background"""
+    return get_universe().constituents()
 
 def get_sp500_symbols() -> List[str]:
-    """Fetch S&P 500 symbols from Wikipedia"""
-    if 'sp500_symbols' in symbols_cache:
-        print("Returning cached symbols")
-        return symbols_cache['sp500_symbols']
-    
-    try:
-        print("Fetching S&P 500 symbols from Wikipedia")
-        tables = pd.read_html('https://en.wikipedia.org/wiki/List_of_S%26P_500_companies')
-        df = tables[0]
-        symbols = df['Symbol'].tolist()
-        print(f"Found {len(symbols)} symbols")
-        symbols_cache['sp500_symbols'] = symbols
-        return symbols
-    except Exception as e:
-        print(f"Error fetching symbols: {e}")
-        # Return some default symbols if fetch fails
-        default_symbols = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'META']
-        return default_symbols
+    """S&P 500 symbols from the local snapshot"""
+    return [constituent['symbol'] for constituent in get_sp500_constituents()]
+
+def info_cache_key(symbol: str) -> str:
+    """stock_cache key of a symbol's company details"""
+    return f"stock_info_{symbol}"
 
+def history_cache_key(symbol: str, period: str, layout: str = "rows") -> str:
+    """stock_cache key of a symbol's history for a period and layout"""
+    return f"stock_history_{symbol}_{period}_{layout}"
+
+@single_flight
 def get_stock_info(symbol: str) -> Dict:
     """Get stock information using yfinance with verified fields"""
-    cache_key = f"stock_info_{symbol}"
-    if cache_key in stock_cache:
-        return stock_cache[cache_key]
+    cache_key = info_cache_key(symbol)
+    cached = stock_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     try:
         stock = yf.Ticker(symbol)
-        info = stock.info
+        with timed("yfinance_info"):
+            info = stock.info
         result = {
             'symbol': symbol,
             'name': info.get('shortName', info.get('longName', '')),
@@ -54,7 +67,7 @@ def get_stock_info(symbol: str) -> Dict:
             'volume': info.get('volume', 0),
             'avg_volume': info.get('averageVolume', 0)
         }
-        print(f"Fetched stock info for {symbol}: {result}")  # Debugging log
+        debug_log("stock_info.fetched", symbol=symbol, name=result['name'], price=result['current_price'])
         stock_cache[cache_key] = result
         return result
     except Exception as e:
@@ -74,24 +87,100 @@ def get_stock_info(symbol: str) -> Dict:
             'avg_volume': 0
         }
 
-def get_stock_history(symbol: str, period: str = "1mo") -> Dict[str, List]:
-    """Get historical stock data for the specified period."""
+def _history_timestamps(history: pd.DataFrame) -> np.ndarray:
+    """Bar timestamps in epoch milliseconds, matching Timestamp.timestamp() * 1000"""
+    return np.round(history.index.as_unit('ns').asi8 / 1e9, 6) * 1000
+
+def history_to_rows(history: pd.DataFrame) -> Dict[str, List]:
+    """Convert a yfinance history frame to OHLC/volume rows in a single vectorized pass"""
+    timestamps = _history_timestamps(history)
+    values = history[OHLCV_COLUMNS].to_numpy(dtype='float64')
+    
+    # Return both OHLC for candlestick and simple price data for comparison
+    return {
+        "ohlc": np.column_stack([timestamps, values[:, :4]]).tolist(),
+        "volume": np.column_stack([timestamps, values[:, 4]]).tolist(),
+        "dates": history.index.strftime('%Y-%m-%d').tolist(),
+        "prices": values[:, 3].tolist()
+    }
+
+def history_to_columns(history: pd.DataFrame) -> Dict[str, List]:
+    """Convert a yfinance history frame to parallel arrays, one per field"""
+    values = history[OHLCV_COLUMNS].to_numpy(dtype='float64')
+    return {
+        "timestamps": _history_timestamps(history).tolist(),
+        "dates": history.index.strftime('%Y-%m-%d').tolist(),
+        "open": values[:, 0].tolist(),
+        "high": values[:, 1].tolist(),
+        "low": values[:, 2].tolist(),
+        "close": values[:, 3].tolist(),
+        "volume": values[:, 4].tolist()
+    }
+
+def columns_to_arrow(columns: Dict[str, List]) -> bytes:
+    """Serialize columnar history to an Arrow IPC stream"""
+    buffer = io.BytesIO()
+    pl.DataFrame(columns).write_ipc_stream(buffer)
+    return buffer.getvalue()
+
+HISTORY_LAYOUTS = {
+    "rows": history_to_rows,
+    "columns": history_to_columns
+}
+
+@single_flight
+def get_stock_history(symbol: str, period: str = "1mo", layout: str = "rows") -> Dict[str, List]:
+    """
+    Get historical stock data for the specified period.
+    layout="rows" returns [timestamp, ...] rows for the charts,
+    layout="columns" returns parallel arrays, which are smaller to encode for long periods.
+    """
+    to_layout = HISTORY_LAYOUTS[layout]
+    cache_key = history_cache_key(symbol, period, layout)
+    cached = stock_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
-        stock = yf.Ticker(symbol)
-        history = stock.history(period=period)
-        
-        dates = [row.name.strftime('%Y-%m-%d') for _, row in history.iterrows()]
-        prices = history['Close'].tolist()
-        
-        # Return both OHLC for candlestick and simple price data for comparison
-        return {
-            "ohlc": [[row.name.timestamp() * 1000, row['Open'], row['High'], row['Low'], row['Close']]
-                    for _, row in history.iterrows()],
-            "volume": [[row.name.timestamp() * 1000, row['Volume']]
-                      for _, row in history.iterrows()],
-            "dates": dates,
-            "prices": prices
-        }
+        # Served from the local bar store, which only downloads bars it does not have yet
+        history = get_bar_store().get_history(symbol, period)
+        result = to_layout(history)
+        stock_cache.set(cache_key, result, ttl=HISTORY_CACHE_TTL)
+        return result
     except Exception as e:
         print(f"Error fetching historical data for {symbol}: {str(e)}")
-        return {"ohlc": [], "volume": [], "dates": [], "prices": []}
+        return to_layout(pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([])))
+
+def get_stocks_history_bulk(symbols: List[str], period: str = "1mo", layout: str = "rows") -> Dict[str, Dict[str, List]]:
+    """
+    Get historical data for many symbols, downloading every missing symbol in one batched request
+    """
+    to_layout = HISTORY_LAYOUTS[layout]
+    results = {}
+    missing = []
+    for symbol in symbols:
+        cache_key = history_cache_key(symbol, period, layout)
+        cached = stock_cache.get(cache_key)
+        if cached is not None:
+            results[symbol] = cached
+        else:
+            missing.append(symbol)
+    
+    if missing:
+        histories = get_bar_store().get_histories(missing, period)
+        for symbol in missing:
+            if symbol in histories:
+                results[symbol] = to_layout(histories[symbol])
+                stock_cache.set(history_cache_key(symbol, period, layout), results[symbol], ttl=HISTORY_CACHE_TTL)
+            else:
+                print(f"No historical data for {symbol}")
+                results[symbol] = to_layout(pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([])))
+    
+    return {symbol: results[symbol] for symbol in symbols}
+
+def get_stocks_info_bulk(symbols: List[str]) -> Dict[str, Dict]:
+    """
+    Get stock information for many symbols with bounded parallelism, yfinance has no batched info call
+    """
+    infos = _bulk_info_executor.map(get_stock_info, symbols)
+    return dict(zip(symbols, infos))
@@ -0,0 +1,35 @@
+import os
+import sys
+
+# Variables read by the native thread pools (OpenMP, MKL, OpenBLAS, Accelerate, numexpr) and by Stan
+THREAD_ENV_VARS = (
+    "OMP_NUM_THREADS",
+    "MKL_NUM_THREADS",
+    "OPENBLAS_NUM_THREADS",
+    "VECLIB_MAXIMUM_THREADS",
+    "NUMEXPR_NUM_THREADS",
+    "STAN_NUM_THREADS",
+)
+
+def limit_threads(threads: int):
+    """
+    Cap this process's native thread pools at threads, 0 leaves them alone.
+    Meant as a process pool initializer: libraries loaded afterwards, and child
+    processes such as the cmdstan optimizer, read the limit from the environment.
+    It does not run before everything else, a spawned worker first re-imports
+    the parent's __main__, so pools loaded by then (numpy's BLAS, typically)
+    are only capped when threadpoolctl is installed. torch is capped when it
+    is loaded.
+    """
+    if threads <= 0:
+        return
+    for name in THREAD_ENV_VARS:
+        os.environ[name] = str(threads)
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    torch = sys.modules.get("torch")
+    if torch is not None:
+        torch.set_num_threads(threads)
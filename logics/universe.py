@@ -0,0 +1,167 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+import pandas as pd
+from .settings import cache_path
+
+# Snapshot configuration
+UNIVERSE_SNAPSHOT_PATH = os.getenv("UNIVERSE_SNAPSHOT_PATH")  # Defaults to CACHE_DIR/sp500_constituents.json
+UNIVERSE_SEED_PATH = os.getenv("UNIVERSE_SEED_PATH", os.path.join(os.path.dirname(__file__), "data", "sp500_constituents.json"))  # Shipped snapshot used until CACHE_DIR has one
+UNIVERSE_MAX_AGE = float(os.getenv("UNIVERSE_MAX_AGE_HOURS", "24")) * 3600  # Snapshot age that triggers a background refresh
+UNIVERSE_RETRY_INTERVAL = float(os.getenv("UNIVERSE_RETRY_MINUTES", "15")) * 60  # Wait after a failed refresh
+UNIVERSE_MIN_SIZE = int(os.getenv("UNIVERSE_MIN_SIZE", "400"))  # Fewer rows means the page did not parse as expected
+
+SP500_URL = 'https://en.wikipedia.org/wiki/List_of_S%26P_500_companies'
+
+# Used only if neither a snapshot nor the seed can be read
+DEFAULT_CONSTITUENTS = [
+    {'symbol': 'AAPL', 'name': 'Apple Inc.', 'sector': 'Information Technology', 'industry': 'Technology Hardware, Storage & Peripherals'},
+    {'symbol': 'MSFT', 'name': 'Microsoft', 'sector': 'Information Technology', 'industry': 'Systems Software'},
+    {'symbol': 'GOOGL', 'name': 'Alphabet Inc. (Class A)', 'sector': 'Communication Services', 'industry': 'Interactive Media & Services'},
+    {'symbol': 'AMZN', 'name': 'Amazon', 'sector': 'Consumer Discretionary', 'industry': 'Broadline Retail'},
+    {'symbol': 'META', 'name': 'Meta Platforms', 'sector': 'Communication Services', 'industry': 'Interactive Media & Services'},
+]
+
+def fetch_sp500_constituents() -> List[Dict[str, str]]:
+    """Fetch S&P 500 constituents (symbol, name, sector, industry) from Wikipedia"""
+    print("Fetching S&P 500 symbols from Wikipedia")
+    tables = pd.read_html(SP500_URL)
+    df = tables[0]
+    return [
+        {'symbol': symbol, 'name': name, 'sector': sector, 'industry': industry}
+        for symbol, name, sector, industry in zip(
+            df['Symbol'], df['Security'], df['GICS Sector'], df['GICS Sub-Industry']
+        )
+    ]
+
+def _content_hash(constituents: List[Dict]) -> str:
+    return hashlib.sha256(json.dumps(constituents, sort_keys=True).encode()).hexdigest()
+
+class UniverseStore:
+    """
+    The S&P 500 constituent list as a versioned local snapshot. Reads never
+    touch the network: they return the current snapshot, and a stale one is
+    refreshed in a background thread and swapped in atomically once fetched
+    (stale-while-revalidate). The version increases whenever the list changes.
+    A fresh checkout starts from the seed snapshot committed with the code; it
+    is older than max_age, so the first read schedules a refresh.
+    """
+    def __init__(self, path: Optional[str] = None, max_age: float = UNIVERSE_MAX_AGE,
+                 retry_interval: float = UNIVERSE_RETRY_INTERVAL, seed_path: Optional[str] = None):
+        self.path = path or UNIVERSE_SNAPSHOT_PATH or cache_path("sp500_constituents.json")
+        self.seed_path = seed_path or UNIVERSE_SEED_PATH
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self._last_attempt = None  # time.monotonic() of the last refresh, None until the first one
+        self.last_error = None
+        # The seed is not copied to CACHE_DIR; the first successful refresh writes the snapshot there
+        self._snapshot = self._load(self.path) or self._load(self.seed_path)
+
+    def _load(self, path: str) -> Optional[Dict]:
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable symbol snapshot {path}: {str(e)}")
+            return None
+        print(f"Loaded symbol snapshot v{snapshot['version']} with {len(snapshot['constituents'])} symbols from {path}")
+        return snapshot
+
+    def _age(self, snapshot: Dict) -> float:
+        return time.time() - datetime.fromisoformat(snapshot['fetched_at']).timestamp()
+
+    def constituents(self) -> List[Dict[str, str]]:
+        """
+        Current constituents, starting a background refresh if the snapshot is missing or stale
+        """
+        snapshot = self._snapshot
+        if snapshot is None or self._age(snapshot) > self.max_age:
+            self.refresh_in_background()
+        return snapshot['constituents'] if snapshot is not None else DEFAULT_CONSTITUENTS
+
+    def refresh_in_background(self) -> Optional[threading.Thread]:
+        """
+        Start one refresh thread unless one is running or the last attempt failed recently
+        """
+        with self._refresh_lock:
+            if self._refreshing:
+                return None
+            # The monotonic clock may start near zero on a freshly booted host, so never tried is explicit
+            if self._last_attempt is not None and time.monotonic() - self._last_attempt < self.retry_interval:
+                return None
+            self._refreshing = True
+            self._last_attempt = time.monotonic()
+        thread = threading.Thread(target=self._refresh_and_release, name="universe-refresh", daemon=True)
+        thread.start()
+        return thread
+
+    def _refresh_and_release(self):
+        try:
+            self.refresh()
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Error refreshing symbols, keeping the current snapshot: {str(e)}")
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
+
+    def refresh(self) -> Dict:
+        """
+        Fetch the list, write a new snapshot atomically and swap it in
+        """
+        constituents = fetch_sp500_constituents()
+        if len(constituents) < UNIVERSE_MIN_SIZE:
+            raise ValueError(f"Expected at least {UNIVERSE_MIN_SIZE} constituents, got {len(constituents)}")
+
+        current = self._snapshot
+        content_hash = _content_hash(constituents)
+        unchanged = current is not None and current['content_hash'] == content_hash
+        snapshot = {
+            'version': (current['version'] if unchanged else current['version'] + 1) if current else 1,
+            'fetched_at': datetime.now(timezone.utc).isoformat(),
+            'content_hash': content_hash,
+            # Keep the same list object when nothing changed, so indexes built from it stay valid
+            'constituents': current['constituents'] if unchanged else constituents
+        }
+
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.path)
+        self._snapshot = snapshot
+        self.last_error = None
+        print(f"Symbol snapshot v{snapshot['version']} with {len(constituents)} symbols")
+        return snapshot
+
+    def status(self) -> Dict:
+        snapshot = self._snapshot
+        return {
+            "version": snapshot['version'] if snapshot else None,
+            "fetched_at": snapshot['fetched_at'] if snapshot else None,
+            "symbols": len(snapshot['constituents']) if snapshot else 0,
+            "stale": snapshot is None or self._age(snapshot) > self.max_age,
+            "refreshing": self._refreshing,
+            "last_error": self.last_error
+        }
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+def get_universe() -> UniverseStore:
+    """
+    Return the process-wide constituent store
+    """
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = UniverseStore()
+    return _shared_store
@@ -1,53 +1,181 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import List
 from fastapi import FastAPI, Request
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
-from logics.symbols import get_sp500_symbols, get_stock_history, get_stock_info
-from logics.predictor import predict_stock_prices
-from logics.sentiment import SentimentAnalyzer
+from fastapi.responses import JSONResponse, PlainTextResponse
+from logics.symbols import (
+    get_sp500_symbols, get_stock_history, get_stock_info, columns_to_arrow,
+    get_stocks_history_bulk, get_stocks_info_bulk, stock_cache, history_cache_key, info_cache_key
+)
+from logics.predictor import predict_stock_prices, get_cached_prediction, prediction_entry_info
+from logics.symbol_index import get_symbol_index
+from logics.universe import get_universe
+from logics.bar_store import period_start
+from logics.sentiment import get_sentiment_analyzer
+from logics.news import NewsFetchError
+from logics.registry import model_registry, PRELOAD_MODELS, WARMUP_MODELS
+from logics.sentiment_cache import get_sentiment_cache
+from logics.cache import cache_stats
+from logics.metrics import timed, debug_log, render_prometheus, HTTP_REQUEST_SECONDS
+from logics.scheduler import precompute_scheduler, PRECOMPUTE_ENABLED
+from logics.executors import run_io, run_compute, ServerBusyError, CPU_WORKERS, warm_up_cpu_workers, shutdown_executors
+from logics.responses import (
+    json_dumps, entry_validator, is_not_modified, not_modified_response, encoded_response, streaming_response
+)
 
-app = FastAPI()
+if PRELOAD_MODELS:
+    model_registry.preload("finbert")
 
-# Initialize sentiment analyzer
-sentiment_analyzer = SentimentAnalyzer()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if CPU_WORKERS > 0:
+        # Models are used inside the CPU pool workers, which warm up on start
+        warm_up_cpu_workers()
+    elif WARMUP_MODELS and not PRELOAD_MODELS:
+        model_registry.warm_up("finbert")
+    # Load the symbol snapshot from disk, a stale or missing one is refreshed in the background
+    get_universe().constituents()
+    if PRECOMPUTE_ENABLED:
+        precompute_scheduler.start()
+    yield
+    precompute_scheduler.stop()
+    shutdown_executors()
+
+app = FastAPI(lifespan=lifespan)
 
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not the raw path, so each symbol does not add a series
+    route = request.scope.get("route")
+    if route is not None and not route.path.startswith("/static"):
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - start, route=route.path, method=request.method, status=response.status_code
+        )
+    return response
+
+HISTORY_FORMATS = {"rows", "columns", "arrow"}
+BULK_MAX_SYMBOLS = int(os.getenv("BULK_MAX_SYMBOLS", "600"))  # Above the ~503 S&P 500 constituents, so the whole universe fits in one request
+
+def _parse_symbols(symbols: str) -> List[str]:
+    """Split a comma-separated symbol list, dropping blanks and duplicates"""
+    return list(dict.fromkeys(s.strip().upper() for s in symbols.split(",") if s.strip()))
+
+def _period_error(period: str):
+    """400 response for a history period the bar store cannot serve, None when it is supported"""
+    try:
+        period_start(period)
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=400)
+    return None
+
+def _conditional(request: Request, entry_info, variant: str = ""):
+    """
+    Validator of the cache entry behind a response, and a 304 response when the
+    client's copy is still current, answered without recomputing or encoding anything
+    """
+    current = entry_validator(entry_info, variant)
+    if is_not_modified(request, current):
+        return current, not_modified_response(current)
+    return current, None
+
+def _busy_response(e: ServerBusyError) -> JSONResponse:
+    return JSONResponse(
+        {"error": str(e)},
+        status_code=503,
+        headers={"Retry-After": "5"}
+    )
+
+def _news_unavailable_response(e: NewsFetchError) -> JSONResponse:
+    # The news provider failed, a neutral score would silently skew the sentiment and the predictions
+    print(f"ERROR fetching news: {str(e)}")
+    return JSONResponse(
+        {"error": f"News unavailable: {str(e)}"},
+        status_code=502
+    )
+
 @app.get("/")
 async def read_root(request: Request):
-    symbols = get_sp500_symbols()
-    print(f"Number of symbols fetched: {len(symbols)}")
-    print(f"First few symbols: {symbols[:5]}")
+    symbols = await run_io(get_sp500_symbols)
+    debug_log("index.symbols", count=len(symbols))
     return templates.TemplateResponse(
         "index.html", 
         {"request": request, "symbols": symbols}
     )
 
 @app.get("/api/stock/{symbol}")
-async def get_stock_data(symbol: str, period: str = "1mo"):
-    data = get_stock_history(symbol, period)
-    print(f"Historical data for {symbol} ({period}): {data}")  # Debugging log
-    return JSONResponse(data)
+async def get_stock_data(request: Request, symbol: str, period: str = "1mo", format: str = "rows"):
+    """
+    format=rows (default) returns OHLC/volume rows for the charts,
+    format=columns returns parallel arrays and format=arrow an Arrow IPC stream,
+    both of which are much cheaper to encode for long periods.
+    ETag and max-age follow the cached history, If-None-Match is answered with 304.
+    """
+    if format not in HISTORY_FORMATS:
+        return JSONResponse(
+            {"error": f"Unknown format '{format}', expected one of {sorted(HISTORY_FORMATS)}"},
+            status_code=400
+        )
+    period_error = _period_error(period)
+    if period_error is not None:
+        return period_error
+    
+    layout = "rows" if format == "rows" else "columns"
+    cache_key = history_cache_key(symbol, period, layout)
+    current, not_modified = _conditional(request, stock_cache.entry_info(cache_key), format)
+    if not_modified is not None:
+        return not_modified
+    
+    data = await run_io(get_stock_history, symbol, period, layout)
+    debug_log("stock.history", symbol=symbol, period=period, format=format, bars=len(data['dates']))
+    # A history fetched just now was not cached yet when the request came in
+    current = current or entry_validator(stock_cache.entry_info(cache_key), format)
+    if format == "arrow":
+        return encoded_response(
+            request, validator=current, render=lambda: columns_to_arrow(data),
+            media_type="application/vnd.apache.arrow.stream"
+        )
+    return encoded_response(request, data, current)
 
 @app.get("/api/stock/{symbol}/details")
-async def get_stock_details(symbol: str):
-    details = get_stock_info(symbol)
-    print(f"Stock details for {symbol}: {details}")  # Debugging log
-    return JSONResponse(details)
+async def get_stock_details(request: Request, symbol: str):
+    current, not_modified = _conditional(request, stock_cache.entry_info(info_cache_key(symbol)))
+    if not_modified is not None:
+        return not_modified
+    details = await run_io(get_stock_info, symbol)
+    current = current or entry_validator(stock_cache.entry_info(info_cache_key(symbol)))
+    return encoded_response(request, details, current)
 
 @app.get("/api/stock/{symbol}/predict")
-async def get_stock_prediction(symbol: str, period: str = "1w"):
+async def get_stock_prediction(request: Request, symbol: str, period: str = "1w"):
     try:
-        print(f"\n=== Starting prediction request for {symbol} ({period}) ===")
+        precompute_scheduler.record_request(symbol)
+        # Predictions change once a day, a client with the current one gets a 304
+        current, not_modified = _conditional(request, prediction_entry_info(symbol, period))
+        if not_modified is not None:
+            return not_modified
+        
         # Get company info to get the full name
-        company_info = get_stock_info(symbol)
+        company_info = await run_io(get_stock_info, symbol)
         company_name = company_info.get('name', '')
         
-        prediction_data = predict_stock_prices(symbol, company_name, period)
-        print(f"Prediction successful. Response data: {prediction_data}")
-        return JSONResponse(prediction_data)
+        prediction_data = await run_compute(predict_stock_prices, symbol, company_name, period)
+        debug_log("prediction.served", symbol=symbol, period=period, points=len(prediction_data['dates']))
+        current = current or entry_validator(prediction_entry_info(symbol, period))
+        return encoded_response(request, prediction_data, current)
+    except ServerBusyError as e:
+        return _busy_response(e)
+    except NewsFetchError as e:
+        return _news_unavailable_response(e)
     except Exception as e:
         print(f"ERROR in prediction endpoint: {str(e)}")
         return JSONResponse(
@@ -55,25 +183,160 @@ async def get_stock_prediction(symbol: str, period: str = "1w"):
             status_code=500
         )
 
+def _panel_line(panel: str, data=None, error: Exception = None) -> bytes:
+    """
+    One NDJSON line of the dashboard stream, with the same status codes the single-panel endpoints use
+    """
+    if error is None:
+        line = {"panel": panel, "data": data}
+    elif isinstance(error, ServerBusyError):
+        line = {"panel": panel, "error": str(error), "status": 503}
+    elif isinstance(error, NewsFetchError):
+        print(f"ERROR fetching news: {str(error)}")
+        line = {"panel": panel, "error": f"News unavailable: {str(error)}", "status": 502}
+    else:
+        print(f"ERROR in dashboard {panel} panel: {str(error)}")
+        line = {"panel": panel, "error": f"{panel.capitalize()} failed: {str(error)}", "status": 500}
+    with timed("json_encode"):
+        return json_dumps(line) + b"\n"
+
+@app.get("/api/stock/{symbol}/dashboard")
+async def get_stock_dashboard(request: Request, symbol: str, period: str = "1mo"):
+    """
+    Every panel for one symbol (details, history, sentiment, prediction) as an
+    NDJSON stream, one {"panel", "data"} or {"panel", "error", "status"} line per
+    panel in the order they finish, compressed line by line when the client
+    accepts it. Company details are resolved once for all
+    panels. An uncached prediction starts after the sentiment panel, so its
+    sentiment index update reuses the fetched news and FinBERT scores instead
+    of computing them a second time.
+    """
+    precompute_scheduler.record_request(symbol)
+    info_task = asyncio.create_task(run_io(get_stock_info, symbol))
+
+    async def company_name() -> str:
+        return (await info_task).get('name', '')
+
+    async def sentiment_panel():
+        return await run_compute(get_sentiment_analyzer().analyze_company_sentiment, await company_name(), symbol)
+
+    sentiment_task = asyncio.create_task(sentiment_panel())
+
+    async def prediction_panel():
+        cached = get_cached_prediction(symbol, period)
+        if cached is not None:
+            return cached
+        name = await company_name()
+        # Wait for the sentiment panel whatever its outcome, a failure is reported on its own line
+        await asyncio.wait([sentiment_task])
+        return await run_compute(predict_stock_prices, symbol, name, period)
+
+    async def panel(name: str, awaitable) -> bytes:
+        try:
+            return _panel_line(name, data=await awaitable)
+        except Exception as e:
+            return _panel_line(name, error=e)
+
+    tasks = [
+        asyncio.create_task(panel("details", asyncio.shield(info_task))),
+        asyncio.create_task(panel("history", run_io(get_stock_history, symbol, period, "rows"))),
+        asyncio.create_task(panel("sentiment", asyncio.shield(sentiment_task))),
+        asyncio.create_task(panel("prediction", prediction_panel())),
+    ]
+
+    async def stream():
+        try:
+            for finished in asyncio.as_completed(tasks):
+                yield await finished
+        finally:
+            # The client went away, stop waiting for the remaining panels
+            for task in tasks + [info_task, sentiment_task]:
+                task.cancel()
+
+    return streaming_response(request, stream(), media_type="application/x-ndjson")
+
+@app.get("/api/stocks/history")
+async def get_stocks_history(request: Request, symbols: str, period: str = "1mo", format: str = "rows"):
+    """
+    Historical data for a comma-separated list of symbols, keyed by symbol.
+    Missing symbols are downloaded in one batched request.
+    """
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list or len(symbol_list) > BULK_MAX_SYMBOLS:
+        return JSONResponse(
+            {"error": f"Expected between 1 and {BULK_MAX_SYMBOLS} symbols"},
+            status_code=400
+        )
+    if format not in ("rows", "columns"):
+        return JSONResponse({"error": f"Unknown format '{format}', expected 'rows' or 'columns'"}, status_code=400)
+    period_error = _period_error(period)
+    if period_error is not None:
+        return period_error
+    
+    data = await run_io(get_stocks_history_bulk, symbol_list, period, format)
+    return encoded_response(request, data)
+
+@app.get("/api/stocks/details")
+async def get_stocks_details(request: Request, symbols: str):
+    """
+    Company details for a comma-separated list of symbols, keyed by symbol
+    """
+    symbol_list = _parse_symbols(symbols)
+    if not symbol_list or len(symbol_list) > BULK_MAX_SYMBOLS:
+        return JSONResponse(
+            {"error": f"Expected between 1 and {BULK_MAX_SYMBOLS} symbols"},
+            status_code=400
+        )
+    
+    details = await run_io(get_stocks_info_bulk, symbol_list)
+    return encoded_response(request, details)
+
 @app.get("/api/search")
-async def search_symbols(query: str):
-    symbols = get_sp500_symbols()
-    filtered_symbols = [s for s in symbols if query.upper() in s.upper()]
-    return JSONResponse(filtered_symbols)
+async def search_symbols(request: Request, query: str, limit: int = 10):
+    # Ranked matches on ticker, company name and sector from the prebuilt symbol index
+    symbol_index = await run_io(get_symbol_index)
+    return encoded_response(request, symbol_index.search(query, max(1, min(limit, 50))))
 
 @app.get("/api/stock/{symbol}/sentiment")
-async def get_stock_sentiment(symbol: str):
+async def get_stock_sentiment(request: Request, symbol: str):
     try:
         # Get company info to get the full name
-        company_info = get_stock_info(symbol)
+        company_info = await run_io(get_stock_info, symbol)
         company_name = company_info.get('name', '')
         
         # Analyze sentiment
-        sentiment_data = sentiment_analyzer.analyze_company_sentiment(company_name, symbol)
-        return JSONResponse(sentiment_data)
+        sentiment_data = await run_compute(get_sentiment_analyzer().analyze_company_sentiment, company_name, symbol)
+        # Not backed by a versioned cache entry, so compressed but without validators
+        return encoded_response(request, sentiment_data)
+    except ServerBusyError as e:
+        return _busy_response(e)
+    except NewsFetchError as e:
+        return _news_unavailable_response(e)
     except Exception as e:
         print(f"ERROR in sentiment endpoint: {str(e)}")
         return JSONResponse(
             {"error": f"Sentiment analysis failed: {str(e)}"},
             status_code=500
         )
+
+@app.get("/api/sentiment/cache")
+async def get_sentiment_cache_stats():
+    stats = await run_io(get_sentiment_cache().stats)
+    return JSONResponse(stats)
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    return JSONResponse(cache_stats())
+
+@app.get("/api/universe/status")
+async def get_universe_status():
+    return JSONResponse(get_universe().status())
+
+@app.get("/api/precompute/status")
+async def get_precompute_status():
+    return JSONResponse(precompute_scheduler.status())
+
+@app.get("/metrics")
+async def get_metrics():
+    # Prometheus text format: per-stage latency histograms, cache lookups and request latency
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
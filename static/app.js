@@ -236,6 +236,30 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
+    // Aborts the previous dashboard requests when another symbol or period is selected
+    let dashboardController = null;
+    
+    // Symbol/period pairs already shown in this tab, kept across page reloads
+    const VIEWED_KEY = 'viewedDashboards';
+    
+    function viewedDashboards() {
+        try {
+            return new Set(JSON.parse(sessionStorage.getItem(VIEWED_KEY) || '[]'));
+        } catch (error) {
+            return new Set();
+        }
+    }
+    
+    function markViewed(key) {
+        const viewed = viewedDashboards();
+        viewed.add(key);
+        try {
+            sessionStorage.setItem(VIEWED_KEY, JSON.stringify([...viewed]));
+        } catch (error) {
+            // Storage full or disabled, the next view streams the dashboard again
+        }
+    }
+
     async function updateCharts() {
         const symbol = stockSelect.value;
         const period = timeSelect.value;
@@ -245,80 +269,147 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
+        if (dashboardController) {
+            dashboardController.abort();
+        }
+        const controller = new AbortController();
+        dashboardController = controller;
+        
+        const key = `${symbol}:${period}`;
         try {
-            console.log('Fetching data for:', symbol, period);
+            if (viewedDashboards().has(key)) {
+                await loadPanels(symbol, period, controller.signal);
+            } else {
+                await streamDashboard(symbol, period, controller.signal);
+                markViewed(key);
+            }
+        } catch (error) {
+            if (error.name !== 'AbortError') {
+                console.error('Error updating charts:', error);
+            }
+        }
+    }
+    
+    async function streamDashboard(symbol, period, signal) {
+        console.log('Fetching dashboard for:', symbol, period);
+        
+        // One streamed request: each panel arrives as an NDJSON line as soon as it is ready
+        const response = await fetch(`/api/stock/${symbol}/dashboard?period=${period}`, { signal });
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
             
-            // Fetch all data in parallel
-            const [detailsResponse, historicalResponse, predictionResponse, sentimentResponse] = await Promise.all([
-                fetch(`/api/stock/${symbol}/details`),
-                fetch(`/api/stock/${symbol}?period=${period}`),
-                fetch(`/api/stock/${symbol}/predict?period=${period}`),
-                fetch(`/api/stock/${symbol}/sentiment`)
-            ]);
-
-            const [details, historicalData, predictionData, sentimentData] = await Promise.all([
-                detailsResponse.json(),
-                historicalResponse.json(),
-                predictionResponse.json(),
-                sentimentResponse.json()
-            ]);
-
-            console.log('Historical data received:', historicalData);
-            console.log('Prediction data received:', predictionData);
-            console.log('Sentiment data received:', sentimentData);
-
-            // Update stock details
-            updateStockDetails(details);
-            updateSentimentSection(sentimentData);
-
-            // Update historical chart (top)
-            if (historicalData.ohlc && historicalData.ohlc.length > 0) {
-                console.log('Updating historical chart with', historicalData.ohlc.length, 'data points');
-                historicalChart.series[0].setData(historicalData.ohlc, false);
-                historicalChart.series[1].setData(historicalData.volume, true);
-                historicalChart.setTitle({ text: `${symbol} Historical Price`, style: { color: '#fff' } });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) {
+                    renderPanel(JSON.parse(line), symbol, period);
+                }
             }
+            if (done) break;
+        }
+    }
+    
+    async function loadPanels(symbol, period, signal) {
+        console.log('Revalidating panels for:', symbol, period);
+        
+        // The stream carries no validators. The single-panel endpoints send ETags, so the
+        // browser cache revalidates them with If-None-Match and unchanged panels come back
+        // as 304s, or are served from the cache without a request while max-age lasts.
+        const panels = {
+            details: `/api/stock/${symbol}/details`,
+            history: `/api/stock/${symbol}?period=${period}`,
+            prediction: `/api/stock/${symbol}/predict?period=${period}`,
+            sentiment: `/api/stock/${symbol}/sentiment`
+        };
+        await Promise.all(Object.entries(panels).map(async ([panel, url]) => {
+            const response = await fetch(url, { signal });
+            const data = await response.json().catch(() => ({ error: response.statusText }));
+            renderPanel(
+                response.ok ? { panel, data } : { panel, error: data.error, status: response.status },
+                symbol, period
+            );
+        }));
+    }
 
-            // Update prediction chart (middle)
-            if (predictionData.dates && predictionData.dates.length > 0) {
-                console.log('Updating prediction chart with', predictionData.dates.length, 'data points');
-                const predictedPrices = predictionData.dates.map((date, i) => [
-                    new Date(date).getTime(),
-                    predictionData.predicted_prices[i]
-                ]);
-                
-                const confidenceRange = predictionData.dates.map((date, i) => [
-                    new Date(date).getTime(),
-                    predictionData.lower_bound[i],
-                    predictionData.upper_bound[i]
-                ]);
+    function renderPanel(message, symbol, period) {
+        if (message.error) {
+            console.error(`Error loading ${message.panel} panel (${message.status}):`, message.error);
+            return;
+        }
+        console.log(`${message.panel} panel received`);
+        
+        switch (message.panel) {
+            case 'details':
+                updateStockDetails(message.data);
+                break;
+            case 'history':
+                updateHistoricalChart(message.data, symbol);
+                break;
+            case 'prediction':
+                updatePredictionChart(message.data, symbol, period);
+                break;
+            case 'sentiment':
+                updateSentimentSection(message.data);
+                updateSentimentChart(message.data, symbol);
+                break;
+        }
+    }
 
-                predictionChart.series[0].setData(predictedPrices, false);
-                predictionChart.series[1].setData(confidenceRange, true);
-                predictionChart.setTitle({ 
-                    text: `${symbol} Price Prediction (${period.toUpperCase()})`,
-                    style: { color: '#fff' }
-                });
-            }
+    function updateHistoricalChart(historicalData, symbol) {
+        // Update historical chart (top)
+        if (historicalData.ohlc && historicalData.ohlc.length > 0) {
+            console.log('Updating historical chart with', historicalData.ohlc.length, 'data points');
+            historicalChart.series[0].setData(historicalData.ohlc, false);
+            historicalChart.series[1].setData(historicalData.volume, true);
+            historicalChart.setTitle({ text: `${symbol} Historical Price`, style: { color: '#fff' } });
+        }
+    }
 
-            // Update sentiment chart (bottom)
-            if (sentimentData.articles && sentimentData.articles.length > 0) {
-                console.log('Updating sentiment chart with', sentimentData.articles.length, 'data points');
-                const sentimentPoints = sentimentData.articles.map(article => ({
-                    x: new Date(article.published_date || Date.now()).getTime(),
-                    y: article.combined_sentiment_score,
-                    articleDetails: article
-                })).sort((a, b) => a.x - b.x);
+    function updatePredictionChart(predictionData, symbol, period) {
+        // Update prediction chart (middle)
+        if (predictionData.dates && predictionData.dates.length > 0) {
+            console.log('Updating prediction chart with', predictionData.dates.length, 'data points');
+            const predictedPrices = predictionData.dates.map((date, i) => [
+                new Date(date).getTime(),
+                predictionData.predicted_prices[i]
+            ]);
+            
+            const confidenceRange = predictionData.dates.map((date, i) => [
+                new Date(date).getTime(),
+                predictionData.lower_bound[i],
+                predictionData.upper_bound[i]
+            ]);
 
-                sentimentChart.series[0].setData(sentimentPoints);
-                sentimentChart.setTitle({ 
-                    text: `${symbol} Market Sentiment Analysis with News`,
-                    style: { color: '#fff' }
-                });
-            }
+            predictionChart.series[0].setData(predictedPrices, false);
+            predictionChart.series[1].setData(confidenceRange, true);
+            predictionChart.setTitle({ 
+                text: `${symbol} Price Prediction (${period.toUpperCase()})`,
+                style: { color: '#fff' }
+            });
+        }
+    }
 
-        } catch (error) {
-            console.error('Error updating charts:', error);
+    function updateSentimentChart(sentimentData, symbol) {
+        // Update sentiment chart (bottom)
+        if (sentimentData.articles && sentimentData.articles.length > 0) {
+            console.log('Updating sentiment chart with', sentimentData.articles.length, 'data points');
+            const sentimentPoints = sentimentData.articles.map(article => ({
+                x: new Date(article.published_date || Date.now()).getTime(),
+                y: article.combined_sentiment_score,
+                articleDetails: article
+            })).sort((a, b) => a.x - b.x);
+
+            sentimentChart.series[0].setData(sentimentPoints);
+            sentimentChart.setTitle({ 
+                text: `${symbol} Market Sentiment Analysis with News`,
+                style: { color: '#fff' }
+            });
         }
     }
 
@@ -15,16 +15,16 @@ document.addEventListener('DOMContentLoaded', function() {
         const query = e.target.value;
         if (query.length >= 1) {
             const response = await fetch(`/api/search?query=${encodeURIComponent(query)}`);
-            const filteredSymbols = await response.json();
+            const matches = await response.json();
             
             // Clear current options
             symbolSelect.innerHTML = '';
             
-            // Add filtered options
-            filteredSymbols.forEach(symbol => {
+            // Add ranked matches, best first
+            matches.forEach(match => {
                 const option = document.createElement('option');
-                option.value = symbol;
-                option.textContent = symbol;
+                option.value = match.symbol;
+                option.textContent = match.name ? `${match.symbol} - ${match.name}` : match.symbol;
                 symbolSelect.appendChild(option);
             });
         } else {
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+import numpy as np
+import pandas as pd
+import pytest
+
+from logics import bar_store
+from logics.bar_store import BarStore
+
+class FakeTicker:
+    """Serves a fixed set of daily bars the way yfinance does, recording each request"""
+    requests = []
+    bars = None
+    fail = False
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    def history(self, period: str = None, start=None):
+        FakeTicker.requests.append({"period": period, "start": start})
+        if FakeTicker.fail:
+            raise RuntimeError("Too Many Requests. Rate limited.")
+        return slice_bars(FakeTicker.bars, period, start)
+
+def slice_bars(bars: pd.DataFrame, period: str = None, start=None) -> pd.DataFrame:
+    if start is not None:
+        return bars[bars.index.date >= start]
+    return bars[bars.index >= bar_store.period_start(period)]
+
+def fake_download(tickers, period=None, start=None, **kwargs):
+    """Batched download in yfinance's group_by='ticker' layout, unknown tickers are left out"""
+    FakeTicker.requests.append({"tickers": list(tickers), "period": period, "start": start})
+    bars = slice_bars(FakeTicker.bars, period, start)[bar_store.OHLCV_COLUMNS]
+    return pd.concat({ticker: bars for ticker in tickers if ticker != "DELISTED"}, axis=1)
+
+def make_bars(end: pd.Timestamp, days: int = 800) -> pd.DataFrame:
+    index = pd.date_range(end=end, periods=days, freq="D", tz="America/New_York", name="Date").normalize()
+    close = np.linspace(100, 200, days)
+    return pd.DataFrame({
+        "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+        "Volume": np.arange(days), "Dividends": 0.0, "Stock Splits": 0.0
+    }, index=index)
+
+def with_next_bar(bars: pd.DataFrame) -> pd.DataFrame:
+    """The same bars plus one more day, as the provider publishes it"""
+    next_bar = bars.iloc[[-1]].set_axis(bars.index[[-1]] + pd.Timedelta(days=1))
+    return pd.concat([bars, next_bar])
+
+def age(store: BarStore, *symbols: str) -> datetime:
+    stale = datetime.now(timezone.utc) - bar_store.BAR_REFRESH_INTERVAL - timedelta(minutes=1)
+    for symbol in symbols:
+        history, meta = store.load(symbol)
+        store.save(symbol, history, dict(meta, refreshed_at=stale.isoformat()))
+    return stale
+
+def split(bars: pd.DataFrame, ratio: float) -> pd.DataFrame:
+    """The provider's view of the bars after a split, every adjusted price divided by ratio"""
+    prices = ["Open", "High", "Low", "Close"]
+    return bars.assign(**{column: bars[column] / ratio for column in prices})
+
+@pytest.fixture
+def store(monkeypatch, tmp_path):
+    FakeTicker.requests = []
+    FakeTicker.bars = make_bars(pd.Timestamp.now(tz="America/New_York"))
+    FakeTicker.fail = False
+    monkeypatch.setattr(bar_store.yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(bar_store.yf, "download", fake_download)
+    return BarStore(str(tmp_path))
+
+def test_backfills_once_and_slices_periods_locally(store):
+    two_years = store.get_history("AAPL", "2y")
+    one_month = store.get_history("AAPL", "1mo")
+
+    assert FakeTicker.requests == [{"period": "2y", "start": None}]
+    assert one_month.index[0] >= bar_store.period_start("1mo")
+    assert one_month.index[-1] == two_years.index[-1]
+    assert list(one_month.columns) == bar_store.OHLCV_COLUMNS
+
+def test_longer_period_extends_the_backfill(store):
+    store.get_history("AAPL", "1mo")
+    store.get_history("AAPL", "5y")
+    store.get_history("AAPL", "1y")
+
+    assert [r["period"] for r in FakeTicker.requests] == ["2y", "5y"]
+
+def test_refresh_downloads_only_new_bars(store):
+    store.get_history("AAPL", "2y")
+    history, meta = store.load("AAPL")
+
+    # Age the store and publish one more bar upstream
+    age(store, "AAPL")
+    FakeTicker.bars = with_next_bar(FakeTicker.bars)
+
+    refreshed = store.get_history("AAPL", "2y")
+
+    # The last stored bar may be partial, the complete one before it is checked for re-adjustment
+    assert FakeTicker.requests[-1] == {"period": None, "start": history.index[-2].date()}
+    assert len(FakeTicker.requests) == 2
+    assert refreshed.index[-1] == FakeTicker.bars.index[-1]
+    assert not refreshed.index.duplicated().any()
+
+def test_serves_stored_bars_when_provider_fails(store):
+    expected = store.get_history("AAPL", "1mo")
+    history, meta = store.load("AAPL")
+    stale = datetime.now(timezone.utc) - bar_store.BAR_REFRESH_INTERVAL - timedelta(minutes=1)
+    store.save("AAPL", history, dict(meta, refreshed_at=stale.isoformat()))
+    FakeTicker.fail = True
+
+    pd.testing.assert_frame_equal(store.get_history("AAPL", "1mo"), expected)
+
+    with pytest.raises(RuntimeError):
+        store.get_history("MSFT", "1mo")
+
+def test_bulk_downloads_missing_and_stale_symbols_in_batches(store):
+    store.get_history("AAPL", "2y")
+    history, meta = store.load("AAPL")
+    stale = datetime.now(timezone.utc) - bar_store.BAR_REFRESH_INTERVAL - timedelta(minutes=1)
+    store.save("AAPL", history, dict(meta, refreshed_at=stale.isoformat()))
+    FakeTicker.requests = []
+
+    histories = store.get_histories(["AAPL", "MSFT", "NVDA", "DELISTED"], "1mo")
+
+    assert FakeTicker.requests == [
+        {"tickers": ["MSFT", "NVDA", "DELISTED"], "period": "2y", "start": None},
+        {"tickers": ["AAPL"], "period": None, "start": history.index[-2].date()},
+    ]
+    assert set(histories) == {"AAPL", "MSFT", "NVDA"}
+    pd.testing.assert_frame_equal(histories["MSFT"], store.get_history("MSFT", "1mo"))
+    assert len(FakeTicker.requests) == 2
+
+def test_bulk_refresh_marks_symbols_without_new_bars_as_checked(store):
+    store.get_history("AAPL", "2y")
+    store.get_history("DELISTED", "2y")
+    stale = datetime.now(timezone.utc) - bar_store.BAR_REFRESH_INTERVAL - timedelta(minutes=1)
+    for symbol in ["AAPL", "DELISTED"]:
+        history, meta = store.load(symbol)
+        store.save(symbol, history, dict(meta, refreshed_at=stale.isoformat()))
+    FakeTicker.requests = []
+
+    # The batched download returns nothing for DELISTED
+    histories = store.get_histories(["AAPL", "DELISTED"], "1mo")
+    assert [r["tickers"] for r in FakeTicker.requests] == [["AAPL", "DELISTED"]]
+    assert set(histories) == {"AAPL", "DELISTED"}
+    assert datetime.fromisoformat(store.load("DELISTED")[1]["refreshed_at"]) > stale
+
+    # Neither symbol is downloaded again until the refresh interval has passed
+    store.get_histories(["AAPL", "DELISTED"], "1mo")
+    assert len(FakeTicker.requests) == 1
+
+def test_split_upstream_downloads_the_stored_range_again(store):
+    history = store.get_history("AAPL", "2y")
+    age(store, "AAPL")
+    FakeTicker.bars = with_next_bar(split(FakeTicker.bars, 4))
+
+    refreshed = store.get_history("AAPL", "2y")
+
+    assert FakeTicker.requests[-1] == {"period": None, "start": history.index[0].date()}
+    # Old and new bars share one adjustment, no jump where the split happened
+    assert np.allclose(refreshed["Close"].to_numpy(), FakeTicker.bars.loc[refreshed.index, "Close"].to_numpy())
+    assert refreshed.index[-1] == FakeTicker.bars.index[-1]
+
+def test_bulk_refresh_downloads_re_adjusted_symbols_again(store):
+    aapl = store.get_history("AAPL", "2y")
+    store.get_history("MSFT", "2y")
+    age(store, "AAPL", "MSFT")
+    FakeTicker.bars = with_next_bar(split(FakeTicker.bars, 4))
+    FakeTicker.requests = []
+
+    # Both symbols see the split in the fakes, and are downloaded again in one batch
+    histories = store.get_histories(["AAPL", "MSFT"], "2y")
+
+    assert FakeTicker.requests[-1] == {"tickers": ["AAPL", "MSFT"], "period": None, "start": aapl.index[0].date()}
+    for history in histories.values():
+        assert np.allclose(history["Close"].to_numpy(), FakeTicker.bars.loc[history.index, "Close"].to_numpy())
+    assert len(store.get_histories(["AAPL", "MSFT"], "2y")) == 2
+    assert len(FakeTicker.requests) == 2
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,96 @@
+import threading
+import numpy as np
+import pandas as pd
+import pytest
+
+from logics import cache as cache_module
+from logics.cache import BoundedCache, cache_stats, estimate_size
+
+def test_lru_entries_are_evicted_past_the_byte_budget():
+    cache = BoundedCache("test_lru", max_bytes=300, sizeof=lambda value: 100)
+    cache["a"], cache["b"], cache["c"] = 1, 2, 3
+    assert cache["a"] == 1  # "a" is now the most recently used
+
+    cache["d"] = 4
+
+    assert "b" not in cache
+    assert set(cache) == {"a", "c", "d"}
+    assert cache.stats()["bytes"] == 300
+    assert cache.stats()["evictions"] == 1
+
+def test_values_larger_than_the_budget_are_not_cached():
+    cache = BoundedCache("test_oversized", max_bytes=1000)
+    cache["big"] = np.zeros(1000)
+    assert "big" not in cache
+    assert cache.stats()["bytes"] == 0
+
+def test_expired_entries_are_dropped(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = BoundedCache("test_ttl", max_bytes=10_000, ttl=60)
+    cache["a"] = "value"
+    cache.set("b", "value", ttl=600)
+
+    now[0] += 61
+    assert cache.get("a") is None
+    assert cache.get("b") == "value"
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1, 1)
+
+def test_entry_info_reports_version_and_remaining_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = BoundedCache("test_entry_info", max_bytes=10_000, ttl=60)
+    assert cache.entry_info("a") is None
+
+    cache["a"] = "value"
+    now[0] += 15
+    version, remaining = cache.entry_info("a")
+    assert remaining == 45
+    assert cache.entry_info("a")[0] == version
+    cache["a"] = "new value"
+    assert cache.entry_info("a")[0] != version
+    assert cache.stats()["hits"] == 0
+
+    now[0] += 61
+    assert cache.entry_info("a") is None
+
+def test_sweep_releases_expired_entries_without_access(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = BoundedCache("test_sweep", max_bytes=10_000, ttl=1)
+    for i in range(10):
+        cache[i] = i
+
+    now[0] += cache_module.SWEEP_INTERVAL
+    cache["new"] = 0
+
+    assert len(cache) == 1
+
+def test_dataframe_size_counts_its_buffers():
+    df = pd.DataFrame({"y": np.zeros(10_000)})
+    assert estimate_size(df) >= 80_000
+    assert estimate_size({"prices": [1.0] * 1000}) > 8_000
+
+def test_concurrent_writers_stay_within_budget():
+    cache = BoundedCache("test_threads", max_bytes=5_000, sizeof=lambda value: 100)
+
+    def writer(offset):
+        for i in range(1000):
+            cache[(offset, i)] = i
+            cache.get((offset, i - 1))
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["bytes"] == len(cache) * 100 <= 5_000
+    assert stats["evictions"] == 8000 - len(cache)
+    assert "test_threads" in cache_stats()
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,31 @@
+import os
+
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import threading
+import time
+import pytest
+
+from logics.executors import IO_WORKERS, run_compute, run_io
+
+def test_handlers_waiting_on_cpu_work_leave_the_io_pool_free():
+    release = threading.Event()
+
+    async def burst():
+        # More waiting predictions than there are I/O threads
+        waiting = [asyncio.create_task(run_compute(release.wait, 10)) for _ in range(IO_WORKERS)]
+        await asyncio.sleep(0.1)
+        start = time.perf_counter()
+        assert await run_io(lambda: "details") == "details"
+        elapsed = time.perf_counter() - start
+        release.set()
+        assert all(await asyncio.gather(*waiting))
+        return elapsed
+
+    assert asyncio.run(burst()) < 1
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
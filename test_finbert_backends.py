@@ -0,0 +1,54 @@
+import os
+import tempfile
+
+# Run CPU work inline and export ONNX models to a scratch directory
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ.setdefault("ONNX_MODEL_DIR", tempfile.mkdtemp())
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import pytest
+
+from logics.finbert_backends import check_parity, load_backend
+from logics.registry import FINBERT_MODEL_ID
+from logics.sentiment import score_texts
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "fixtures", "finbert_corpus.txt")
+
+# Minimum label agreement and maximum per-class probability difference against fp32
+TOLERANCES = {
+    "torch-int8": (0.9, 0.1),
+    "onnx": (1.0, 1e-4),
+}
+
+@pytest.fixture(scope="module")
+def corpus():
+    with open(CORPUS_PATH) as f:
+        return [line.strip() for line in f if line.strip()]
+
+@pytest.fixture(scope="module")
+def reference(corpus):
+    return score_texts(corpus, finbert=load_backend("torch", FINBERT_MODEL_ID))
+
+@pytest.mark.parametrize("backend", sorted(TOLERANCES))
+def test_backend_matches_fp32(backend, corpus, reference):
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    results = score_texts(corpus, finbert=load_backend(backend, FINBERT_MODEL_ID))
+
+    parity = check_parity(reference, results)
+    min_agreement, max_diff = TOLERANCES[backend]
+    assert parity["label_agreement"] >= min_agreement
+    assert parity["max_score_diff"] <= max_diff
+
+def test_batching_does_not_change_scores(corpus, reference):
+    finbert = load_backend("torch", FINBERT_MODEL_ID)
+    one_by_one = [score_texts([text], finbert=finbert)[0] for text in corpus]
+    assert check_parity(reference, one_by_one)["max_score_diff"] < 1e-5
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError):
+        load_backend("tensorrt", FINBERT_MODEL_ID)
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
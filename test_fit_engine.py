@@ -0,0 +1,98 @@
+import os
+
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+from logics import fit_engine, model_store, predictor, scheduler
+from logics.fit_engine import FitEngine
+from logics.threads import THREAD_ENV_VARS, limit_threads
+
+def training_data(seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ds = pd.date_range("2023-01-02", periods=300, freq="B")
+    y = 150 + rng.standard_normal(len(ds)).cumsum()
+    return pd.DataFrame({"ds": ds, "y": y, "sentiment": np.clip(rng.normal(0.1, 0.3, len(ds)), -1, 1)})
+
+FRAMES = {"AAA": training_data(1), "BBB": training_data(2)}
+
+@pytest.fixture(autouse=True)
+def isolated_stores(monkeypatch, tmp_path):
+    monkeypatch.setattr(model_store, "_shared_store", model_store.ModelStore(str(tmp_path / "models")))
+    predictor._forecast_cache.clear()
+    predictor._prediction_cache.clear()
+    predictor._data_cache.clear()
+    yield
+    predictor._forecast_cache.clear()
+    predictor._prediction_cache.clear()
+    predictor._data_cache.clear()
+
+def test_limit_threads_pins_every_pool(monkeypatch):
+    for name in THREAD_ENV_VARS:
+        monkeypatch.setenv(name, "8")
+    torch = sys.modules.get("torch")
+    torch_threads = torch.get_num_threads() if torch is not None else None
+    try:
+        limit_threads(0)
+        assert all(os.environ[name] == "8" for name in THREAD_ENV_VARS)
+        limit_threads(2)
+        assert all(os.environ[name] == "2" for name in THREAD_ENV_VARS)
+        if torch is not None:
+            assert torch.get_num_threads() == 2
+    finally:
+        if torch is not None:
+            torch.set_num_threads(torch_threads)
+
+def test_pool_streams_forecasts_from_pinned_workers():
+    engine = FitEngine(workers=1, threads_per_worker=1, prepare_workers=2)
+    try:
+        engine.warm_up()
+        assert engine._get_pool().submit(os.getenv, "OMP_NUM_THREADS").result() == "1"
+
+        # An unknown symbol fails on its own, the others still stream back
+        results = {r["symbol"]: r for r in engine.forecast_symbols(["AAA", "ZZZ", "BBB"], prepare=FRAMES.__getitem__)}
+        assert set(results) == {"AAA", "BBB", "ZZZ"}
+        assert isinstance(results["ZZZ"]["error"], KeyError)
+        for symbol in FRAMES:
+            assert results[symbol]["error"] is None
+            assert results[symbol]["source"] == "fit"
+            assert len(results[symbol]["forecast"]) == predictor.MAX_FORECAST_DAYS
+            # The forecast lands where request-driven predictions look for it
+            assert predictor.get_forecast(symbol, FRAMES[symbol]) is results[symbol]["forecast"]
+
+        # Known data is served from the forecast cache, then from the stored model
+        assert [r["source"] for r in engine.forecast_symbols(["AAA"], prepare=FRAMES.__getitem__)] == ["cache"]
+        predictor._forecast_cache.clear()
+        assert [r["source"] for r in engine.forecast_symbols(["AAA"], prepare=FRAMES.__getitem__)] == ["stored"]
+    finally:
+        engine.close()
+
+def test_scheduler_precomputes_every_period_through_the_engine(monkeypatch):
+    fake_info = lambda symbol: {"name": f"{symbol} Inc."}
+    fake_prepare = lambda symbol, company_name: FRAMES[symbol]
+    monkeypatch.setattr(fit_engine, "get_stock_info", fake_info)
+    monkeypatch.setattr(fit_engine, "prepare_data_for_prophet", fake_prepare)
+    monkeypatch.setattr(scheduler, "get_stock_info", fake_info)
+    monkeypatch.setattr(predictor, "prepare_data_for_prophet", fake_prepare)
+
+    precompute = scheduler.PrecomputeScheduler(periods=["1w", "1mo"], concurrency=1)
+    precompute._engine = FitEngine(workers=0)
+    precompute.request_counts["BBB"] = 3
+    try:
+        precompute.run_cycle(["AAA", "BBB", "ZZZ"])
+    finally:
+        precompute.stop()
+
+    status = precompute.status()
+    assert (status["completed"], status["failed"], status["in_progress"], status["queue_depth"]) == (2, 1, [], 0)
+    for symbol in FRAMES:
+        assert len(predictor.get_cached_prediction(symbol, "1w")["dates"]) == 7
+        assert len(predictor.get_cached_prediction(symbol, "1mo")["dates"]) == 30
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
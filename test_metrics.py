@@ -0,0 +1,113 @@
+import os
+import tempfile
+
+# Run CPU work inline and keep the sentiment cache out of the real cache directory
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ["SENTIMENT_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "sentiment.sqlite")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import json
+import httpx
+import pytest
+
+import main
+from logics import metrics
+from logics.cache import BoundedCache
+from logics.metrics import Counter, Histogram, STAGE_ERRORS, STAGE_SECONDS, capture, replay, timed
+
+@pytest.fixture(autouse=True)
+def clean_metrics():
+    metrics.reset()
+    yield
+    metrics.reset()
+
+def test_timed_records_latency_and_errors():
+    with timed("unit"):
+        pass
+    with pytest.raises(ValueError):
+        with timed("unit"):
+            raise ValueError("boom")
+
+    snapshot = STAGE_SECONDS.snapshot(stage="unit")
+    assert snapshot["count"] == 2
+    assert snapshot["buckets"][float("inf")] == 2
+    assert STAGE_ERRORS.value(stage="unit") == 1
+
+def test_timed_works_as_a_decorator():
+    @timed("decorated")
+    def work(x):
+        return x * 2
+
+    assert work(21) == 42
+    assert STAGE_SECONDS.snapshot(stage="decorated")["count"] == 1
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("test_bucket_seconds", "test", buckets=(0.1, 1))
+    for value in (0.05, 0.1, 0.5, 5):
+        histogram.observe(value)
+
+    snapshot = histogram.snapshot()
+    assert snapshot["buckets"] == {0.1: 2, 1: 3, float("inf"): 4}
+    assert snapshot["sum"] == pytest.approx(5.65)
+
+def test_prometheus_rendering():
+    counter = Counter("test_render_total", "Rendered counter")
+    counter.inc(3, cache='we"ird')
+    STAGE_SECONDS.observe(0.2, stage="render")
+
+    text = metrics.render_prometheus()
+    assert "# TYPE test_render_total counter" in text
+    assert 'test_render_total{cache="we\\"ird"} 3' in text
+    assert 'rtsp_stage_seconds_bucket{stage="render",le="0.25"} 1' in text
+    assert 'rtsp_stage_seconds_bucket{stage="render",le="+Inf"} 1' in text
+    assert 'rtsp_stage_seconds_count{stage="render"} 1' in text
+
+def test_captured_observations_are_replayed():
+    def worker():
+        with timed("in_worker"):
+            return "done"
+
+    result, observations = capture(worker)
+    # Nothing is recorded in the capturing process, the parent replays it
+    assert STAGE_SECONDS.snapshot(stage="in_worker") is None
+    assert result == "done" and len(observations) == 1
+
+    replay(observations)
+    assert STAGE_SECONDS.snapshot(stage="in_worker")["count"] == 1
+
+def test_bounded_cache_lookups_are_exported():
+    cache = BoundedCache("test_exported", max_bytes=1000)
+    cache["a"] = 1
+    cache.get("a")
+    cache.get("b")
+
+    text = metrics.render_prometheus()
+    assert 'rtsp_cache_lookups_total{cache="test_exported",result="hit"} 1' in text
+    assert 'rtsp_cache_lookups_total{cache="test_exported",result="miss"} 1' in text
+    assert 'rtsp_cache_entries{cache="test_exported"} 1' in text
+
+def test_debug_log_is_off_by_default(capsys, monkeypatch):
+    metrics.debug_log("quiet", value=1)
+    assert capsys.readouterr().out == ""
+
+    monkeypatch.setattr(metrics, "DEBUG_LOG_SAMPLE_RATE", 1.0)
+    metrics.debug_log("loud", value=1)
+    event = json.loads(capsys.readouterr().out)
+    assert (event["event"], event["value"]) == ("loud", 1)
+
+def test_metrics_endpoint_reports_request_latency():
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.get("/api/cache/stats")
+            return await client.get("/metrics")
+
+    response = asyncio.run(scenario())
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'rtsp_http_request_seconds_count{method="GET",route="/api/cache/stats",status="200"} 1' in response.text
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
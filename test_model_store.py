@@ -0,0 +1,70 @@
+import os
+
+# Run CPU work inline
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from collections import Counter
+import numpy as np
+import pandas as pd
+import pytest
+
+from logics import model_store, predictor
+
+calls = Counter()
+
+def training_data(days: int) -> pd.DataFrame:
+    ds = pd.date_range("2023-01-02", periods=days, freq="B")
+    y = 150 + np.random.default_rng(0).standard_normal(days).cumsum()
+    return pd.DataFrame({"ds": ds, "y": y, "sentiment": 0.2})
+
+real_fit_and_forecast = predictor._fit_and_forecast
+
+def counting_fit_and_forecast(pandas_df, forecast_days, init_model_json=None):
+    calls["warm" if init_model_json is not None else "cold"] += 1
+    return real_fit_and_forecast(pandas_df, forecast_days, init_model_json)
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch, tmp_path):
+    calls.clear()
+    predictor._forecast_cache.clear()
+    store = model_store.ModelStore(str(tmp_path), keep=2)
+    monkeypatch.setattr(model_store, "_shared_store", store)
+    monkeypatch.setattr(predictor, "_fit_and_forecast", counting_fit_and_forecast)
+    return store
+
+def test_stored_model_is_reused_after_restart():
+    df = training_data(300)
+    first = predictor.get_forecast("AAPL", df)
+
+    # A restarted process has an empty forecast cache but the model is on disk
+    predictor._forecast_cache.clear()
+    second = predictor.get_forecast("AAPL", df)
+
+    assert calls == Counter({"cold": 1})
+    pd.testing.assert_series_equal(first['ds'], second['ds'])
+    np.testing.assert_allclose(first['yhat'], second['yhat'])
+
+def test_new_data_version_warm_starts_from_previous_fit(store):
+    predictor.get_forecast("AAPL", training_data(300))
+    forecast = predictor.get_forecast("AAPL", training_data(305))
+
+    assert calls == Counter({"cold": 1, "warm": 1})
+    assert len(forecast) == predictor.MAX_FORECAST_DAYS
+
+    # Only the newest versions are kept
+    predictor.get_forecast("AAPL", training_data(310))
+    assert len(store._versions("AAPL", predictor.CONFIG_VERSION)) == 2
+
+def test_model_key_includes_config():
+    df = training_data(300)
+    predictor.get_forecast("AAPL", df)
+    store = model_store.get_model_store()
+
+    assert store.load("AAPL", predictor.CONFIG_VERSION, predictor._data_version(df)) is not None
+    assert store.load("AAPL", "other-config", predictor._data_version(df)) is None
+    assert store.latest("AAPL", "other-config") is None
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,179 @@
+import os
+
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+
+from logics.news import NewsFeeder, NewsFetchError, ResponseCache
+
+ARTICLE = {"title": "Apple beats estimates", "url": "https://example.com/a", "content": "Shares rose.",
+           "published_date": "2025-01-01", "source": "example", "score": 0.9}
+
+class MockTavily:
+    """
+    Local stand-in for the Tavily search endpoint. Replies with the scripted
+    status codes in order, then 200, and records every request.
+    """
+    def __init__(self):
+        self.statuses = []
+        self.retry_after = None
+        self.delay = 0.0
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with mock.lock:
+                    mock.requests.append(body)
+                    mock.active += 1
+                    mock.max_active = max(mock.max_active, mock.active)
+                    status = mock.statuses.pop(0) if mock.statuses else 200
+                time.sleep(mock.delay)
+                with mock.lock:
+                    mock.active -= 1
+                response = json.dumps({"results": [ARTICLE]} if status == 200 else {"error": "nope"}).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if status != 200 and mock.retry_after is not None:
+                    self.send_header("Retry-After", mock.retry_after)
+                self.send_header("Content-Length", str(len(response)))
+                self.end_headers()
+                self.wfile.write(response)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/search"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+@pytest.fixture
+def tavily():
+    mock = MockTavily()
+    yield mock
+    mock.server.shutdown()
+
+@pytest.fixture
+def feeder(tavily, tmp_path):
+    feeder = NewsFeeder(api_url=tavily.url, cache=ResponseCache(str(tmp_path)), timeout=2, max_concurrency=2, backoff=0.01)
+    yield feeder
+    feeder.close()
+
+def test_retries_rate_limits_and_server_errors(tavily, feeder):
+    tavily.statuses = [429, 503]
+
+    articles = feeder.fetch_company_news("Apple Inc.", "AAPL")
+
+    assert [a["title"] for a in articles] == ["Apple beats estimates"]
+    assert len(tavily.requests) == 3
+
+def test_repeated_lookups_are_served_from_the_cache(tavily, feeder, tmp_path):
+    feeder.fetch_company_news("Apple Inc.", "AAPL")
+    feeder.fetch_company_news("Apple Inc.", "AAPL")
+    # A new client, e.g. after a restart, reads the same on-disk cache
+    other = NewsFeeder(api_url=tavily.url, cache=ResponseCache(str(tmp_path)))
+    other.fetch_company_news("Apple Inc.", "AAPL")
+    other.close()
+
+    assert len(tavily.requests) == 1
+
+    feeder.fetch_company_news("Microsoft", "MSFT")
+    assert len(tavily.requests) == 2
+
+def test_expired_responses_are_fetched_again(tavily, feeder):
+    feeder.cache.ttl = 0
+    feeder.fetch_company_news("Apple Inc.", "AAPL")
+    feeder.fetch_company_news("Apple Inc.", "AAPL")
+
+    assert len(tavily.requests) == 2
+
+def test_client_errors_are_raised_without_retrying(tavily, feeder):
+    tavily.statuses = [401]
+
+    with pytest.raises(NewsFetchError):
+        feeder.fetch_company_news("Apple Inc.", "AAPL")
+    assert len(tavily.requests) == 1
+
+def test_persistent_failures_raise_after_the_last_retry(tavily, feeder):
+    tavily.statuses = [500] * 10
+
+    with pytest.raises(NewsFetchError):
+        feeder.fetch_company_news("Apple Inc.", "AAPL")
+    assert len(tavily.requests) == feeder.max_retries + 1
+
+    # Failures are not cached
+    tavily.statuses = []
+    assert feeder.fetch_company_news("Apple Inc.", "AAPL")
+
+def test_timeouts_are_retried(tavily, tmp_path):
+    tavily.delay = 0.5
+    feeder = NewsFeeder(api_url=tavily.url, cache=ResponseCache(str(tmp_path)), timeout=0.1, max_retries=1, backoff=0.01)
+
+    with pytest.raises(NewsFetchError):
+        feeder.fetch_company_news("Apple Inc.", "AAPL")
+    feeder.close()
+
+    time.sleep(0.5)  # Let the abandoned requests finish
+    assert len(tavily.requests) == 2
+
+def test_concurrency_is_bounded(tavily, feeder):
+    tavily.delay = 0.1
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(lambda i: feeder.fetch_company_news("Company", f"T{i}"), range(8)))
+
+    assert all(results)
+    assert len(tavily.requests) == 8
+    assert tavily.max_active <= 2
+
+def test_identical_searches_in_flight_share_one_request(tavily, feeder):
+    tavily.delay = 0.2
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        results = list(pool.map(lambda i: feeder.fetch_company_news("Company", f"T{i % 2}"), range(6)))
+
+    assert all(results)
+    assert len(tavily.requests) == 2
+    assert feeder._in_flight == {}
+
+def test_long_retry_after_fails_instead_of_blocking(tavily, feeder):
+    tavily.statuses = [429]
+    tavily.retry_after = "3600"
+    feeder.max_retry_delay = 1
+
+    start = time.perf_counter()
+    with pytest.raises(NewsFetchError, match="retry after 3600s"):
+        feeder.fetch_company_news("Apple Inc.", "AAPL")
+    assert time.perf_counter() - start < 1
+    assert len(tavily.requests) == 1
+
+def test_waiting_to_retry_does_not_hold_a_slot(tavily, tmp_path):
+    tavily.statuses = [503]
+    feeder = NewsFeeder(api_url=tavily.url, cache=ResponseCache(str(tmp_path)), timeout=2, max_concurrency=1, backoff=0.5)
+
+    def timed_fetch(ticker):
+        start = time.perf_counter()
+        feeder.fetch_company_news("Company", ticker)
+        return time.perf_counter() - start
+
+    try:
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            durations = sorted(pool.map(timed_fetch, ["T1", "T2"]))
+    finally:
+        feeder.close()
+
+    # The other search goes ahead while the failed one waits out its backoff
+    assert durations[0] < 0.4
+    assert durations[1] >= 0.5
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
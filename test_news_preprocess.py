@@ -0,0 +1,94 @@
+import os
+
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import pytest
+
+from logics.news_preprocess import canonical_url, chunk_text, dedupe_articles, plan_texts, strip_repeated_title
+from logics.registry import model_registry
+from logics.sentiment import SentimentAnalyzer
+
+BODY = (
+    "Apple reported record services revenue for the quarter, while iPhone sales were roughly flat "
+    "compared with a year earlier. The company guided to low single digit growth for the holiday quarter. "
+)
+
+def article(url: str, title: str, content: str) -> dict:
+    return {"url": url, "title": title, "content": content, "published_date": "", "source": "", "score": 1.0}
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return model_registry.get("finbert_tokenizer")
+
+def test_tracking_parameters_do_not_change_the_url():
+    assert canonical_url("https://www.example.com/story/?utm_source=x&id=7") == canonical_url("http://example.com/story?id=7")
+    assert canonical_url("https://example.com/story?id=7") != canonical_url("https://example.com/story?id=8")
+
+def test_duplicates_by_url_and_near_duplicate_content_are_dropped():
+    articles = [
+        article("https://example.com/a", "Apple services hit a record", BODY),
+        article("https://example.com/a?utm_medium=rss", "Apple services hit a record", BODY),
+        # Syndicated copy with a different URL and a slightly edited ending
+        article("https://other.com/b", "Apple services hit a record", BODY.replace("holiday quarter", "holiday season")),
+        article("https://example.com/c", "Tesla cuts prices again", "Tesla lowered prices across its lineup in China."),
+    ]
+
+    unique = dedupe_articles(articles)
+
+    assert [a["url"] for a in unique] == ["https://example.com/a", "https://example.com/c"]
+
+def test_title_repeated_in_body_is_removed():
+    assert strip_repeated_title("Apple beats estimates", "Apple beats estimates. Shares rose 3%.") == "Shares rose 3%."
+    assert strip_repeated_title("Apple beats estimates", "Shares rose 3%.") == "Shares rose 3%."
+
+def test_long_bodies_are_chunked_into_token_windows(tokenizer):
+    chunks = chunk_text(tokenizer, BODY * 10, window=32)
+
+    assert len(chunks) > 1
+    assert all(tokens <= 32 for _, tokens in chunks)
+    assert sum(tokens for _, tokens in chunks) == len(tokenizer(BODY * 10, add_special_tokens=False)["input_ids"])
+
+def test_token_budget_bounds_the_scored_texts(tokenizer):
+    articles = [article(f"https://example.com/{i}", f"Headline number {i}", BODY * 5) for i in range(10)]
+
+    plans, used = plan_texts(articles, tokenizer, token_budget=400, window=64, max_chunks=4)
+
+    assert used <= 400
+    # Every article gets its title before any article gets a second body window
+    assert len(plans) == 10
+    assert max(len(plan["chunks"]) for plan in plans) - min(len(plan["chunks"]) for plan in plans) <= 1
+
+    plans, used = plan_texts(articles, tokenizer, token_budget=100_000, window=64, max_chunks=4)
+    expected_chunks = min(4, len(chunk_text(tokenizer, BODY * 5, window=64)))
+    assert all(len(plan["chunks"]) == expected_chunks for plan in plans)
+
+def test_untitled_articles_without_a_body_window_are_left_out(tokenizer):
+    titled = [article(f"https://example.com/{i}", f"Headline number {i}", BODY * 5) for i in range(3)]
+    untitled = [article(f"https://example.com/untitled/{i}", "", BODY * 5) for i in range(5)]
+
+    plans, used = plan_texts(titled + untitled, tokenizer, token_budget=100, window=64, max_chunks=4)
+
+    assert used <= 100
+    assert all(plan["title"] is not None or plan["chunks"] for plan in plans)
+    assert len(plans) < len(titled + untitled)
+
+def test_articles_with_one_scored_part_report_it_for_both(tokenizer, monkeypatch):
+    def fake_scores(self, texts, batch_size=16):
+        return [{"sentiment": "positive", "score": 0.5 + len(text) / 1000, "scores": {"negative": 0.1, "neutral": 0.2, "positive": 0.7}} for text in texts]
+    monkeypatch.setattr(SentimentAnalyzer, "analyze_texts", fake_scores)
+    articles = [
+        # The body only repeats the title, so nothing is left to score after stripping it
+        article("https://example.com/same", "Apple beats estimates", "Apple beats estimates"),
+        article("https://example.com/untitled", "", BODY),
+    ]
+
+    analyzed, _ = SentimentAnalyzer().analyze_articles(articles)
+
+    repeated, untitled = analyzed
+    assert repeated["content_chunks"] == 0
+    assert repeated["content_sentiment"] == repeated["title_sentiment"] is not None
+    assert untitled["content_chunks"] == 1
+    assert untitled["title_sentiment"] == untitled["content_sentiment"] is not None
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,56 @@
+import os
+import sys
+
+os.environ.setdefault("TAVILY_API_KEY", "test")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+
+import pandas as pd
+import pytest
+
+import replay
+from logics.news import NewsFeeder, NewsFetchError, ResponseCache
+
+@pytest.fixture(scope="module")
+def fixtures():
+    return replay.Fixtures(now=pd.Timestamp("2026-03-18 12:00", tz=replay.TIMEZONE))
+
+@pytest.fixture
+def tavily(fixtures):
+    server = replay.ReplayTavily(fixtures)
+    yield server
+    server.close()
+
+def test_fixtures_are_shifted_to_the_current_week(fixtures):
+    assert fixtures.symbols == ["AAPL", "MSFT", "NVDA"]
+    last_bar = max(history.index[-1] for history in fixtures.histories.values())
+    assert pd.Timestamp("2026-03-11", tz=replay.TIMEZONE) < last_bar <= pd.Timestamp("2026-03-18", tz=replay.TIMEZONE)
+    # Whole weeks keep every bar on a weekday
+    assert all((history.index.dayofweek < 5).all() for history in fixtures.histories.values())
+
+    published = pd.to_datetime([a["published_date"] for a in fixtures.news["AAPL"]["results"]], utc=True)
+    assert published.max() <= pd.Timestamp("2026-03-19", tz="UTC")
+
+def test_replay_ticker_slices_history(fixtures, monkeypatch):
+    monkeypatch.setattr(replay.ReplayTicker, "fixtures", fixtures)
+    ticker = replay.ReplayTicker("MSFT")
+    full = ticker.history(period="max")
+    since = full.index[-5]
+
+    assert len(ticker.history(start=since.date())) == 5
+    assert list(full.columns) == ["Open", "High", "Low", "Close", "Volume"]
+    assert ticker.info["shortName"]
+    with pytest.raises(ValueError):
+        replay.ReplayTicker("ZZZZ")
+
+def test_replay_tavily_answers_the_news_client(fixtures, tavily, tmp_path):
+    feeder = NewsFeeder(api_url=tavily.url, cache=ResponseCache(str(tmp_path)), timeout=2, backoff=0.01)
+    try:
+        articles = feeder.fetch_company_news("NVDA Holdings Inc.", "NVDA")
+        assert [a["url"] for a in articles] == [a["url"] for a in fixtures.news["NVDA"]["results"]]
+        with pytest.raises(NewsFetchError):
+            feeder.fetch_company_news("Unknown Corp", "ZZZZ")
+    finally:
+        feeder.close()
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,150 @@
+import os
+
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import gzip
+import json
+import zlib
+from collections import Counter
+import httpx
+import pytest
+from starlette.requests import Request
+
+import main
+from logics import predictor, responses, symbols, universe
+from logics.responses import choose_encoding, entry_validator, is_not_modified, streaming_response
+
+HISTORY = {
+    "dates": [f"2025-01-{day:02d}" for day in range(1, 29)],
+    "ohlc": [[1735689600000 + day * 86400000, 100.0 + day, 101.0 + day, 99.0 + day, 100.5 + day] for day in range(28)],
+    "volume": [1_000_000 + day for day in range(28)]
+}
+PREDICTION = {"dates": ["2025-02-03"], "predicted_prices": [101.5], "lower_bound": [99.0], "upper_bound": [104.0]}
+
+calls = Counter()
+
+@pytest.fixture(autouse=True)
+def cached_entries(monkeypatch):
+    calls.clear()
+    symbols.stock_cache.clear()
+    predictor._prediction_cache.clear()
+    responses._bodies.clear()
+
+    def fake_history(symbol, period="1mo", layout="rows"):
+        calls["history"] += 1
+        cache_key = symbols.history_cache_key(symbol, period, layout)
+        if cache_key not in symbols.stock_cache:
+            symbols.stock_cache.set(cache_key, HISTORY, ttl=symbols.HISTORY_CACHE_TTL)
+        return symbols.stock_cache[cache_key]
+    monkeypatch.setattr(main, "get_stock_history", fake_history)
+    yield
+    symbols.stock_cache.clear()
+    predictor._prediction_cache.clear()
+
+def get(path: str, headers: dict = None) -> httpx.Response:
+    async def request():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(path, headers=headers)
+    return asyncio.run(request())
+
+def test_history_revalidation_is_answered_without_recomputing():
+    first = get("/api/stock/AAPL?period=1mo", {"Accept-Encoding": "gzip"})
+    assert first.status_code == 200
+    assert first.json() == HISTORY
+    assert first.headers["content-encoding"] == "gzip"
+    assert first.headers["vary"] == "Accept-Encoding"
+    # max-age is what remains of the history entry, which expires with the bar store's refresh interval
+    assert symbols.HISTORY_CACHE_TTL - 10 <= int(first.headers["cache-control"].split("max-age=")[1]) <= symbols.HISTORY_CACHE_TTL
+
+    etag = first.headers["etag"]
+    repeat = get("/api/stock/AAPL?period=1mo", {"If-None-Match": etag})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+    assert repeat.headers["etag"] == etag
+    assert calls["history"] == 1
+
+    # Each representation of the entry has its own ETag
+    columns = get("/api/stock/AAPL?period=1mo&format=columns", {"If-None-Match": etag})
+    assert columns.status_code == 200 and columns.headers["etag"] != etag
+
+    # A refreshed entry is a new version
+    symbols.stock_cache[symbols.history_cache_key("AAPL", "1mo")] = dict(HISTORY, volume=[0] * 28)
+    refreshed = get("/api/stock/AAPL?period=1mo", {"If-None-Match": etag})
+    assert refreshed.status_code == 200
+    assert refreshed.headers["etag"] != etag
+    assert refreshed.json()["volume"] == [0] * 28
+
+def test_unsupported_periods_are_rejected_up_front():
+    for path in ["/api/stock/AAPL?period=3x", "/api/stocks/history?symbols=AAPL,MSFT&period=3x"]:
+        response = get(path)
+        assert response.status_code == 400
+        assert response.json() == {"error": "Unsupported period '3x'"}
+    assert calls["history"] == 0
+
+def test_bulk_limit_covers_the_whole_universe():
+    with open(universe.UNIVERSE_SEED_PATH) as f:
+        constituents = json.load(f)["constituents"]
+    assert len(constituents) <= main.BULK_MAX_SYMBOLS
+
+def test_prediction_max_age_follows_the_prediction_cache():
+    predictor._prediction_cache[predictor.prediction_cache_key("AAPL", "1w")] = PREDICTION
+    first = get("/api/stock/AAPL/predict?period=1w")
+    assert first.json() == PREDICTION
+    # Too small to be worth compressing
+    assert "content-encoding" not in first.headers
+    assert int(first.headers["cache-control"].split("max-age=")[1]) > 86000
+
+    assert get("/api/stock/AAPL/predict?period=1w", {"If-None-Match": f'"abc", {first.headers["etag"]}'}).status_code == 304
+    assert get("/api/stock/AAPL/predict?period=1mo", {"If-None-Match": first.headers["etag"]}).status_code != 304
+
+def test_encoded_bodies_are_reused_per_version_and_encoding():
+    hits = responses._bodies.stats()["hits"]
+    get("/api/stock/AAPL?period=1mo", {"Accept-Encoding": "gzip"})
+    get("/api/stock/AAPL?period=1mo", {"Accept-Encoding": "gzip"})
+    get("/api/stock/AAPL?period=1mo", {"Accept-Encoding": "identity"})
+    stats = responses._bodies.stats()
+    assert (stats["entries"], stats["hits"] - hits) == (2, 1)
+
+def test_accept_encoding_and_if_none_match_parsing():
+    assert choose_encoding("gzip, deflate") == "gzip"
+    assert choose_encoding("gzip;q=0, deflate") is None
+    assert choose_encoding("*") == ("br" if responses.brotli is not None else "gzip")
+    assert choose_encoding(None) is None
+
+    current = entry_validator((42, 10.7), "rows")
+    assert current["max_age"] == 10
+    assert entry_validator((42, None))["max_age"] is None
+    assert entry_validator(None) is None
+
+    def request(if_none_match: str) -> Request:
+        return Request({"type": "http", "headers": [(b"if-none-match", if_none_match.encode())]})
+    assert is_not_modified(request(current["etag"].removeprefix("W/")), current)
+    assert is_not_modified(request("*"), current)
+    assert not is_not_modified(request('W/"other"'), current)
+
+def test_streamed_lines_are_compressed_without_buffering():
+    lines = [json.dumps({"panel": i, "data": "x" * 2000}).encode() + b"\n" for i in range(3)]
+
+    async def chunks():
+        for line in lines:
+            yield line
+
+    async def read():
+        request = Request({"type": "http", "headers": [(b"accept-encoding", b"gzip")]})
+        response = streaming_response(request, chunks(), media_type="application/x-ndjson")
+        return response.headers, [chunk async for chunk in response.body_iterator]
+    headers, body = asyncio.run(read())
+
+    assert headers["content-encoding"] == "gzip"
+    # Every chunk decompresses to a whole line on its own, so no panel waits for the next one
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    assert [decompressor.decompress(chunk) for chunk in body[:3]] == lines
+    assert sum(len(chunk) for chunk in body) < sum(len(line) for line in lines) / 4
+    assert gzip.decompress(b"".join(body)) == b"".join(lines)
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
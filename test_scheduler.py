@@ -0,0 +1,60 @@
+import os
+
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from datetime import datetime
+import pytest
+
+from logics import scheduler
+from logics.scheduler import PrecomputeScheduler, in_quiet_hours, parse_quiet_hours
+
+UNIVERSE = [{'symbol': symbol, 'name': f"{symbol} Inc."} for symbol in ["AAA", "BBB", "CCC", "DDD"]]
+
+@pytest.fixture
+def precompute(monkeypatch):
+    monkeypatch.setattr(scheduler, "get_sp500_constituents", lambda: UNIVERSE)
+    return PrecomputeScheduler(periods=["1w"], concurrency=1)
+
+def at(hour: int) -> datetime:
+    return datetime(2025, 1, 2, hour, 30)
+
+def test_parse_quiet_hours():
+    assert parse_quiet_hours("") is None
+    assert parse_quiet_hours("9-16") == (9, 16)
+    assert parse_quiet_hours("22-6") == (22, 6)
+    for spec in ["9", "9-16-20", "nine-16", "9-24", "-1-5"]:
+        with pytest.raises(ValueError):
+            parse_quiet_hours(spec)
+
+def test_in_quiet_hours_excludes_the_end_and_wraps_midnight():
+    assert not in_quiet_hours(None, at(12))
+    assert [hour for hour in range(24) if in_quiet_hours((9, 16), at(hour))] == list(range(9, 16))
+    assert [hour for hour in range(24) if in_quiet_hours((22, 6), at(hour))] == [0, 1, 2, 3, 4, 5, 22, 23]
+
+def test_malformed_quiet_hours_are_ignored(capsys):
+    precompute = PrecomputeScheduler(quiet_hours="9to16")
+    assert precompute.quiet_hours is None
+    assert precompute.status()["quiet_hours"] is None
+    assert "Ignoring PRECOMPUTE_QUIET_HOURS" in capsys.readouterr().out
+
+def test_only_universe_symbols_are_counted(precompute):
+    for symbol in ["BBB", "BBB", "NOPE", "../etc", "CCC"]:
+        precompute.record_request(symbol)
+    assert precompute.request_counts == {"BBB": 2, "CCC": 1}
+
+def test_most_requested_symbols_go_first_then_universe_order(precompute):
+    precompute._pending = {symbol: i for i, symbol in enumerate(["AAA", "BBB", "CCC", "DDD"])}
+    for symbol in ["CCC", "DDD", "DDD"]:
+        precompute.record_request(symbol)
+    assert precompute._next_symbol() == "DDD"
+
+    # Requests counted mid-pass reorder what is still pending
+    for _ in range(3):
+        precompute.record_request("BBB")
+    assert [precompute._next_symbol() for _ in range(4)] == ["BBB", "CCC", "AAA", None]
+    assert precompute._in_progress == {"AAA", "BBB", "CCC", "DDD"}
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
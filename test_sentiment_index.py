@@ -0,0 +1,88 @@
+import os
+
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+
+from logics.news import NewsFetchError
+from logics.sentiment_index import SentimentIndex, sentiment_regressor
+
+def article(i: int, published_date: str) -> dict:
+    return {"title": f"Headline {i}", "url": f"https://example.com/{i}", "content": f"Story number {i} " * 5,
+            "published_date": published_date, "source": "example", "score": 1.0}
+
+class FakeAnalyzer:
+    """
+    Serves scripted news and scores every article by a fixed balance per URL
+    """
+    def __init__(self, balances):
+        self.balances = balances
+        self.news = []
+        self.fetches = 0
+        self.scored = []
+        self.news_feeder = self
+
+    def fetch_company_news(self, company_name, ticker, max_results=20):
+        self.fetches += 1
+        if isinstance(self.news, Exception):
+            raise self.news
+        return self.news
+
+    def analyze_articles(self, articles, token_budget=None):
+        self.scored.extend(a["url"] for a in articles)
+        return [dict(a, sentiment_balance=self.balances[a["url"]]) for a in articles], 0
+
+@pytest.fixture
+def analyzer():
+    return FakeAnalyzer({f"https://example.com/{i}": b for i, b in enumerate([0.5, -0.5, 0.8, 0.2])})
+
+@pytest.fixture
+def index(analyzer, tmp_path):
+    return SentimentIndex(str(tmp_path / "index.sqlite"), refresh_interval=timedelta(0), analyzer=analyzer)
+
+def test_only_new_articles_are_scored(index, analyzer):
+    analyzer.news = [article(0, "2025-01-06"), article(1, "2025-01-06")]
+    assert index.update("AAPL", "Apple Inc.") == 2
+
+    # The next day's search returns yesterday's articles again plus a new one
+    analyzer.news = [article(0, "2025-01-06"), article(1, "2025-01-06"), article(2, "Tue, 07 Jan 2025 14:30:00 GMT")]
+    assert index.update("AAPL", "Apple Inc.") == 1
+
+    assert analyzer.scored == ["https://example.com/0", "https://example.com/1", "https://example.com/2"]
+    daily = index.daily_series("AAPL")
+    assert daily["date"].tolist() == ["2025-01-06", "2025-01-07"]
+    np.testing.assert_allclose(daily["sentiment"], [0.0, 0.8])
+    assert daily["articles"].tolist() == [2, 1]
+
+def test_news_is_fetched_at_most_once_per_refresh_interval(index, analyzer):
+    index.refresh_interval = timedelta(hours=24)
+    analyzer.news = [article(0, "2025-01-06")]
+    index.update("AAPL", "Apple Inc.")
+    index.update("AAPL", "Apple Inc.")
+
+    assert analyzer.fetches == 1
+
+def test_regressor_is_forward_filled_and_neutral_before_the_first_article():
+    ds = pd.Series(pd.to_datetime(["2025-01-02", "2025-01-03", "2025-01-06", "2025-01-07", "2025-01-08"]) + pd.Timedelta(hours=5))
+    daily = pd.DataFrame({"date": ["2025-01-03", "2025-01-05", "2025-01-08"], "sentiment": [0.4, -0.2, 0.6], "articles": [1, 1, 1]})
+
+    # Sunday's news applies from Monday on
+    np.testing.assert_allclose(sentiment_regressor(ds, daily), [0.0, 0.4, -0.2, -0.2, 0.6])
+    np.testing.assert_allclose(sentiment_regressor(ds, daily.iloc[:0]), np.zeros(5))
+
+def test_fetch_failure_serves_stored_sentiment(index, analyzer):
+    analyzer.news = NewsFetchError("down")
+    with pytest.raises(NewsFetchError):
+        index.update("AAPL", "Apple Inc.")
+
+    analyzer.news = [article(3, "2025-01-06")]
+    index.update("AAPL", "Apple Inc.")
+    analyzer.news = NewsFetchError("down")
+    assert index.update("AAPL", "Apple Inc.") == 0
+    assert index.daily_series("AAPL")["sentiment"].tolist() == [0.2]
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,244 @@
+import os
+import tempfile
+
+# Run CPU work inline and keep the sentiment cache out of the real cache directory
+os.environ["CPU_WORKERS"] = "0"
+os.environ["WARMUP_MODELS"] = "0"
+os.environ["SENTIMENT_CACHE_PATH"] = os.path.join(tempfile.mkdtemp(), "sentiment.sqlite")
+os.environ.setdefault("TAVILY_API_KEY", "test")
+
+import asyncio
+import json
+import re
+import threading
+import time
+from collections import Counter
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+
+import main
+from logics import bar_store, model_store, predictor, sentiment, sentiment_index, symbols
+from logics.news import NewsFetchError, ResponseCache
+from logics.registry import model_registry
+from logics.singleflight import SingleFlight
+
+CONCURRENT_REQUESTS = 20
+UPSTREAM_DELAY = 0.3  # Long enough for every request to arrive while the first is in flight
+
+calls = Counter()
+calls_lock = threading.Lock()
+
+def count(name: str):
+    with calls_lock:
+        calls[name] += 1
+
+class FakeTicker:
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+
+    @property
+    def info(self):
+        count(f"info:{self.symbol}")
+        time.sleep(UPSTREAM_DELAY)
+        return {"shortName": "Apple Inc.", "sector": "Technology", "regularMarketPrice": 200.0}
+
+    def history(self, period: str = "1mo", start=None):
+        count(f"history:{self.symbol}:{period}")
+        time.sleep(UPSTREAM_DELAY)
+        index = pd.date_range("2023-01-02", periods=500, freq="B", tz="America/New_York", name="Date")
+        close = 150 + np.random.default_rng(0).standard_normal(len(index)).cumsum()
+        return pd.DataFrame({
+            "Open": close, "High": close + 1, "Low": close - 1, "Close": close,
+            "Volume": np.full(len(index), 1_000_000)
+        }, index=index)
+
+def fake_fetch_company_news(company_name: str, ticker: str, max_results: int = 20):
+    count(f"news:{ticker}")
+    time.sleep(UPSTREAM_DELAY)
+    return [
+        {"title": f"{ticker} headline {i}", "url": f"https://example.com/{i}", "content": f"{ticker} story {i}",
+         "published_date": "2025-01-01", "source": "example", "score": 1.0}
+        for i in range(5)
+    ]
+
+def fake_score_texts(texts, batch_size: int = 16):
+    count("finbert")
+    time.sleep(UPSTREAM_DELAY)
+    return [
+        {"sentiment": "positive", "score": 0.9, "scores": {"negative": 0.05, "neutral": 0.05, "positive": 0.9}}
+        for _ in texts
+    ]
+
+class WhitespaceTokenizer:
+    """
+    Stands in for the FinBERT tokenizer when planning texts, one token per word, so no model is downloaded
+    """
+    def __call__(self, text: str, add_special_tokens: bool = True, return_offsets_mapping: bool = False):
+        offsets = [match.span() for match in re.finditer(r"\S+", text)]
+        return {"input_ids": list(range(len(offsets))), "offset_mapping": offsets}
+
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+real_fit_and_forecast = predictor._fit_and_forecast
+
+def counting_fit_and_forecast(pandas_df, forecast_days, init_model_json=None):
+    count("prophet")
+    return real_fit_and_forecast(pandas_df, forecast_days, init_model_json)
+
+@pytest.fixture(autouse=True)
+def fake_upstreams(monkeypatch, tmp_path):
+    calls.clear()
+    monkeypatch.setattr(bar_store, "_shared_store", bar_store.BarStore(str(tmp_path / "bars")))
+    monkeypatch.setattr(model_store, "_shared_store", model_store.ModelStore(str(tmp_path / "models")))
+    monkeypatch.setattr(sentiment_index, "_shared_index", sentiment_index.SentimentIndex(str(tmp_path / "index.sqlite")))
+    symbols.stock_cache.clear()
+    predictor._data_cache.clear()
+    predictor._prediction_cache.clear()
+    predictor._forecast_cache.clear()
+    sentiment.get_sentiment_analyzer().cache.clear()
+    monkeypatch.setattr(symbols.yf, "Ticker", FakeTicker)
+    monkeypatch.setattr(sentiment.get_sentiment_analyzer().news_feeder, "fetch_company_news", fake_fetch_company_news)
+    monkeypatch.setattr(sentiment, "score_texts", fake_score_texts)
+    monkeypatch.setitem(model_registry._models, "finbert_tokenizer", WhitespaceTokenizer())
+    monkeypatch.setattr(predictor, "_fit_and_forecast", counting_fit_and_forecast)
+
+async def fire(path: str, n: int = CONCURRENT_REQUESTS):
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+        return await asyncio.gather(*(client.get(path) for _ in range(n)))
+
+def test_concurrent_predictions_share_one_computation():
+    responses = asyncio.run(fire("/api/stock/AAPL/predict?period=1w"))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert len({r.content for r in responses}) == 1
+    assert calls == Counter({
+        "info:AAPL": 1,
+        "history:AAPL:2y": 1,
+        "news:AAPL": 1,
+        "finbert": 1,
+        "prophet": 1
+    })
+
+def test_all_periods_share_one_fit():
+    async def fire_all_periods():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+            return await asyncio.gather(*(
+                client.get(f"/api/stock/AAPL/predict?period={period}") for period in predictor.PERIOD_DAYS
+            ))
+
+    responses = asyncio.run(fire_all_periods())
+
+    assert all(r.status_code == 200 for r in responses)
+    assert [len(r.json()["dates"]) for r in responses] == list(predictor.PERIOD_DAYS.values())
+    assert calls["prophet"] == 1
+
+def test_concurrent_sentiment_requests_share_one_computation():
+    responses = asyncio.run(fire("/api/stock/AAPL/sentiment"))
+
+    assert all(r.status_code == 200 for r in responses)
+    assert calls == Counter({"info:AAPL": 1, "news:AAPL": 1, "finbert": 1})
+
+def test_concurrent_history_requests_share_one_fetch():
+    responses = asyncio.run(fire("/api/stock/AAPL?period=1mo"))
+
+    # A new symbol is backfilled with the default two years of bars
+    assert all(r.status_code == 200 for r in responses)
+    assert calls == Counter({"history:AAPL:2y": 1})
+
+def use_real_news_client(monkeypatch, tmp_path):
+    # Go through the real news client so its response cache and coalescing are shared, only the HTTP call is faked
+    feeder = sentiment.get_sentiment_analyzer().news_feeder
+    monkeypatch.delattr(feeder, "fetch_company_news")
+    monkeypatch.setattr(feeder, "cache", ResponseCache(str(tmp_path / "news")))
+
+    async def fake_post(payload):
+        # Off the client's loop, like the real request, so concurrent searches overlap
+        return {"results": await asyncio.to_thread(fake_fetch_company_news, "Apple Inc.", "AAPL")}
+    monkeypatch.setattr(feeder, "_post", fake_post)
+
+def test_prediction_and_sentiment_requests_share_one_news_search(monkeypatch, tmp_path):
+    use_real_news_client(monkeypatch, tmp_path)
+
+    async def fire_mixed():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+            return await asyncio.gather(*(
+                client.get(path) for path in ["/api/stock/AAPL/predict?period=1w", "/api/stock/AAPL/sentiment"] * 5
+            ))
+
+    responses = asyncio.run(fire_mixed())
+
+    # The predict path searches through the sentiment index, not analyze_company_sentiment
+    assert all(r.status_code == 200 for r in responses)
+    assert calls["news:AAPL"] == 1
+
+def test_dashboard_streams_every_panel_and_shares_inputs(monkeypatch, tmp_path):
+    use_real_news_client(monkeypatch, tmp_path)
+
+    responses = asyncio.run(fire("/api/stock/AAPL/dashboard?period=1mo", n=1))
+
+    assert responses[0].headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in responses[0].text.splitlines()]
+    panels = [line["panel"] for line in lines]
+    assert sorted(panels) == ["details", "history", "prediction", "sentiment"]
+    # The Prophet fit waits for the sentiment panel, the fast panels do not wait for either
+    assert panels.index("prediction") == 3
+    assert all("data" in line for line in lines)
+    # Company info and news are fetched once and FinBERT runs once for all panels
+    assert calls == Counter({
+        "info:AAPL": 1,
+        "history:AAPL:2y": 1,
+        "news:AAPL": 1,
+        "finbert": 1,
+        "prophet": 1
+    })
+
+def test_dashboard_reports_a_failed_panel_without_dropping_the_others(monkeypatch):
+    def failing_fetch_company_news(company_name: str, ticker: str, max_results: int = 20):
+        raise NewsFetchError("Tavily is down")
+    monkeypatch.setattr(sentiment.get_sentiment_analyzer().news_feeder, "fetch_company_news", failing_fetch_company_news)
+
+    responses = asyncio.run(fire("/api/stock/AAPL/dashboard?period=1mo", n=1))
+
+    lines = {line["panel"]: line for line in map(json.loads, responses[0].text.splitlines())}
+    assert lines["sentiment"]["status"] == 502
+    assert lines["prediction"]["status"] == 502
+    assert "data" in lines["details"] and "data" in lines["history"]
+
+def test_errors_are_shared_and_not_cached():
+    flight = SingleFlight()
+    errors = []
+
+    def failing_fetch():
+        count("fetch")
+        time.sleep(UPSTREAM_DELAY)
+        raise RuntimeError("upstream down")
+
+    def caller():
+        try:
+            flight.do("AAPL", failing_fetch)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=caller) for _ in range(CONCURRENT_REQUESTS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert calls["fetch"] == 1
+    assert len(errors) == CONCURRENT_REQUESTS
+    assert flight.in_flight() == 0
+
+    # The failure is not remembered, the next call runs again
+    with pytest.raises(RuntimeError):
+        flight.do("AAPL", failing_fetch)
+    assert calls["fetch"] == 2
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
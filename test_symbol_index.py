@@ -0,0 +1,47 @@
+import pytest
+
+from logics.symbol_index import SymbolIndex
+
+CONSTITUENTS = [
+    {"symbol": "AAPL", "name": "Apple Inc.", "sector": "Information Technology"},
+    {"symbol": "MSFT", "name": "Microsoft", "sector": "Information Technology"},
+    {"symbol": "MS", "name": "Morgan Stanley", "sector": "Financials"},
+    {"symbol": "MMM", "name": "3M", "sector": "Industrials"},
+    {"symbol": "JPM", "name": "JPMorgan Chase", "sector": "Financials"},
+    {"symbol": "BRK.B", "name": "Berkshire Hathaway", "sector": "Financials"},
+    {"symbol": "GOOGL", "name": "Alphabet Inc. (Class A)", "sector": "Communication Services"},
+    {"symbol": "GOOG", "name": "Alphabet Inc. (Class C)", "sector": "Communication Services"},
+]
+
+@pytest.fixture(scope="module")
+def index():
+    return SymbolIndex(CONSTITUENTS)
+
+def symbols(results):
+    return [r["symbol"] for r in results]
+
+def test_exact_ticker_ranks_before_longer_prefixes(index):
+    assert symbols(index.search("ms")) == ["MS", "MSFT"]
+    assert symbols(index.search("GOOG"))[:2] == ["GOOG", "GOOGL"]
+
+def test_company_names_and_sectors_are_searchable(index):
+    assert symbols(index.search("apple")) == ["AAPL"]
+    assert symbols(index.search("stanley")) == ["MS"]
+    assert symbols(index.search("financ")) == ["BRK.B", "JPM", "MS"]
+
+def test_ticker_matches_rank_above_name_and_sector_matches(index):
+    results = index.search("m")
+    assert symbols(results)[:3] == ["MS", "MMM", "MSFT"]
+    assert results[0]["score"] > results[-1]["score"]
+
+def test_typos_fall_back_to_fuzzy_matches(index):
+    assert symbols(index.search("microsfot"))[0] == "MSFT"
+    assert symbols(index.search("berkshire hathway"))[0] == "BRK.B"
+    assert index.search("zzzz") == []
+
+def test_results_are_limited(index):
+    assert len(index.search("a", limit=2)) == 2
+    assert index.search("   ") == []
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+import pytest
+
+from logics import universe
+from logics.universe import DEFAULT_CONSTITUENTS, UNIVERSE_SEED_PATH, UniverseStore
+
+def constituents(n: int = 500, sector: str = "Financials"):
+    return [{"symbol": f"S{i}", "name": f"Company {i}", "sector": sector, "industry": "Banks"} for i in range(n)]
+
+class FakeWikipedia:
+    def __init__(self, result, delay: float = 0.0):
+        self.result = result
+        self.delay = delay
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+@pytest.fixture(autouse=True)
+def no_seed(monkeypatch, tmp_path):
+    # Start from an empty cache unless a test opts into the shipped seed
+    monkeypatch.setattr(universe, "UNIVERSE_SEED_PATH", str(tmp_path / "missing-seed.json"))
+
+@pytest.fixture
+def wikipedia(monkeypatch):
+    fake = FakeWikipedia(constituents())
+    monkeypatch.setattr(universe, "fetch_sp500_constituents", fake)
+    return fake
+
+def wait_for_refresh():
+    for thread in threading.enumerate():
+        if thread.name == "universe-refresh":
+            thread.join()
+
+def test_fresh_checkout_serves_the_seed_and_refreshes_in_background(wikipedia, tmp_path):
+    store = UniverseStore(str(tmp_path / "snapshot.json"), seed_path=UNIVERSE_SEED_PATH)
+
+    seed = store.constituents()
+    assert len(seed) > 500
+    assert {"AAPL", "JPM", "XOM", "BRK.B"} <= {c["symbol"] for c in seed}
+    assert store.status()["stale"]
+    wait_for_refresh()
+
+    # The refresh replaces the seed and writes the first snapshot to the cache
+    assert wikipedia.calls == 1
+    assert len(store.constituents()) == 500
+    assert store.status()["version"] == 2
+    with open(tmp_path / "snapshot.json") as f:
+        assert json.load(f)["version"] == 2
+
+def test_seed_is_a_valid_snapshot():
+    with open(UNIVERSE_SEED_PATH) as f:
+        seed = json.load(f)
+
+    assert seed["content_hash"] == universe._content_hash(seed["constituents"])
+    assert len(seed["constituents"]) >= universe.UNIVERSE_MIN_SIZE
+    assert len({c["symbol"] for c in seed["constituents"]}) == len(seed["constituents"])
+
+def test_without_a_seed_first_start_serves_defaults_and_refreshes_in_background(wikipedia, tmp_path):
+    store = UniverseStore(str(tmp_path / "snapshot.json"))
+
+    assert store.constituents() is DEFAULT_CONSTITUENTS
+    wait_for_refresh()
+
+    assert len(store.constituents()) == 500
+    assert store.status()["version"] == 1
+    with open(tmp_path / "snapshot.json") as f:
+        assert json.load(f)["version"] == 1
+
+def test_first_refresh_is_not_held_back_on_a_freshly_booted_host(wikipedia, tmp_path, monkeypatch):
+    # time.monotonic() counts from boot on Linux, so it can be below the retry interval
+    monkeypatch.setattr(universe.time, "monotonic", lambda: 5.0)
+    store = UniverseStore(str(tmp_path / "snapshot.json"), retry_interval=900)
+
+    assert store.refresh_in_background() is not None
+    wait_for_refresh()
+    assert wikipedia.calls == 1
+
+def test_restart_loads_the_snapshot_without_fetching(wikipedia, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    UniverseStore(path).refresh()
+    wikipedia.calls = 0
+
+    start = time.perf_counter()
+    store = UniverseStore(path)
+    assert len(store.constituents()) == 500
+    assert time.perf_counter() - start < 0.5
+    assert wikipedia.calls == 0
+
+def test_stale_snapshot_is_served_while_revalidating(wikipedia, tmp_path):
+    store = UniverseStore(str(tmp_path / "snapshot.json"), max_age=0)
+    store.refresh()
+    before = store.constituents()
+
+    # A slow fetch of a changed list does not block readers
+    wikipedia.result = constituents(sector="Energy")
+    wikipedia.delay = 0.5
+    start = time.perf_counter()
+    assert store.constituents() is before
+    assert time.perf_counter() - start < 0.1
+    wait_for_refresh()
+
+    assert store.constituents()[0]["sector"] == "Energy"
+    assert store.status()["version"] == 2
+
+def test_unchanged_list_keeps_its_version_and_identity(wikipedia, tmp_path):
+    store = UniverseStore(str(tmp_path / "snapshot.json"))
+    store.refresh()
+    before = store.constituents()
+    store.refresh()
+
+    assert store.constituents() is before
+    assert store.status()["version"] == 1
+
+def test_failed_or_truncated_fetches_keep_the_current_snapshot(wikipedia, tmp_path):
+    store = UniverseStore(str(tmp_path / "snapshot.json"), max_age=0, retry_interval=0)
+    store.refresh()
+
+    wikipedia.result = constituents(n=5)
+    store.refresh_in_background().join()
+    wikipedia.result = RuntimeError("wikipedia down")
+    store.refresh_in_background().join()
+
+    assert len(store.constituents()) == 500
+    assert store.status()["last_error"] == "wikipedia down"
+
+def test_failed_refreshes_are_not_retried_on_every_read(wikipedia, tmp_path):
+    wikipedia.result = RuntimeError("wikipedia down")
+    store = UniverseStore(str(tmp_path / "snapshot.json"), retry_interval=60)
+
+    for _ in range(5):
+        store.constituents()
+        wait_for_refresh()
+
+    assert wikipedia.calls == 1
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__, "-q"]))